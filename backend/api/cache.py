@@ -0,0 +1,243 @@
+import asyncio
+import hashlib
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from sqlalchemy import DateTime, Enum as SQLEnum, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from api.config import settings
+from api.logger import logger
+
+_redis_client = None
+_entity_caches = []
+
+def get_redis():
+    """Return the shared Redis client, or None when REDIS_URL is not set"""
+    global _redis_client
+    if _redis_client is None and settings.REDIS_URL:
+        _redis_client = redis.from_url(settings.REDIS_URL)
+    return _redis_client
+
+def set_redis_client(client) -> None:
+    """
+    Replace the shared Redis client
+
+    Used to plug in an in-process stand-in such as
+    `fakeredis.aioredis.FakeRedis()`, or None to disable caching.
+    """
+    global _redis_client
+    _redis_client = client
+
+def _statement_written(state) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info["pending_writes"] = True
+
+def _flushed(session: Session, flush_context) -> None:
+    session.info["pending_writes"] = True
+
+def _transaction_ended(session: Session) -> None:
+    session.info.pop("pending_writes", None)
+
+# Rows read after a write in the same transaction may never commit
+event.listen(Session, "do_orm_execute", _statement_written)
+event.listen(Session, "after_flush", _flushed)
+event.listen(Session, "after_commit", _transaction_ended)
+event.listen(Session, "after_rollback", _transaction_ended)
+
+def has_pending_writes(db: AsyncSession) -> bool:
+    """Whether a session has written in its current transaction, which may still roll back"""
+    return "pending_writes" in db.info
+
+class EntityCache:
+    """
+    Read-through Redis cache of entity rows by ID
+
+    Rows are stored as JSON of their column values and come back as
+    transient (session-less) entity instances. Concurrent misses for the same
+    ID are collapsed: within a process only one coroutine loads the row, and
+    across processes a short Redis lock makes the others wait for the value
+    instead of all hitting the database.
+    """
+
+    def __init__(self, model: Any, namespace: str, exclude: Iterable[str] = ()):
+        self.model = model
+        self.namespace = namespace
+        self.exclude = set(exclude)
+        self.columns = [column for column in model.__table__.columns if column.key not in self.exclude]
+        # Part of every key, so rows cached before a column was added are never served
+        self.schema = hashlib.sha1(",".join(column.key for column in self.columns).encode()).hexdigest()[:8]
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        _entity_caches.append(self)
+
+    def key(self, entity_id: str) -> str:
+        return f"{settings.CACHE_KEY_PREFIX}:{self.namespace}:{self.schema}:{entity_id}"
+
+    def serialize(self, instance: Any) -> str:
+        data = {}
+        for column in self.columns:
+            value = getattr(instance, column.key)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            elif hasattr(value, "value") and isinstance(column.type, SQLEnum):
+                value = value.value
+            data[column.key] = value
+        return json.dumps(data)
+
+    def deserialize(self, payload: Any) -> Any:
+        data = json.loads(payload)
+        for column in self.columns:
+            value = data.get(column.key)
+            if value is None:
+                continue
+            if isinstance(column.type, DateTime):
+                data[column.key] = datetime.fromisoformat(value)
+            elif isinstance(column.type, SQLEnum) and column.type.enum_class is not None:
+                data[column.key] = column.type.enum_class(value)
+        return self.model(**data)
+
+    async def get_or_load(self, entity_id: str, loader: Callable[[], Awaitable[Any]], db: Optional[AsyncSession] = None) -> Any:
+        """
+        Return the entity from Redis, loading and caching it on a miss
+
+        Args:
+            db: Session the loader reads from. Once it has written, Redis is
+                bypassed: the session must see its own writes, and they may
+                still roll back. Rows it reads from a replica are not cached,
+                as they could re-cache a row just invalidated on the primary.
+        """
+        client = get_redis()
+        if client is None or (db is not None and has_pending_writes(db)):
+            return await loader()
+        # Replica sessions are marked in their info, see database.is_replica
+        fill = db is None or "replica" not in db.info
+
+        key = self.key(entity_id)
+        try:
+            cached = await client.get(key)
+        except RedisError as e:
+            self._error("read", e)
+            return await loader()
+        if cached is not None:
+            self.hits += 1
+            return self.deserialize(cached)
+
+        self.misses += 1
+        if not fill:
+            return await loader()
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            # Another coroutine is already loading this row
+            payload = await asyncio.shield(inflight)
+            return self.deserialize(payload) if payload is not None else None
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            instance = await self._load(client, key, loader)
+            future.set_result(self.serialize(instance) if instance is not None else None)
+            return instance
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _load(self, client, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        lock_key = f"{key}:lock"
+        lock_token = uuid.uuid4().hex
+        try:
+            locked = await client.set(lock_key, lock_token, nx=True, px=settings.CACHE_LOCK_TIMEOUT_MS)
+        except RedisError as e:
+            self._error("lock", e)
+            return await loader()
+
+        if not locked:
+            # Another process is loading the row, give it a moment to fill the cache
+            waited = 0.0
+            while waited < settings.CACHE_LOCK_WAIT_SECONDS:
+                await asyncio.sleep(0.01)
+                waited += 0.01
+                try:
+                    cached = await client.get(key)
+                except RedisError as e:
+                    self._error("read", e)
+                    break
+                if cached is not None:
+                    return self.deserialize(cached)
+            return await loader()
+
+        try:
+            instance = await loader()
+            if instance is not None:
+                await client.set(key, self.serialize(instance), ex=settings.CACHE_TTL_SECONDS)
+            return instance
+        except RedisError as e:
+            self._error("write", e)
+            return instance
+        finally:
+            try:
+                if await client.get(lock_key) == lock_token.encode():
+                    await client.delete(lock_key)
+            except RedisError as e:
+                self._error("unlock", e)
+
+    async def invalidate(self, entity_id: str, db: Optional[AsyncSession] = None) -> None:
+        """
+        Drop a cached entity after it was updated or deleted
+
+        When the session is given, the key is dropped again once that session
+        commits, so a concurrent reader cannot re-cache the pre-commit row.
+        """
+        client = get_redis()
+        if client is None:
+            return
+        key = self.key(entity_id)
+        if db is not None:
+            db.info.setdefault("cache_invalidations", set()).add(key)
+        try:
+            await client.delete(key)
+        except RedisError as e:
+            self._error("invalidate", e)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "errors": self.errors,
+        }
+
+    def _error(self, operation: str, error: Exception) -> None:
+        self.errors += 1
+        logger.warning(f"Entity cache {operation} failed for {self.namespace}: {error}")
+
+async def flush_invalidations(db: AsyncSession) -> None:
+    """
+    Drop the keys invalidated in a session, called after it commits or rolls back
+
+    After a rollback this drops anything cached from the rolled back rows.
+    """
+    keys = db.info.pop("cache_invalidations", None)
+    client = get_redis()
+    if not keys or client is None:
+        return
+    try:
+        await client.delete(*keys)
+    except RedisError as e:
+        logger.warning(f"Entity cache invalidation after commit failed: {e}")
+
+def entity_cache_stats() -> Dict[str, Any]:
+    """Return the counters of every entity cache"""
+    return {cache.namespace: cache.stats() for cache in _entity_caches}
@@ -1,10 +1,18 @@
-from typing import List
+from typing import Dict, List
 import os
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+def parse_rates(value: str) -> Dict[str, float]:
+    """Parse "route=rate,route=rate" into a dict"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        route, _, rate = item.rpartition("=")
+        rates[route.strip()] = float(rate)
+    return rates
+
 class Settings:
     # API settings
     API_PREFIX: str = "/api"
@@ -14,17 +22,115 @@ class Settings:
     
     # Database settings
     DATABASE_URL: str = os.getenv("DATABASE_URL")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING") == "true"
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+    # Connections per engine opened and primed at startup, before readiness
+    DB_POOL_WARMUP_CONNECTIONS: int = int(os.getenv("DB_POOL_WARMUP_CONNECTIONS", os.getenv("DB_POOL_SIZE", "5")))
+    
+    # Read replicas (comma-separated URLs) serving GET and HEAD requests while
+    # within MAX_LAG of the primary; a caller reads from the primary for
+    # STICKY seconds after writing, to see its own writes
+    DATABASE_REPLICA_URLS: List[str] = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+    DB_REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "2"))
+    DB_REPLICA_CHECK_INTERVAL_SECONDS: float = float(os.getenv("DB_REPLICA_CHECK_INTERVAL_SECONDS", "1"))
+    DB_REPLICA_CHECK_TIMEOUT_SECONDS: float = float(os.getenv("DB_REPLICA_CHECK_TIMEOUT_SECONDS", "1"))
+    DB_REPLICA_STICKY_SECONDS: float = float(os.getenv("DB_REPLICA_STICKY_SECONDS", "5"))
+    
+    # Schema handling at startup: "migrate" applies the models' schema when
+    # its version changed, "check" only verifies it was applied by
+    # `python -m api.migrate` and refuses to start otherwise
+    DB_SCHEMA_MODE: str = os.getenv("DB_SCHEMA_MODE", "check" if os.getenv("ENVIRONMENT") == "production" else "migrate")
     
     # JWT settings
     SECRET_KEY: str = os.getenv("SECRET_KEY")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 1 day
     
+    # Key of the HMAC that API keys are stored as
+    API_KEY_SECRET: str = os.getenv("API_KEY_SECRET", os.getenv("SECRET_KEY"))
+    
+    # Password hashing
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PASSWORD_HASH_MAX_QUEUE: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+    
+    # Authenticated principal cache
+    PRINCIPAL_CACHE_MAX_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000"))
+    PRINCIPAL_CACHE_TTL_SECONDS: float = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    
+    # Bulk inventory import
+    BULK_IMPORT_BATCH_SIZE: int = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "5000"))
+    BULK_IMPORT_MAX_ERRORS: int = int(os.getenv("BULK_IMPORT_MAX_ERRORS", "1000"))
+    
+    # Inventory export: rows fetched from the server-side cursor per chunk
+    EXPORT_CHUNK_SIZE: int = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+    
+    # Pagination
+    PAGINATION_ESTIMATE_MIN_ROWS: int = int(os.getenv("PAGINATION_ESTIMATE_MIN_ROWS", "100000"))
+    
     # CORS settings
     CORS_ORIGINS: List[str] = os.getenv("CORS_ORIGINS").split(",")
     
     # Redis
     REDIS_URL: str = os.getenv("REDIS_URL")
     
+    # Entity cache (Redis read-through cache of rows by ID)
+    CACHE_KEY_PREFIX: str = os.getenv("CACHE_KEY_PREFIX", "warehouse")
+    CACHE_TTL_SECONDS: int = int(os.getenv("CACHE_TTL_SECONDS", "300"))
+    CACHE_LOCK_TIMEOUT_MS: int = int(os.getenv("CACHE_LOCK_TIMEOUT_MS", "5000"))
+    CACHE_LOCK_WAIT_SECONDS: float = float(os.getenv("CACHE_LOCK_WAIT_SECONDS", "0.2"))
+    
+    # Background jobs: "memory" runs jobs inside the API process, "celery"
+    # queues them on CELERY_BROKER_URL (defaults to REDIS_URL)
+    JOB_BACKEND: str = os.getenv("JOB_BACKEND", "memory")
+    JOB_BATCH_SIZE: int = int(os.getenv("JOB_BATCH_SIZE", "1000"))
+    JOB_MEMORY_CONCURRENCY: int = int(os.getenv("JOB_MEMORY_CONCURRENCY", "2"))
+    # A running job's lease, renewed after every batch; a job whose lease
+    # lapsed is taken to be interrupted and may be resumed by another runner
+    JOB_LEASE_SECONDS: float = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+    CELERY_BROKER_URL: str = os.getenv("CELERY_BROKER_URL")
+    
+    # Inventory ledger snapshots: taken every interval, for the boundary at
+    # least LAG seconds old. Movements before the boundary committed after
+    # the snapshot are still counted, LAG only makes them rare
+    INVENTORY_SNAPSHOT_INTERVAL_SECONDS: int = int(os.getenv("INVENTORY_SNAPSHOT_INTERVAL_SECONDS", "86400"))
+    INVENTORY_SNAPSHOT_LAG_SECONDS: int = int(os.getenv("INVENTORY_SNAPSHOT_LAG_SECONDS", "300"))
+    
+    # Seconds between folds of the per-SKU and per-warehouse summary deltas
+    INVENTORY_SUMMARY_FOLD_SECONDS: float = float(os.getenv("INVENTORY_SUMMARY_FOLD_SECONDS", "10"))
+    
+    # Access logging: fraction of successful requests logged, globally and
+    # per route template, e.g. "/health=0,/api/inventory/=0.1"
+    ACCESS_LOG_SAMPLE_RATE: float = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1.0"))
+    ACCESS_LOG_ROUTE_SAMPLE_RATES: Dict[str, float] = parse_rates(os.getenv("ACCESS_LOG_ROUTE_SAMPLE_RATES", ""))
+    
+    # Seconds between SIGTERM and uvicorn closing the listener, while
+    # readiness reports draining so load balancers stop routing here
+    SHUTDOWN_READINESS_DELAY_SECONDS: float = float(os.getenv("SHUTDOWN_READINESS_DELAY_SECONDS", "5"))
+    
+    # Rate limiting: token buckets per principal (user of a verified bearer
+    # token, else client IP) and route class (auth, export, write, read), given as
+    # "class=requests per second" and "class=burst size"
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true") == "true"
+    RATE_LIMIT_RATES: Dict[str, float] = parse_rates(os.getenv("RATE_LIMIT_RATES", "auth=0.5,export=0.1,write=20,read=50"))
+    RATE_LIMIT_BURSTS: Dict[str, float] = parse_rates(os.getenv("RATE_LIMIT_BURSTS", "auth=5,export=2,write=40,read=100"))
+    
+    # Addresses or CIDR ranges of the proxies in front of the API, e.g.
+    # "10.0.0.0/8"; behind them the client IP is taken from X-Forwarded-For
+    TRUSTED_PROXIES: List[str] = os.getenv("TRUSTED_PROXIES", "").split(",")
+    
+    # Load shedding: API requests handled at once per worker (default the
+    # pool's capacity); others wait up to QUEUE seconds, then get a 503
+    MAX_CONCURRENT_DB_REQUESTS: int = int(os.getenv("MAX_CONCURRENT_DB_REQUESTS", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+    LOAD_SHED_QUEUE_SECONDS: float = float(os.getenv("LOAD_SHED_QUEUE_SECONDS", "0.5"))
+    
+    # Super admin created once at startup when both are set
+    ADMIN_EMAIL: str = os.getenv("ADMIN_EMAIL")
+    ADMIN_PASSWORD: str = os.getenv("ADMIN_PASSWORD")
+    
     # Environment
     ENVIRONMENT: str = os.getenv("ENVIRONMENT")
     # Note: removed BaseSettings inheritance and Config class to avoid pydantic parsing
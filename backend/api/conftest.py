@@ -0,0 +1,69 @@
+import asyncio
+import os
+import uuid
+from typing import Dict, List, Tuple
+
+import pytest
+
+@pytest.fixture
+def run_db():
+    """
+    Return a function running a coroutine against the database of DATABASE_URL
+
+    The schema is applied first, and the test is skipped without
+    DATABASE_URL. Each call gets its own event loop, so the pool is disposed
+    afterwards: its connections belong to the loop that opened them.
+    """
+    if not os.getenv("DATABASE_URL"):
+        pytest.skip("DATABASE_URL is not set")
+    from api.database import engine, init_db
+
+    async def with_schema(coroutine):
+        await init_db()
+        return await coroutine
+
+    def run(coroutine):
+        try:
+            return asyncio.run(with_schema(coroutine))
+        finally:
+            asyncio.run(engine.dispose())
+
+    return run
+
+async def _create_stock(warehouses: int = 1, skus: int = 0, quantity: int = 10,
+                        unit_quantity: int = 12) -> Tuple[List[str], Dict[Tuple[str, str], str]]:
+    from api.database import async_session_factory
+    from api.modules.item_unit.dto.input import ItemUnitCreate
+    from api.modules.item_unit.service.item_unit_service import ItemUnitService
+    from api.modules.warehouse.dto.input import WarehouseCreate
+    from api.modules.warehouse.service.warehouse_service import WarehouseService
+    from api.modules.warehouse_inventory.dto.input import WarehouseInventoryCreate
+    from api.modules.warehouse_inventory.service.warehouse_inventory_service import WarehouseInventoryService
+
+    run = uuid.uuid4().hex[:8]
+    async with async_session_factory() as session:
+        unit = await ItemUnitService(session).create_item_unit(ItemUnitCreate(unit=f"unit-{run}", quantity=unit_quantity))
+        warehouse_ids = []
+        items = {}
+        for index in range(warehouses):
+            warehouse = await WarehouseService(session).create_warehouse(WarehouseCreate(location=f"test-{run}-{index}"))
+            warehouse_ids.append(warehouse.id)
+            for sku_index in range(skus):
+                sku = f"sku-{run}-{sku_index:02d}"
+                item = await WarehouseInventoryService(session).create_inventory(
+                    WarehouseInventoryCreate(warehouse_id=warehouse.id, sku=sku, quantity=quantity, unit_id=unit.id)
+                )
+                items[(warehouse.id, sku)] = item.id
+        await session.commit()
+    return warehouse_ids, items
+
+@pytest.fixture
+def create_stock(run_db):
+    """
+    Return a coroutine function creating warehouses that stock the same SKUs
+
+    The SKUs get `quantity` each, in a fresh item unit of `unit_quantity`
+    base units. It returns the warehouse IDs and the inventory item IDs by
+    (warehouse ID, SKU); SKUs sort in the order they were created.
+    """
+    return _create_stock
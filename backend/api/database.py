@@ -1,15 +1,48 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
-from typing import AsyncGenerator
-from fastapi import Depends
+from sqlalchemy import Column, DateTime, Integer, String, Table, inspect, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.schema import CreateColumn, CreateIndex, CreateTable
+from typing import AsyncGenerator, Optional
+import hashlib
+import importlib
+from fastapi import Depends, Request
 
 from api.config import settings
+from api.db_pool import InstrumentedAsyncPool
+from api.db_replicas import Replica, ReplicaRouter
+from api.cache import flush_invalidations
+from api.middlewares.auth.principal_cache import publish_invalidations
+
+# Methods whose requests may be served by a read replica
+READ_METHODS = {"GET", "HEAD"}
+
+def _create_engine(url: str):
+    return create_async_engine(
+        url, 
+        echo=settings.DEBUG,
+        future=True,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        # Size of asyncpg's per-connection prepared statement cache
+        connect_args={"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+    )
 
 # Create SQLAlchemy engine
-engine = create_async_engine(
-    settings.DATABASE_URL, 
-    echo=settings.DEBUG,
-    future=True
+engine = _create_engine(settings.DATABASE_URL)
+
+# Read replicas, each with its own pool
+replica_engines = [_create_engine(url) for url in settings.DATABASE_REPLICA_URLS]
+replica_router = ReplicaRouter(
+    [Replica(f"replica{index}", replica_engine) for index, replica_engine in enumerate(replica_engines)],
+    max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.DB_REPLICA_CHECK_INTERVAL_SECONDS,
+    sticky_seconds=settings.DB_REPLICA_STICKY_SECONDS,
 )
 
 # Create async session factory
@@ -22,19 +55,154 @@ async_session_factory = sessionmaker(
 # Create base class for models
 Base = declarative_base()
 
-async def init_db():
+# Every module declaring tables, so the schema is complete whoever calls init_db
+MODEL_MODULES = [
+    "api.modules.user.entity.user_entity",
+    "api.modules.warehouse.entity.warehouse_entity",
+    "api.modules.item_unit.entity.item_unit_entity",
+    "api.modules.warehouse_inventory.entity.warehouse_inventory_entity",
+    "api.modules.warehouse_inventory.entity.inventory_summary_entity",
+    "api.modules.inventory_ledger.entity.inventory_ledger_entity",
+    "api.modules.job.entity.job_entity",
+]
+
+# Fingerprint of the schema init_db last applied, in a single row
+schema_version_table = Table(
+    "schema_version",
+    Base.metadata,
+    Column("id", Integer, primary_key=True),
+    Column("version", String(64), nullable=False),
+    Column("applied_at", DateTime, nullable=False, server_default=text("(now() AT TIME ZONE 'utc')")),
+)
+
+# pg_advisory_xact_lock keys serializing work across processes
+SCHEMA_LOCK_KEY = 7_300_001
+BOOTSTRAP_LOCK_KEY = 7_300_002
+SUMMARY_FOLD_LOCK_KEY = 7_300_003
+
+class SchemaVersionError(Exception):
+    """Raised when the database schema does not match the models"""
+
+def schema_fingerprint() -> str:
+    """
+    Digest of the DDL the models declare
+
+    Covers tables, indexes and the statements run after create_all
+    (functions, triggers, backfills), so it changes whenever init_db
+    would have something new to apply.
+    """
+    for module in MODEL_MODULES:
+        importlib.import_module(module)
+    dialect = postgresql.dialect()
+    parts = []
+    for table in Base.metadata.sorted_tables:
+        parts.append(str(CreateTable(table).compile(dialect=dialect)))
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            parts.append(str(CreateIndex(index).compile(dialect=dialect)))
+    for listener in Base.metadata.dispatch.after_create:
+        parts.append(str(getattr(listener, "statement", listener)))
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()[:16]
+
+async def _applied_version(conn) -> Optional[str]:
+    if await conn.scalar(text("SELECT to_regclass('schema_version')")) is None:
+        return None
+    return await conn.scalar(select(schema_version_table.c.version).where(schema_version_table.c.id == 1))
+
+async def init_db(force: bool = False) -> bool:
+    """
+    Bring the database schema up to the models
+
+    Concurrent callers are serialized by an advisory lock, and the work is
+    skipped while the recorded schema version matches the models.
+
+    Args:
+        force: Re-apply the schema even when the version matches
+
+    Returns:
+        Whether the schema was applied
+    """
+    version = schema_fingerprint()
+    if not force:
+        async with engine.connect() as conn:
+            if await _applied_version(conn) == version:
+                return False
+
     async with engine.begin() as conn:
+        # Processes starting together wait here, then find the work done
+        await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        if not force and await _applied_version(conn) == version:
+            return False
         # For development purposes, uncomment this to reset tables:
         # await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
+        await conn.run_sync(_create_missing_indexes)
+        statement = insert(schema_version_table).values(id=1, version=version)
+        await conn.execute(statement.on_conflict_do_update(
+            index_elements=[schema_version_table.c.id],
+            set_={"version": version, "applied_at": text("now() AT TIME ZONE 'utc'")},
+        ))
+    return True
+
+async def check_schema() -> None:
+    """Raise SchemaVersionError unless init_db applied the models' schema"""
+    version = schema_fingerprint()
+    async with engine.connect() as conn:
+        applied = await _applied_version(conn)
+    if applied != version:
+        raise SchemaVersionError(
+            f"Database schema is at version {applied}, the models expect {version}; "
+            f"run `python -m api.migrate` before starting the API"
+        )
+
+def _add_missing_columns(connection):
+    """Add columns declared on tables that already existed"""
+    # create_all does not alter existing tables; columns added to a model
+    # later need a server default (or to be nullable) to fill existing rows
+    inspector = inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                spec = CreateColumn(column).compile(dialect=connection.dialect)
+                connection.execute(text(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN IF NOT EXISTS {spec}"))
+
+def _create_missing_indexes(connection):
+    """Create indexes declared on tables that already existed"""
+    # create_all skips existing tables, and with them any index added later
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+def is_replica(session: AsyncSession) -> bool:
+    """Whether a session reads from a replica, which may lag the primary"""
+    return "replica" in session.info
+
+async def read_session_factory(request: Optional[Request] = None):
+    """Return the session factory of a caught-up replica, or of the primary"""
+    replica = await replica_router.choose(request)
+    return replica.session_factory if replica is not None else async_session_factory
+
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for getting async DB sessions
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """Dependency for getting async DB sessions"""
-    async with async_session_factory() as session:
+    GET and HEAD requests get a replica session when one is caught up and
+    the caller has not written recently; other requests use the primary.
+    """
+    read_only = request.method in READ_METHODS
+    factory = await read_session_factory(request) if read_only else async_session_factory
+    async with factory() as session:
         try:
             yield session
             await session.commit()
+            await flush_invalidations(session)
+            await publish_invalidations(session)
         except Exception:
             await session.rollback()
+            await flush_invalidations(session)
             raise
+    if not read_only:
+        await replica_router.record_write(request)
         
\ No newline at end of file
@@ -0,0 +1,75 @@
+import time
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+class PoolMetrics:
+    """Counters describing how long requests wait for pooled connections"""
+
+    # Upper bounds (seconds) of the checkout wait histogram buckets
+    WAIT_BUCKETS = (0.001, 0.01, 0.1, 1.0, float("inf"))
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.wait_buckets = [0] * len(self.WAIT_BUCKETS)
+
+    def record_wait(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+        for index, bound in enumerate(self.WAIT_BUCKETS):
+            if seconds <= bound:
+                self.wait_buckets[index] += 1
+                break
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+            "wait_seconds_max": round(self.wait_seconds_max, 6),
+            "wait_buckets": {
+                ("+Inf" if bound == float("inf") else f"le_{bound}"): count
+                for bound, count in zip(self.WAIT_BUCKETS, self.wait_buckets)
+            },
+        }
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """
+    Async queue pool that times every connection checkout
+
+    The time spent in `_do_get` is the time a request queued for a
+    connection, which tells pool saturation apart from slow queries.
+    """
+
+    @property
+    def metrics(self) -> PoolMetrics:
+        # Created lazily so the pool keeps the parent's constructor signature
+        return self.__dict__.setdefault("_metrics", PoolMetrics())
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        self.metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+    def stats(self) -> Dict[str, Any]:
+        """Return live pool gauges together with the checkout counters"""
+        return {
+            "pool_size": self.size(),
+            "in_use": self.checkedout(),
+            "idle": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "timeout_seconds": self.timeout(),
+            **self.metrics.to_dict(),
+        }
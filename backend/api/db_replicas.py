@@ -0,0 +1,190 @@
+import asyncio
+import hashlib
+import itertools
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from fastapi import Request
+from redis.exceptions import RedisError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from api.cache import get_redis
+from api.config import settings
+from api.logger import logger
+
+# Seconds the replica is behind the primary; 0 when it has replayed all
+# WAL it received, or when it is not a standby at all (a plain database).
+# NULL when the standby is not streaming from the primary: it then has
+# nothing left to replay and would report no lag however far behind it is.
+# Reading the receiver's status needs pg_read_all_stats.
+LAG_QUERY = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN NULL"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+# Lets a client that wrote through another token read from the primary
+CONSISTENCY_HEADER = "x-read-consistency"
+
+class Replica:
+    """A read replica engine and its last measured replication lag"""
+
+    def __init__(self, name: str, engine: AsyncEngine):
+        self.name = name
+        self.engine = engine
+        self.session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, info={"replica": name})
+        self.lag_seconds: Optional[float] = None
+        self.healthy = False
+        self.checked_at: Optional[float] = None
+        self._refresh: Optional[asyncio.Task] = None
+
+    def usable(self, max_lag: float, max_age: float) -> bool:
+        """Whether the last check, not older than max_age, found it caught up"""
+        if not self.healthy or self.checked_at is None:
+            return False
+        return time.monotonic() - self.checked_at <= max_age and self.lag_seconds <= max_lag
+
+    def refresh_if_stale(self, interval: float) -> None:
+        """Start a lag check in the background when the last one is older than interval"""
+        if self._refresh is not None and not self._refresh.done():
+            return
+        if self.checked_at is None or time.monotonic() - self.checked_at >= interval:
+            self._refresh = asyncio.get_running_loop().create_task(self.check_lag())
+
+    async def check_lag(self) -> None:
+        try:
+            async with self.engine.connect() as conn:
+                lag = await asyncio.wait_for(conn.scalar(LAG_QUERY), settings.DB_REPLICA_CHECK_TIMEOUT_SECONDS)
+            if lag is None:
+                if self.healthy:
+                    logger.warning(f"Read replica {self.name} is not streaming from the primary")
+                self.lag_seconds = None
+                self.healthy = False
+            else:
+                self.lag_seconds = float(lag)
+                self.healthy = True
+        except Exception as e:
+            if self.healthy:
+                logger.warning(f"Read replica {self.name} failed its lag check: {e}")
+            self.healthy = False
+        self.checked_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "checked_seconds_ago": round(time.monotonic() - self.checked_at, 3) if self.checked_at is not None else None,
+            "pool": self.engine.pool.stats(),
+        }
+
+class ReplicaRouter:
+    """
+    Chooses the engine that serves a read-only request
+
+    Replicas are used round-robin while their replication lag, checked in
+    the background at most every `check_interval` seconds, stays within
+    `max_lag`. Callers that wrote within the last `sticky_seconds` read from
+    the primary so they see their own writes; callers are told apart by
+    their Authorization header, tracked in Redis so the window holds across
+    workers, and in-process when Redis is unavailable.
+    """
+
+    def __init__(self, replicas: List[Replica], max_lag: float, check_interval: float, sticky_seconds: float, max_writers: int = 10000):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.sticky_seconds = sticky_seconds
+        self.max_writers = max_writers
+        self._next = itertools.count()
+        self._writers: "OrderedDict[str, float]" = OrderedDict()
+        self.replica_reads = 0
+        self.sticky_reads = 0
+        self.fallback_reads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    async def choose(self, request: Optional[Request] = None) -> Optional[Replica]:
+        """Return the replica to read from, or None for the primary"""
+        if not self.replicas:
+            return None
+        if request is not None and (
+            request.headers.get(CONSISTENCY_HEADER) == "primary" or await self._wrote_recently(request)
+        ):
+            self.sticky_reads += 1
+            return None
+
+        for replica in self.replicas:
+            replica.refresh_if_stale(self.check_interval)
+        # A check result is trusted for a few intervals, after which the
+        # replica counts as unreachable until a check succeeds again
+        usable = [replica for replica in self.replicas if replica.usable(self.max_lag, self.check_interval * 3)]
+        if not usable:
+            self.fallback_reads += 1
+            return None
+        self.replica_reads += 1
+        return usable[next(self._next) % len(usable)]
+
+    async def record_write(self, request: Request) -> None:
+        """Pin the caller's reads to the primary for the next sticky_seconds"""
+        key = self._writer_key(request)
+        if key is None:
+            return
+        self._writers[key] = time.monotonic() + self.sticky_seconds
+        self._writers.move_to_end(key)
+        while len(self._writers) > self.max_writers:
+            self._writers.popitem(last=False)
+
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            await client.set(self._redis_key(key), 1, ex=max(1, math.ceil(self.sticky_seconds)))
+        except RedisError as e:
+            logger.warning(f"Recording a write for replica routing failed: {e}")
+
+    async def _wrote_recently(self, request: Request) -> bool:
+        key = self._writer_key(request)
+        if key is None:
+            return False
+        expires_at = self._writers.get(key)
+        if expires_at is not None:
+            if expires_at > time.monotonic():
+                return True
+            del self._writers[key]
+
+        client = get_redis()
+        if client is None:
+            return False
+        try:
+            return bool(await client.exists(self._redis_key(key)))
+        except RedisError as e:
+            logger.warning(f"Reading recent writes for replica routing failed: {e}")
+            return False
+
+    def _writer_key(self, request: Request) -> Optional[str]:
+        if not self.replicas or self.sticky_seconds <= 0:
+            return None
+        authorization = request.headers.get("authorization")
+        if not authorization:
+            return None
+        return hashlib.sha256(authorization.encode()).hexdigest()[:32]
+
+    def _redis_key(self, key: str) -> str:
+        return f"{settings.CACHE_KEY_PREFIX}:recent-writer:{key}"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "replica_reads": self.replica_reads,
+            "sticky_reads": self.sticky_reads,
+            "fallback_reads": self.fallback_reads,
+            "replicas": {replica.name: replica.stats() for replica in self.replicas},
+        }
@@ -0,0 +1,274 @@
+import asyncio
+import signal
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from api.config import settings
+from api.database import BOOTSTRAP_LOCK_KEY, async_session_factory, check_schema, engine, init_db, replica_engines
+from api.logger import logger
+from api.middlewares.auth.principal_cache import listen_for_invalidations
+from api.utils.pagination import CountMode
+
+# Prefix of IDs no row has, for priming lookups by ID
+WARMUP_ID = "warmup"
+
+class StartupTimer:
+    """Durations of the startup phases of this process"""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round(time.perf_counter() - started, 4)
+            logger.info(f"Startup phase {name} took {self.phases[name] * 1000:.1f} ms")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"phases": self.phases, "total_seconds": round(sum(self.phases.values()), 4)}
+
+startup_timer = StartupTimer()
+
+class ServingState:
+    """
+    Readiness and in-flight requests of this process
+
+    Ready once the pools are warm; draining from SIGTERM on, while requests
+    are still served but readiness fails and connections are not kept alive.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.draining = False
+        self.in_flight = 0
+        self.closed_connections = 0
+        self.warmup_task: Optional[asyncio.Task] = None
+        self.fold_task: Optional[asyncio.Task] = None
+        self.invalidation_task: Optional[asyncio.Task] = None
+
+    @property
+    def status(self) -> str:
+        if self.draining:
+            return "draining"
+        return "ready" if self.ready else "starting"
+
+    def stats(self) -> Dict[str, Any]:
+        return {"status": self.status, "in_flight": self.in_flight, "closed_connections": self.closed_connections}
+
+serving_state = ServingState()
+
+async def prepare_schema() -> None:
+    """Apply or verify the schema according to DB_SCHEMA_MODE"""
+    if settings.DB_SCHEMA_MODE == "check":
+        await check_schema()
+    elif settings.DB_SCHEMA_MODE == "migrate":
+        if await init_db():
+            logger.info("Applied the database schema")
+    else:
+        raise ValueError(f"Unknown DB_SCHEMA_MODE {settings.DB_SCHEMA_MODE!r}")
+
+async def bootstrap_admin(email: str, password: str) -> bool:
+    """
+    Create the super admin unless a user with that email exists
+
+    Processes starting together are serialized by an advisory lock held
+    until the insert commits, so exactly one of them creates the user.
+
+    Returns:
+        Whether the user was created
+    """
+    from api.modules.user.entity.user_entity import User, UserRole
+    from api.modules.user.dto.input import UserCreate
+    from api.modules.user.service.user_service import UserService
+
+    exists = select(User.id).filter_by(email=email)
+    async with async_session_factory() as session:
+        if (await session.execute(exists)).first() is not None:
+            return False
+        await session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": BOOTSTRAP_LOCK_KEY})
+        if (await session.execute(exists)).first() is not None:
+            return False
+        dto = UserCreate(
+            email=email,
+            username=email.split("@")[0],
+            password=password,
+            role=UserRole.ADMIN,
+        )
+        await UserService(session).create_user(dto)
+        await session.commit()
+    return True
+
+async def prime_statements(session: AsyncSession, lookup_id: str = WARMUP_ID) -> None:
+    """
+    Run the hot read queries once, so asyncpg prepares and caches them on the session's connection
+
+    Args:
+        lookup_id: Missing ID to look up; distinct per connection, since the
+            entity cache lets only one of concurrent lookups of an ID query
+    """
+    from api.modules.item_unit.service.item_unit_service import ItemUnitService
+    from api.modules.user.service.user_service import UserService
+    from api.modules.warehouse.service.warehouse_service import WarehouseService
+    from api.modules.warehouse_inventory.service.warehouse_inventory_service import WarehouseInventoryService
+
+    users = UserService(session)
+    warehouses = WarehouseService(session)
+    units = ItemUnitService(session)
+    inventory = WarehouseInventoryService(session)
+    # Lookups by ID (authentication and single resources), then the first
+    # page of each list with the count mode its route defaults to
+    await users.get_by_id(lookup_id)
+    await warehouses.get_by_id(lookup_id)
+    await units.get_by_id(lookup_id)
+    await inventory.get_inventory_by_id(lookup_id)
+    validator = await warehouses.get_warehouses_validator(count_mode=CountMode.EXACT)
+    await warehouses.get_all_warehouses(count_mode=CountMode.EXACT, validator=validator)
+    validator = await users.get_users_validator(count_mode=CountMode.EXACT)
+    await users.get_all_users(count_mode=CountMode.EXACT, validator=validator)
+    await units.get_item_units_validator()
+    await units.get_all_item_units()
+    validator = await inventory.get_inventory_validator(count_mode=CountMode.ESTIMATE)
+    await inventory.get_all_inventory(count_mode=CountMode.ESTIMATE, validator=validator)
+
+async def warm_up_engine(target: AsyncEngine, connections: int) -> None:
+    """Open pooled connections together and prime the hot statements on each"""
+    opened = await asyncio.gather(*(target.connect().start() for _ in range(connections)), return_exceptions=True)
+    conns = [conn for conn in opened if not isinstance(conn, BaseException)]
+    for error in (conn for conn in opened if isinstance(conn, BaseException)):
+        logger.warning(f"Opening a warm-up connection failed: {error}")
+
+    async def prime(conn, index: int):
+        async with AsyncSession(bind=conn) as session:
+            await prime_statements(session, f"{WARMUP_ID}{index}")
+            await session.rollback()
+
+    try:
+        primed = await asyncio.gather(*(prime(conn, index) for index, conn in enumerate(conns)), return_exceptions=True)
+        for result in primed:
+            if isinstance(result, BaseException):
+                logger.warning(f"Priming statements failed: {result}")
+    finally:
+        # Back to the pool, now connected and with prepared statements cached
+        for conn in conns:
+            await conn.close()
+
+async def warm_up() -> None:
+    """Warm the primary and replica pools, then report ready"""
+    # Connections beyond the pool size would be closed on check-in
+    connections = min(settings.DB_POOL_WARMUP_CONNECTIONS, settings.DB_POOL_SIZE)
+    if connections > 0:
+        with startup_timer.phase("warm_up"):
+            await asyncio.gather(*(warm_up_engine(target, connections) for target in [engine, *replica_engines]))
+    serving_state.ready = True
+    logger.info("Ready to serve")
+
+async def fold_summaries_periodically(interval: float) -> None:
+    """
+    Fold the per-SKU and per-warehouse summary deltas every interval seconds
+    
+    Runs in every API process with JOB_BACKEND=memory; with Celery the beat
+    schedule runs the fold instead. An advisory lock lets one process fold
+    at a time, and the others skip their turn instead of queuing behind it.
+    """
+    from api.modules.warehouse_inventory.service.inventory_summary_service import InventorySummaryService
+    
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with async_session_factory() as session:
+                await InventorySummaryService(session).try_fold_deltas()
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Folding inventory summary deltas failed: {e}")
+
+def install_drain_handlers(delay: float) -> bool:
+    """
+    Start draining on SIGTERM or SIGINT, and pass the signal on to uvicorn after `delay` seconds
+
+    uvicorn closes the listener as soon as its own handler runs and only
+    then runs the lifespan shutdown, too late to fail readiness. This
+    handler fails readiness first and gives load balancers `delay` seconds
+    to stop routing here. A second signal is passed on at once.
+
+    Needs the handlers uvicorn (0.29 or later) installs with signal.signal
+    before the lifespan starts, both under `uvicorn` and under gunicorn's
+    UvicornWorker. Handlers registered with loop.add_signal_handler, as
+    older uvicorn workers do, are invisible here: then nothing is wrapped,
+    a warning is logged and readiness only fails in the lifespan shutdown,
+    after the listener is closed.
+
+    Returns:
+        Whether a handler was wrapped
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return False
+    loop = asyncio.get_running_loop()
+    wrapped = False
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        previous = signal.getsignal(sig)
+        if not callable(previous) or previous is signal.default_int_handler:
+            continue
+
+        def handle(signum, frame, previous=previous):
+            if serving_state.draining:
+                previous(signum, frame)
+                return
+            serving_state.draining = True
+            logger.info(f"Draining, closing the listener in {delay:.1f} s")
+            loop.call_soon_threadsafe(loop.call_later, delay, previous, signum, frame)
+
+        signal.signal(sig, handle)
+        wrapped = True
+    if not wrapped:
+        logger.warning("No SIGTERM handler of the server found, readiness will fail only once the listener is closed")
+    return wrapped
+
+async def shutdown() -> None:
+    """
+    Close the pools once uvicorn has stopped serving
+
+    By now the listener is closed and in-flight requests finished or hit
+    uvicorn's --timeout-graceful-shutdown.
+    """
+    serving_state.draining = True
+    for task in (serving_state.warmup_task, serving_state.fold_task, serving_state.invalidation_task):
+        if task is not None and not task.done():
+            task.cancel()
+    started = time.perf_counter()
+    if serving_state.in_flight:
+        logger.warning(f"Shutting down with {serving_state.in_flight} requests still in flight")
+    for target in [engine, *replica_engines]:
+        await target.dispose()
+    logger.info(f"Shutdown finished in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Prepare the database before serving, timing each phase, and drain on shutdown
+
+    The pools warm up in the background once the server is listening, so
+    /health/live answers right away and /health/ready once they are warm.
+    """
+    with startup_timer.phase("schema"):
+        await prepare_schema()
+    if settings.ADMIN_EMAIL and settings.ADMIN_PASSWORD:
+        with startup_timer.phase("bootstrap_admin"):
+            if await bootstrap_admin(settings.ADMIN_EMAIL, settings.ADMIN_PASSWORD):
+                logger.info(f"Created super admin {settings.ADMIN_EMAIL}")
+    logger.info(f"Startup finished in {startup_timer.stats()['total_seconds'] * 1000:.1f} ms")
+    install_drain_handlers(settings.SHUTDOWN_READINESS_DELAY_SECONDS)
+    serving_state.warmup_task = asyncio.create_task(warm_up())
+    serving_state.invalidation_task = asyncio.create_task(listen_for_invalidations())
+    if settings.JOB_BACKEND == "memory":
+        serving_state.fold_task = asyncio.create_task(fold_summaries_periodically(settings.INVENTORY_SUMMARY_FOLD_SECONDS))
+    yield
+    await shutdown()
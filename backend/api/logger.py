@@ -1,12 +1,21 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
 import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 
 from api.config import settings
 
+# ID of the request being handled, set by the logging middleware
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
 class CustomFormatter(logging.Formatter):
     """Custom formatter with colors for console output"""
-    
+
     grey = '\x1b[38;21m'
     blue = '\x1b[38;5;39m'
     yellow = '\x1b[38;5;226m'
@@ -24,39 +33,102 @@ class CustomFormatter(logging.Formatter):
             logging.ERROR: self.red + self.fmt + self.reset,
             logging.CRITICAL: self.bold_red + self.fmt + self.reset
         }
+        # Build one formatter per level up front instead of one per record
+        self.FORMATTERS = {level: logging.Formatter(log_fmt) for level, log_fmt in self.FORMATS.items()}
+        self.default_formatter = logging.Formatter(self.fmt)
 
     def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = logging.Formatter(log_fmt)
+        formatter = self.FORMATTERS.get(record.levelno, self.default_formatter)
         return formatter.format(record)
 
+class JsonFormatter(logging.Formatter):
+    """Formatter writing one JSON object per record"""
+
+    def format(self, record):
+        entry: Dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        if isinstance(record.msg, dict):
+            entry.update(record.msg)
+        else:
+            entry["message"] = record.getMessage()
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that leaves formatting to the listener thread
+
+    The stock QueueHandler formats the record in the calling thread; since
+    records never leave the process, they can be enqueued as they are.
+    """
+
+    def prepare(self, record):
+        return record
+
+_listeners = []
+
+def _queue_handler(target: logging.Handler) -> logging.Handler:
+    """Wrap a handler so records are formatted and written on a background thread"""
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, target, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    return DeferredQueueHandler(log_queue)
+
+def stop_log_listeners():
+    """Flush queued records and stop the background logging threads"""
+    while _listeners:
+        _listeners.pop().stop()
+
+atexit.register(stop_log_listeners)
+
 def get_logger(name: str) -> logging.Logger:
     """Create and configure a logger with the given name"""
     logger = logging.getLogger(name)
-    
+
     # Set log level based on environment
     if settings.ENVIRONMENT == "development":
         logger.setLevel(logging.DEBUG)
     else:
         logger.setLevel(logging.INFO)
-    
+
     # Remove existing handlers if any
     if logger.hasHandlers():
         logger.handlers.clear()
-    
+
     # Create console handler
     ch = logging.StreamHandler(sys.stdout)
     ch.setLevel(logging.DEBUG)
-    
+
     # Create formatters and add to handlers
     fmt = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    
+
     ch.setFormatter(CustomFormatter(fmt))
-    
+
     # Add handlers to logger
-    logger.addHandler(ch)
-    
+    logger.addHandler(_queue_handler(ch))
+
+    return logger
+
+def get_access_logger(name: str) -> logging.Logger:
+    """Create a logger writing structured JSON lines, one per request"""
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    if logger.hasHandlers():
+        logger.handlers.clear()
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter())
+    logger.addHandler(_queue_handler(handler))
+
     return logger
 
 # Get the default logger for the application
 logger = get_logger("warehouse_api")
+access_logger = get_access_logger("warehouse_api.access")
@@ -1,23 +1,40 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from api.middlewares.logging_middleware import LoggingMiddleware
-from api.database import init_db, async_session_factory
+from api.middlewares.metrics_middleware import MetricsMiddleware
+from api.middlewares.drain_middleware import DrainMiddleware
+from api.middlewares.rate_limit_middleware import RateLimitMiddleware
+from api.metrics import instrument_engine, render_metrics
+from api.database import engine, replica_engines, replica_router
+from api.lifecycle import lifespan, serving_state, startup_timer
 from api.config import settings
+from api.middlewares.auth.auth_bearer import admin_required
+from api.middlewares.auth.principal_cache import principal_cache
+from api.utils.password import password_hasher
+from api.cache import entity_cache_stats
+from api.rate_limit import rate_limit_stats
 
 # Import routers
 from api.modules.user.controller.user_controller import router as user_router
 from api.modules.warehouse.controller.warehouse_controller import router as warehouse_router
 from api.modules.warehouse_inventory.controller.warehouse_inventory_controller import router as inventory_router
 from api.modules.item_unit.controller.item_unit_controller import router as item_unit_router
+from api.modules.job.controller.job_controller import router as job_router
+from api.modules.inventory_ledger.controller.inventory_ledger_controller import router as ledger_router
 
 app = FastAPI(
     title="Warehouse Management API",
     description="API for managing warehouses and inventory",
     version="0.1.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # Add middlewares
+app.add_middleware(DrainMiddleware)
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
@@ -26,43 +43,54 @@ app.add_middleware(
     allow_headers=["*"],
 )
 app.add_middleware(LoggingMiddleware)
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+for replica_engine in replica_engines:
+    instrument_engine(replica_engine)
 
 # Include routers
 app.include_router(user_router, prefix="/api/users", tags=["Users"])
 app.include_router(warehouse_router, prefix="/api/warehouses", tags=["Warehouses"])
 app.include_router(inventory_router, prefix="/api/inventory", tags=["Inventory"])
 app.include_router(item_unit_router, prefix="/api/units", tags=["Item Units"])
-
-@app.on_event("startup")
-async def startup_event():
-    await init_db()
-    # Bootstrap super admin if credentials provided
-    import os
-    admin_email = os.getenv("ADMIN_EMAIL")
-    admin_password = os.getenv("ADMIN_PASSWORD")
-    if admin_email and admin_password:
-        from sqlalchemy import select
-        from api.modules.user.entity.user_entity import User, UserRole
-        from api.modules.user.dto.input import UserCreate
-        from api.modules.user.service.user_service import UserService
-
-        async with async_session_factory() as session:
-            result = await session.execute(select(User).filter_by(email=admin_email))
-            existing = result.scalars().first()
-            if not existing:
-                dto = UserCreate(
-                    email=admin_email,
-                    username=admin_email.split("@")[0],
-                    password=admin_password,
-                    role=UserRole.ADMIN,
-                )
-                await UserService(session).create_user(dto)
-                await session.commit()
+app.include_router(job_router, prefix="/api/jobs", tags=["Jobs"])
+app.include_router(ledger_router, prefix="/api/ledger", tags=["Inventory Ledger"])
 
 @app.get("/health", tags=["Health"])
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/live", tags=["Health"])
+async def liveness():
+    """Whether the process is up and serving requests"""
+    return {"status": "alive"}
+
+@app.get("/health/ready", tags=["Health"])
+async def readiness():
+    """Whether the instance should get traffic: pools warm and not shutting down"""
+    status_code = 200 if serving_state.status == "ready" else 503
+    return ORJSONResponse({"status": serving_state.status}, status_code=status_code)
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    """Prometheus metrics in the text exposition format"""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+@app.get("/stats", tags=["Health"])
+async def runtime_stats(_: dict = Depends(admin_required)):
+    """Runtime counters of in-process caches and pools (admin only)"""
+    return {
+        "principal_cache": principal_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "database_pool": engine.pool.stats(),
+        "read_replicas": replica_router.stats(),
+        "entity_cache": entity_cache_stats(),
+        "startup": startup_timer.stats(),
+        "serving": serving_state.stats(),
+        "rate_limit": rate_limit_stats(),
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
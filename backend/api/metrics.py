@@ -0,0 +1,106 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# With PROMETHEUS_MULTIPROC_DIR set, every uvicorn/gunicorn worker writes its
+# samples to memory-mapped files in that directory and /metrics aggregates them
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_COUNT = Counter(
+    "http_requests_total",
+    "HTTP requests by method, route template and status",
+    ["method", "route", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method and route template",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled",
+    multiprocess_mode="livesum",
+)
+REQUESTS_REJECTED = Counter(
+    "http_requests_rejected_total",
+    "Requests turned away by rate limiting (429) or load shedding (503)",
+    ["reason", "route_class"],
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "http_request_db_queries",
+    "Database queries issued per HTTP request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent in database queries per HTTP request",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds",
+    "Latency of individual database queries",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+
+class RequestDbStats:
+    """Database usage of the request being handled"""
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+# Set by the metrics middleware; the engine hooks add to it
+request_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Record the count and duration of every query run on an engine"""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start_times = conn.info.get("query_start_time")
+        if not start_times:
+            return
+        elapsed = time.perf_counter() - start_times.pop()
+        DB_QUERY_LATENCY.observe(elapsed)
+        stats = request_db_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.seconds += elapsed
+
+def render_metrics() -> tuple:
+    """
+    Render all metrics in the Prometheus text format
+
+    Returns:
+        Tuple of (payload, content type)
+    """
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1,13 +1,19 @@
 from fastapi import Request, HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from contextvars import ContextVar
 from typing import Optional, Dict, Any
 
 from api.middlewares.auth.jwt_token_handler import decode_token
+from api.middlewares.auth.principal_cache import principal_cache
 from api.modules.user.service.user_service import UserService
 from api.modules.user.entity.user_entity import UserRole
-from api.database import get_db
+from api.database import async_session_factory, get_db, is_replica
+from api.utils.api_key import is_api_key
 from sqlalchemy.ext.asyncio import AsyncSession
 
+# ID of the authenticated user of the current request, for audit records
+current_user_id_var: ContextVar[Optional[str]] = ContextVar("current_user_id", default=None)
+
 class JWTBearer(HTTPBearer):
     """
     JWT Bearer token authentication dependency
@@ -22,6 +28,22 @@ class JWTBearer(HTTPBearer):
             if not credentials.scheme == "Bearer":
                 raise HTTPException(status_code=403, detail="Invalid authentication scheme")
             
+            # Serve recently verified principals without touching the database
+            cached_payload = principal_cache.get(credentials.credentials)
+            if cached_payload is not None:
+                current_user_id_var.set(cached_payload.get("user_id"))
+                return cached_payload
+            
+            # A principal read before a concurrent invalidation committed must not be cached
+            generation = principal_cache.generation
+            if is_api_key(credentials.credentials):
+                payload = await self.verify_api_key(credentials.credentials, db)
+                if not payload:
+                    raise HTTPException(status_code=403, detail="Invalid API key")
+                principal_cache.set(credentials.credentials, payload, generation)
+                current_user_id_var.set(payload.get("user_id"))
+                return payload
+            
             payload = self.verify_jwt(credentials.credentials)
             if not payload:
                 raise HTTPException(status_code=403, detail="Invalid token or expired token")
@@ -29,9 +51,15 @@ class JWTBearer(HTTPBearer):
             # Verify user exists in database
             user_service = UserService(db)
             user = await user_service.get_by_id(payload.get("user_id"))
+            if not user and is_replica(db):
+                # The user may be too new to have reached the replica
+                async with async_session_factory() as primary:
+                    user = await UserService(primary).get_by_id(payload.get("user_id"))
             if not user:
                 raise HTTPException(status_code=403, detail="User not found")
-                
+            
+            principal_cache.set(credentials.credentials, payload, generation)
+            current_user_id_var.set(payload.get("user_id"))
             return payload
         else:
             raise HTTPException(status_code=403, detail="Invalid authorization code")
@@ -39,6 +67,18 @@ class JWTBearer(HTTPBearer):
     def verify_jwt(self, token: str) -> Optional[Dict[str, Any]]:
         """Verify JWT token and return payload if valid"""
         return decode_token(token)
+    
+    async def verify_api_key(self, api_key: str, db: AsyncSession) -> Optional[Dict[str, Any]]:
+        """
+        Verify an API key and return its principal if valid
+
+        Always checked on the primary: API keys do not expire, so a replica
+        lagging behind a revocation would keep accepting the key.
+        """
+        if not is_replica(db):
+            return await UserService(db).authenticate_api_key(api_key)
+        async with async_session_factory() as primary:
+            return await UserService(primary).authenticate_api_key(api_key)
 
 # Create specific permission requirements
 def get_current_user(payload: Dict[str, Any] = Depends(JWTBearer())):
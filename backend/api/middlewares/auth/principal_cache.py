@@ -0,0 +1,191 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.cache import get_redis
+from api.config import settings
+from api.logger import logger
+
+# Workers tell each other which users' principals to drop on this channel
+INVALIDATION_CHANNEL = f"{settings.CACHE_KEY_PREFIX}:principals:invalidate"
+
+class PrincipalCache:
+    """
+    Bounded in-process cache of authenticated principals
+
+    Entries are keyed by token and remember the user they belong to, so that
+    every token of a user can be dropped when that user changes. Entries expire
+    after `ttl` seconds (or when the token itself expires, whichever is first)
+    and the least recently used entry is evicted once `max_size` is reached.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[str, Dict[str, Any], float]]" = OrderedDict()
+        self._tokens_by_user: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Bumped by every invalidation, see `set`
+        self.generation = 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Return the cached payload for a token, or None on a miss"""
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        user_id, payload, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(token)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return payload
+
+    def peek(self, token: str) -> Optional[Dict[str, Any]]:
+        """Return the cached payload for a token without counting a lookup or refreshing its LRU position"""
+        entry = self._entries.get(token)
+        if entry is None or entry[2] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, token: str, payload: Dict[str, Any], generation: Optional[int] = None) -> None:
+        """
+        Cache the payload of a verified token
+
+        Args:
+            generation: `self.generation` from before the token was verified;
+                the payload is not cached if an invalidation happened since,
+                as it may have been read before that change committed
+        """
+        if self.max_size <= 0:
+            return
+        if generation is not None and generation != self.generation:
+            return
+
+        user_id = payload.get("user_id")
+        expires_at = time.monotonic() + self.ttl
+
+        # Never keep a principal around longer than its token is valid
+        token_exp = payload.get("exp")
+        if token_exp is not None:
+            expires_at = min(expires_at, time.monotonic() + (token_exp - time.time()))
+
+        if token in self._entries:
+            self._remove(token)
+
+        self._entries[token] = (user_id, payload, expires_at)
+        self._tokens_by_user.setdefault(user_id, set()).add(token)
+
+        while len(self._entries) > self.max_size:
+            oldest_token = next(iter(self._entries))
+            self._remove(oldest_token)
+            self.evictions += 1
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop every cached token of a user"""
+        self.generation += 1
+        tokens = self._tokens_by_user.pop(user_id, None)
+        if not tokens:
+            return
+        for token in tokens:
+            self._entries.pop(token, None)
+        self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop all cached principals"""
+        self._entries.clear()
+        self._tokens_by_user.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _remove(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry[0])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[entry[0]]
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+def invalidate_user_on_commit(db: AsyncSession, user_id: str) -> None:
+    """
+    Drop a user's cached principals now, and in every worker once `db` commits
+
+    Dropping them only before the commit would let a concurrent request
+    cache the old principal again, and would leave other workers serving it
+    until PRINCIPAL_CACHE_TTL_SECONDS pass.
+    """
+    principal_cache.invalidate_user(user_id)
+    db.info.setdefault("principal_invalidations", set()).add(user_id)
+
+async def publish_invalidations(db: AsyncSession) -> None:
+    """Drop the principals of the users invalidated in a session in every worker, called after it commits"""
+    user_ids = db.info.pop("principal_invalidations", None)
+    if not user_ids:
+        return
+    for user_id in user_ids:
+        principal_cache.invalidate_user(user_id)
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        await client.publish(INVALIDATION_CHANNEL, json.dumps(sorted(user_ids)))
+    except RedisError as e:
+        logger.warning(f"Publishing principal invalidations failed: {e}")
+
+async def listen_for_invalidations(retry_delay: float = 1.0) -> None:
+    """
+    Apply the principal invalidations published by every worker, until cancelled
+
+    Without REDIS_URL there is nobody to hear from and this returns at
+    once. Invalidations published while not subscribed are lost, so the
+    whole cache is dropped each time the subscription (re)starts.
+    """
+    client = get_redis()
+    if client is None:
+        return
+    while True:
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            principal_cache.clear()
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                for user_id in json.loads(message["data"]):
+                    principal_cache.invalidate_user(user_id)
+        except (RedisError, OSError) as e:
+            logger.warning(f"Principal invalidation subscription failed, retrying: {e}")
+            await asyncio.sleep(retry_delay)
+        finally:
+            await pubsub.aclose()
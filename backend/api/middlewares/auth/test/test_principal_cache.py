@@ -0,0 +1,140 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+def _payload(user_id: str, **claims):
+    return {"user_id": user_id, "role": "user", **claims}
+
+def test_invalidation_after_commit_reaches_other_workers():
+    import fakeredis
+
+    from api.cache import set_redis_client
+    from api.middlewares.auth.principal_cache import (
+        INVALIDATION_CHANNEL,
+        invalidate_user_on_commit,
+        listen_for_invalidations,
+        principal_cache,
+        publish_invalidations,
+    )
+
+    async def wait_until(condition):
+        for _ in range(100):
+            if condition():
+                return
+            await asyncio.sleep(0.01)
+        raise AssertionError("timed out")
+
+    async def main():
+        client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+        set_redis_client(client)
+        listener = asyncio.create_task(listen_for_invalidations())
+        try:
+            # The listener drops everything once subscribed
+            principal_cache.set("seed", _payload("u0"))
+            await wait_until(lambda: principal_cache.peek("seed") is None)
+
+            # Another worker revoked u1's key
+            principal_cache.set("key-1", _payload("u1"))
+            principal_cache.set("key-2", _payload("u2"))
+            await client.publish(INVALIDATION_CHANNEL, json.dumps(["u1"]))
+            await wait_until(lambda: principal_cache.peek("key-1") is None)
+            assert principal_cache.peek("key-2") is not None
+
+            # Dropped at once, but published only after the commit
+            session = SimpleNamespace(info={})
+            invalidate_user_on_commit(session, "u2")
+            assert principal_cache.peek("key-2") is None
+            assert session.info["principal_invalidations"] == {"u2"}
+            generation = principal_cache.generation
+            await publish_invalidations(session)
+            assert "principal_invalidations" not in session.info
+            # Once after the commit, and once more when this worker hears its own message
+            await wait_until(lambda: principal_cache.generation == generation + 2)
+        finally:
+            listener.cancel()
+            await asyncio.gather(listener, return_exceptions=True)
+            set_redis_client(None)
+            principal_cache.clear()
+
+    asyncio.run(main())
+
+def test_listener_without_redis_returns():
+    from api.cache import set_redis_client
+    from api.middlewares.auth.principal_cache import listen_for_invalidations
+
+    set_redis_client(None)
+    asyncio.run(asyncio.wait_for(listen_for_invalidations(), 1))
+
+def test_principal_read_before_an_invalidation_is_not_cached():
+    from api.middlewares.auth.principal_cache import PrincipalCache
+
+    cache = PrincipalCache(max_size=10, ttl=60)
+    generation = cache.generation
+    cache.invalidate_user("u1")
+    cache.set("key", _payload("u1"), generation)
+    assert cache.peek("key") is None
+
+    cache.set("key", _payload("u1"), cache.generation)
+    assert cache.peek("key") is not None
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+def _cache(monkeypatch, max_size: int = 10, ttl: float = 60):
+    from api.middlewares.auth import principal_cache as module
+
+    clock = _Clock()
+    monkeypatch.setattr(module, "time", clock)
+    return module.PrincipalCache(max_size=max_size, ttl=ttl), clock
+
+def test_entries_expire_after_ttl_or_with_their_token(monkeypatch):
+    cache, clock = _cache(monkeypatch, ttl=60)
+    cache.set("long", _payload("u1"))
+    cache.set("short", _payload("u1", exp=clock.now + 5))
+    clock.now += 10
+    assert cache.get("short") is None
+    assert cache.get("long") is not None
+    clock.now += 60
+    assert cache.get("long") is None
+    assert cache.stats()["size"] == 0
+
+def test_least_recently_used_entry_is_evicted(monkeypatch):
+    cache, _ = _cache(monkeypatch, max_size=2)
+    cache.set("a", _payload("u1"))
+    cache.set("b", _payload("u2"))
+    cache.get("a")
+    # peek neither counts nor refreshes, so b stays the oldest
+    assert cache.peek("b") is not None
+    cache.set("c", _payload("u3"))
+    assert cache.peek("b") is None
+    assert cache.peek("a") is not None and cache.peek("c") is not None
+    assert cache.stats()["evictions"] == 1
+    assert (cache.hits, cache.misses) == (1, 0)
+
+def test_invalidate_user_drops_only_their_tokens(monkeypatch):
+    cache, _ = _cache(monkeypatch)
+    cache.set("a1", _payload("u1"))
+    cache.set("a2", _payload("u1"))
+    cache.set("b", _payload("u2"))
+    cache.invalidate_user("u1")
+    cache.invalidate_user("nobody")
+    assert cache.peek("a1") is None and cache.peek("a2") is None
+    assert cache.peek("b") is not None
+    assert cache.stats()["invalidations"] == 1
+
+    # Re-setting a token moves it to its new user
+    cache.set("b", _payload("u3"))
+    cache.invalidate_user("u2")
+    assert cache.peek("b") is not None
+
+def test_disabled_cache_keeps_nothing(monkeypatch):
+    cache, _ = _cache(monkeypatch, max_size=0)
+    cache.set("a", _payload("u1"))
+    assert cache.get("a") is None
@@ -0,0 +1,34 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.lifecycle import serving_state
+
+class DrainMiddleware:
+    """
+    Pure ASGI middleware counting in-flight requests for graceful shutdown
+
+    While draining, requests are still served, since load balancers may
+    route here until they see readiness fail, but responses carry
+    `Connection: close` so keep-alive clients reconnect to another instance
+    before the listener closes.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start" and serving_state.draining:
+                MutableHeaders(scope=message)["Connection"] = "close"
+                serving_state.closed_connections += 1
+            await send(message)
+
+        serving_state.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            serving_state.in_flight -= 1
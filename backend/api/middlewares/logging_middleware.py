@@ -1,28 +1,64 @@
-from fastapi import Request
+import random
 import time
-from starlette.middleware.base import BaseHTTPMiddleware
-from api.logger import logger
+import uuid
 
-class LoggingMiddleware(BaseHTTPMiddleware):
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.config import settings
+from api.logger import access_logger, request_id_var
+from api.utils.asgi import get_header, get_route_template
+
+class LoggingMiddleware:
     """
-    Middleware for logging HTTP requests and responses
+    Pure ASGI middleware writing one structured access log line per request
+
+    Each request gets an ID (taken from X-Request-ID when the client sends
+    one) that is echoed in the response. Successful requests are sampled per
+    route template according to ACCESS_LOG_SAMPLE_RATE and
+    ACCESS_LOG_ROUTE_SAMPLE_RATES; server errors are always logged.
     """
-    
-    async def dispatch(self, request: Request, call_next):
-        # Record request start time
-        start_time = time.time()
-        
-        # Log request
-        logger.info(f"Request: {request.method} {request.url.path}")
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Calculate processing time
-        process_time = time.time() - start_time
-        
-        # Log response
-        logger.info(f"Response: {request.method} {request.url.path} - Status: {response.status_code} - Time: {process_time:.4f}s")
-        
-        return response
-      
\ No newline at end of file
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.default_sample_rate = settings.ACCESS_LOG_SAMPLE_RATE
+        self.route_sample_rates = settings.ACCESS_LOG_ROUTE_SAMPLE_RATES
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        request_id = (get_header(scope, b"x-request-id") or "")[:128] or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = get_route_template(scope)
+            if self._sampled(route, status_code):
+                access_logger.info({
+                    "request_id": request_id,
+                    "method": scope["method"],
+                    "route": route,
+                    "path": scope["path"],
+                    "status": status_code,
+                    "duration_ms": round((time.perf_counter() - start_time) * 1000, 3),
+                })
+            request_id_var.reset(token)
+
+    def _sampled(self, route, status_code: int) -> bool:
+        if status_code >= 500:
+            return True
+        rate = self.route_sample_rates.get(route, self.default_sample_rate)
+        return rate >= 1.0 or random.random() < rate
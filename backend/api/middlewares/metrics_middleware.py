@@ -0,0 +1,55 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.metrics import (
+    DB_QUERIES_PER_REQUEST,
+    DB_TIME_PER_REQUEST,
+    REQUEST_COUNT,
+    REQUEST_LATENCY,
+    REQUESTS_IN_FLIGHT,
+    RequestDbStats,
+    request_db_stats,
+)
+from api.utils.asgi import get_route_template
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request metrics per route template
+
+    Requests that match no route are grouped under a single "<unmatched>"
+    label so scanners probing random paths cannot blow up label cardinality.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        db_stats = RequestDbStats()
+        token = request_db_stats.set(db_stats)
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            request_db_stats.reset(token)
+
+            method = scope["method"]
+            route = get_route_template(scope) or "<unmatched>"
+            REQUEST_COUNT.labels(method, route, str(status_code)).inc()
+            REQUEST_LATENCY.labels(method, route).observe(time.perf_counter() - start_time)
+            DB_QUERIES_PER_REQUEST.labels(method, route).observe(db_stats.queries)
+            DB_TIME_PER_REQUEST.labels(method, route).observe(db_stats.seconds)
@@ -0,0 +1,77 @@
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from api.config import settings
+from api.metrics import REQUESTS_REJECTED
+from api.middlewares.auth.jwt_token_handler import decode_token
+from api.middlewares.auth.principal_cache import principal_cache
+from api.rate_limit import db_request_limiter, rate_limiter, rejections, retry_after_header, route_class
+from api.utils.api_key import is_api_key
+from api.utils.asgi import get_client_address, get_header, parse_networks
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware rate limiting and shedding API requests
+
+    Requests under API_PREFIX first take a token from their principal's
+    bucket for the route class, and get a 429 when it is empty. They then
+    take one of MAX_CONCURRENT_DB_REQUESTS slots, and get a 503 when none
+    frees up within LOAD_SHED_QUEUE_SECONDS. Both carry Retry-After.
+    A principal is the user of a bearer token whose signature checks out,
+    the same on every worker, or of an API key this worker already verified
+    (found in the principal cache), and otherwise the client address:
+    keying unverified credentials would give every made-up token a fresh
+    bucket. Behind TRUSTED_PROXIES the client address comes from
+    X-Forwarded-For. RATE_LIMIT_ENABLED=false turns off the first check
+    and MAX_CONCURRENT_DB_REQUESTS=0 the second.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.trusted_proxies = parse_networks(settings.TRUSTED_PROXIES)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not scope["path"].startswith(settings.API_PREFIX):
+            await self.app(scope, receive, send)
+            return
+
+        request_class = route_class(scope["method"], scope["path"])
+        if settings.RATE_LIMIT_ENABLED:
+            retry_after = await rate_limiter.acquire(self._principal(scope), request_class)
+            if retry_after > 0:
+                await self._reject(scope, receive, send, "rate_limited", request_class, 429, "Rate limit exceeded", retry_after)
+                return
+
+        if db_request_limiter.limit <= 0:
+            await self.app(scope, receive, send)
+            return
+        if not await db_request_limiter.acquire():
+            await self._reject(scope, receive, send, "overloaded", request_class, 503, "Server is busy", 1)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            db_request_limiter.release()
+
+    def _principal(self, scope: Scope) -> str:
+        authorization = get_header(scope, b"authorization")
+        if authorization:
+            scheme, _, token = authorization.partition(" ")
+            token = token.strip()
+            payload = None
+            if scheme.lower() == "bearer" and token:
+                payload = principal_cache.peek(token)
+                if payload is None and not is_api_key(token):
+                    # Checking the signature needs no database, unlike an API key
+                    payload = decode_token(token)
+            if payload is not None and payload.get("user_id"):
+                return f"user:{payload['user_id']}"
+        address = get_client_address(scope, self.trusted_proxies)
+        return f"ip:{address}" if address else "ip:unknown"
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send, reason: str, request_class: str,
+                      status_code: int, detail: str, retry_after: float):
+        rejections.record(reason, request_class)
+        REQUESTS_REJECTED.labels(reason, request_class).inc()
+        response = JSONResponse({"detail": detail}, status_code=status_code, headers={"Retry-After": retry_after_header(retry_after)})
+        await response(scope, receive, send)
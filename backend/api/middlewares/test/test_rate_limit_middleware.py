@@ -0,0 +1,30 @@
+def _scope(authorization: str = None, peer: str = "10.0.0.2", forwarded: str = None):
+    headers = []
+    if authorization is not None:
+        headers.append((b"authorization", authorization.encode()))
+    if forwarded is not None:
+        headers.append((b"x-forwarded-for", forwarded.encode()))
+    return {"type": "http", "client": (peer, 5000), "headers": headers}
+
+def _middleware():
+    from api.middlewares.rate_limit_middleware import RateLimitMiddleware
+    from api.utils.asgi import parse_networks
+
+    middleware = RateLimitMiddleware(app=None)
+    middleware.trusted_proxies = parse_networks(["10.0.0.0/8"])
+    return middleware
+
+def test_signed_token_is_keyed_by_user_without_the_principal_cache():
+    from api.middlewares.auth.jwt_token_handler import create_access_token
+    from api.middlewares.auth.principal_cache import principal_cache
+
+    principal_cache.clear()
+    token = create_access_token({"user_id": "u1"})
+    assert _middleware()._principal(_scope(f"Bearer {token}")) == "user:u1"
+
+def test_unverified_credentials_are_keyed_by_client_address():
+    middleware = _middleware()
+    forged = "eyJhbGciOiJIUzI1NiJ9.eyJ1c2VyX2lkIjoidTEifQ.forged"
+    assert middleware._principal(_scope(f"Bearer {forged}", forwarded="198.51.100.1")) == "ip:198.51.100.1"
+    assert middleware._principal(_scope("Bearer wk_abc_def", forwarded="198.51.100.2")) == "ip:198.51.100.2"
+    assert middleware._principal(_scope(peer="203.0.113.7", forwarded="198.51.100.3")) == "ip:203.0.113.7"
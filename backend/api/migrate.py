@@ -0,0 +1,29 @@
+"""
+Apply the models' schema to the database
+
+Run once per deploy, before starting API workers with DB_SCHEMA_MODE=check.
+Concurrent runs are serialized, and nothing is done while the recorded
+schema version already matches the models.
+
+Usage:
+    python -m api.migrate
+    python -m api.migrate --force
+"""
+import argparse
+import asyncio
+import sys
+
+from api.database import engine, init_db, schema_fingerprint
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="Re-apply the schema even when the version matches")
+    args = parser.parse_args()
+
+    applied = await init_db(force=args.force)
+    print(f"Schema {schema_fingerprint()} {'applied' if applied else 'already up to date'}")
+    await engine.dispose()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, func
+from sqlalchemy import Column, DateTime, Integer, func
 from sqlalchemy.ext.declarative import declared_attr
 from datetime import datetime
 from api.database import Base
@@ -19,3 +19,10 @@ class TimestampModel:
             onupdate=datetime.utcnow, 
             nullable=False
         )
+
+class VersionModel:
+    """Mixin that adds a version counter, bumped by every update, to a model"""
+    
+    @declared_attr
+    def version(cls):
+        return Column(Integer, nullable=False, default=1, server_default="1")
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from datetime import datetime, timezone
+
+from api.database import get_db
+from api.modules.inventory_ledger.service.inventory_ledger_service import InventoryLedgerService
+from api.modules.inventory_ledger.dto.input import PaginationMovementResponse, StockAtResponse
+from api.middlewares.auth.auth_bearer import get_current_user
+
+router = APIRouter()
+
+@router.get("/movements", response_model=PaginationMovementResponse)
+async def list_movements(
+    warehouse_id: str,
+    sku: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(get_current_user)
+):
+    """Get the quantity changes of a warehouse, optionally of one SKU, newest first"""
+    ledger_service = InventoryLedgerService(db)
+    try:
+        page = await ledger_service.list_movements(warehouse_id, sku, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return PaginationMovementResponse(movements=page.items, next_cursor=page.next_cursor)
+
+@router.get("/stock", response_model=StockAtResponse)
+async def get_stock_at(
+    warehouse_id: str,
+    at: datetime,
+    sku: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(get_current_user)
+):
+    """Get a warehouse's stock per SKU as it was at `at`"""
+    # Stored timestamps are naive UTC
+    if at.tzinfo is not None:
+        at = at.astimezone(timezone.utc).replace(tzinfo=None)
+    ledger_service = InventoryLedgerService(db)
+    snapshot, rows = await ledger_service.get_stock_at(warehouse_id, at, sku)
+    return StockAtResponse(
+        warehouse_id=warehouse_id,
+        at=at,
+        snapshot_taken_at=snapshot.taken_at if snapshot else None,
+        items=rows
+    )
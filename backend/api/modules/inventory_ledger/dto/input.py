@@ -0,0 +1,38 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+class MovementResponse(BaseModel):
+    """DTO for inventory movement response"""
+    id: int
+    inventory_id: str
+    warehouse_id: str
+    sku: str
+    delta: float
+    quantity_after: float
+    reason: str
+    user_id: Optional[str] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class PaginationMovementResponse(BaseModel):
+    """DTO for movement pagination response"""
+    movements: List[MovementResponse]
+    next_cursor: Optional[str] = None
+
+class StockLevel(BaseModel):
+    """DTO for the quantity of a SKU"""
+    sku: str
+    quantity: float
+    
+    class Config:
+        from_attributes = True
+
+class StockAtResponse(BaseModel):
+    """DTO for a warehouse's stock at a point in time"""
+    warehouse_id: str
+    at: datetime
+    snapshot_taken_at: Optional[datetime] = None
+    items: List[StockLevel]
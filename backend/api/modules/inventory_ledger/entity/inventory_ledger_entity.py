@@ -0,0 +1,154 @@
+from sqlalchemy import Column, String, Float, BigInteger, DateTime, ForeignKey, Identity, Index, UniqueConstraint, DDL, event, text
+from datetime import datetime
+import enum
+
+from api.database import Base
+from api.utils.ddl import create_trigger_if_missing
+
+class MovementReason(str, enum.Enum):
+    OPENING = "opening"
+    CREATE = "create"
+    UPDATE = "update"
+    ADJUST = "adjust"
+    BULK_IMPORT = "bulk_import"
+    TRANSFER = "transfer"
+    DELETE = "delete"
+
+class InventoryMovement(Base):
+    """
+    Append-only record of one change to a warehouse's stock of a SKU
+    
+    Rows are written by a trigger on warehouse_inventory, never by the ORM.
+    """
+    __tablename__ = "inventory_movements"
+    
+    id = Column(BigInteger, Identity(), primary_key=True)
+    inventory_id = Column(String, nullable=False)
+    # No foreign keys: history outlives deleted warehouses and inventory rows
+    warehouse_id = Column(String, nullable=False)
+    sku = Column(String, nullable=False)
+    delta = Column(Float, nullable=False)
+    quantity_after = Column(Float, nullable=False)
+    reason = Column(String, nullable=False)
+    user_id = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Transaction that wrote the movement; created_at is taken before commit,
+    # so snapshots use it to find movements committed after they were taken
+    xact_id = Column(BigInteger, nullable=False, server_default=text("(pg_current_xact_id()::text)::bigint"))
+    
+    __table_args__ = (
+        # Snapshot roll-forward and point-in-time reads of a warehouse
+        Index('ix_inventory_movements_warehouse_created', 'warehouse_id', 'created_at', 'id'),
+        # Movements committed after a snapshot that predate it
+        Index('ix_inventory_movements_warehouse_xact', 'warehouse_id', 'xact_id'),
+        # History of one SKU in a warehouse
+        Index('ix_inventory_movements_warehouse_sku_created', 'warehouse_id', 'sku', 'created_at', 'id'),
+    )
+    
+    def __repr__(self):
+        return f"<InventoryMovement {self.warehouse_id}: {self.sku} {self.delta:+}>"
+
+class InventorySnapshot(Base):
+    """
+    Stock of a warehouse at a point in time, rolled forward from the ledger
+    
+    Holds the movements up to `taken_at` that were committed when it was
+    taken: those its transaction could see, recorded as a pg_snapshot.
+    """
+    __tablename__ = "inventory_snapshots"
+    
+    id = Column(BigInteger, Identity(), primary_key=True)
+    warehouse_id = Column(String, nullable=False)
+    taken_at = Column(DateTime, nullable=False)
+    # pg_current_snapshot() of the transaction that took it, and its xmin
+    # ("xmin" itself is a system column name); NULL on snapshots taken
+    # before they were recorded
+    visible_xids = Column(String, nullable=True)
+    snapshot_xmin = Column(BigInteger, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint('warehouse_id', 'taken_at', name='uix_inventory_snapshot_warehouse_taken'),
+    )
+    
+    def __repr__(self):
+        return f"<InventorySnapshot {self.warehouse_id}: {self.taken_at}>"
+
+class InventorySnapshotItem(Base):
+    """Quantity of one SKU in a snapshot"""
+    __tablename__ = "inventory_snapshot_items"
+    
+    snapshot_id = Column(BigInteger, ForeignKey("inventory_snapshots.id", ondelete="CASCADE"), primary_key=True)
+    sku = Column(String, primary_key=True)
+    quantity = Column(Float, nullable=False)
+
+# Movements are recorded by a statement-level trigger, so every write path
+# is covered and each statement's movements go in as one INSERT in the
+# writer's transaction. Services describe a write through two transaction
+# local settings; without them the reason falls back to the SQL operation.
+_RECORD_FUNCTION = """
+CREATE OR REPLACE FUNCTION inventory_movements_record() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    movement_reason text := coalesce(nullif(current_setting('inventory.movement_reason', true), ''), lower(TG_OP));
+    movement_user text := nullif(current_setting('inventory.movement_user', true), '');
+    moved_at timestamp := clock_timestamp() AT TIME ZONE 'utc';
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO inventory_movements (inventory_id, warehouse_id, sku, delta, quantity_after, reason, user_id, created_at)
+        SELECT n.id, n.warehouse_id, n.sku, n.quantity, n.quantity, movement_reason, movement_user, moved_at
+        FROM new_rows n WHERE n.quantity <> 0;
+    ELSIF TG_OP = 'UPDATE' THEN
+        -- A moved row (new warehouse or SKU) leaves its old key and enters the new one
+        INSERT INTO inventory_movements (inventory_id, warehouse_id, sku, delta, quantity_after, reason, user_id, created_at)
+        SELECT id, warehouse_id, sku, delta, quantity_after, movement_reason, movement_user, moved_at FROM (
+            SELECT n.id, n.warehouse_id, n.sku, n.quantity - o.quantity AS delta, n.quantity AS quantity_after
+            FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE n.warehouse_id = o.warehouse_id AND n.sku = o.sku AND n.quantity <> o.quantity
+            UNION ALL
+            SELECT o.id, o.warehouse_id, o.sku, -o.quantity, 0
+            FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE (n.warehouse_id <> o.warehouse_id OR n.sku <> o.sku) AND o.quantity <> 0
+            UNION ALL
+            SELECT n.id, n.warehouse_id, n.sku, n.quantity, n.quantity
+            FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE (n.warehouse_id <> o.warehouse_id OR n.sku <> o.sku) AND n.quantity <> 0
+        ) changes;
+    ELSE
+        INSERT INTO inventory_movements (inventory_id, warehouse_id, sku, delta, quantity_after, reason, user_id, created_at)
+        SELECT o.id, o.warehouse_id, o.sku, -o.quantity, 0, movement_reason, movement_user, moved_at
+        FROM old_rows o WHERE o.quantity <> 0;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+_TRIGGERS = [
+    create_trigger_if_missing(
+        "inventory_movements_insert",
+        "AFTER INSERT ON warehouse_inventory REFERENCING NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION inventory_movements_record()"
+    ),
+    create_trigger_if_missing(
+        "inventory_movements_update",
+        "AFTER UPDATE ON warehouse_inventory REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION inventory_movements_record()"
+    ),
+    create_trigger_if_missing(
+        "inventory_movements_delete",
+        "AFTER DELETE ON warehouse_inventory REFERENCING OLD TABLE AS old_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION inventory_movements_record()"
+    ),
+]
+
+# Stock that predates the ledger enters it as one opening movement per row
+_BACKFILL = """
+INSERT INTO inventory_movements (inventory_id, warehouse_id, sku, delta, quantity_after, reason, created_at)
+SELECT id, warehouse_id, sku, quantity, quantity, 'opening', now() AT TIME ZONE 'utc'
+FROM warehouse_inventory
+WHERE quantity <> 0 AND NOT EXISTS (SELECT 1 FROM inventory_movements)
+"""
+
+for statement in [_RECORD_FUNCTION, *_TRIGGERS, _BACKFILL]:
+    event.listen(Base.metadata, "after_create", DDL(statement))
@@ -0,0 +1,147 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, func, literal, tuple_, union_all, cast, text, String, BigInteger
+from typing import List, Optional, Sequence
+from datetime import datetime
+
+from api.modules.inventory_ledger.entity.inventory_ledger_entity import InventoryMovement, InventorySnapshot, InventorySnapshotItem
+from api.modules.warehouse.entity.warehouse_entity import Warehouse
+
+class InventoryLedgerRepository:
+    """Repository for inventory movements and snapshots"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def set_movement_context(self, reason: str, user_id: Optional[str]) -> None:
+        """
+        Describe the movements the current transaction will record
+        
+        The settings are transaction local; they are sent once per transaction
+        and reason, not before every write.
+        """
+        context = (reason, user_id)
+        cached = self.db.info.get("movement_context")
+        if cached is not None and cached[0] is self.db.sync_session.get_transaction() and cached[1] == context:
+            return
+        await self.db.execute(select(
+            func.set_config("inventory.movement_reason", reason, True),
+            func.set_config("inventory.movement_user", user_id or "", True)
+        ))
+        self.db.info["movement_context"] = (self.db.sync_session.get_transaction(), context)
+    
+    async def get_movements(self, warehouse_id: str, sku: Optional[str] = None, limit: int = 100,
+                            before: Optional[Sequence] = None) -> List[InventoryMovement]:
+        """Get movements of a warehouse, newest first, before the (created_at, id) key `before`"""
+        query = select(InventoryMovement).where(InventoryMovement.warehouse_id == warehouse_id)
+        if sku is not None:
+            query = query.where(InventoryMovement.sku == sku)
+        if before is not None:
+            query = query.where(tuple_(InventoryMovement.created_at, InventoryMovement.id) < tuple_(*before))
+        query = query.order_by(InventoryMovement.created_at.desc(), InventoryMovement.id.desc()).limit(limit)
+        result = await self.db.execute(query)
+        return result.scalars().all()
+    
+    async def get_latest_snapshot(self, warehouse_id: str, at: datetime) -> Optional[InventorySnapshot]:
+        """Get the latest snapshot of a warehouse taken at or before `at`"""
+        query = (
+            select(InventorySnapshot)
+            .where(InventorySnapshot.warehouse_id == warehouse_id, InventorySnapshot.taken_at <= at)
+            .order_by(InventorySnapshot.taken_at.desc())
+            .limit(1)
+        )
+        result = await self.db.execute(query)
+        return result.scalars().first()
+    
+    def _stock_query(self, warehouse_id: str, until: datetime, snapshot: Optional[InventorySnapshot],
+                     sku: Optional[str] = None):
+        """
+        Build the per-SKU stock of a warehouse at `until`
+        
+        The stock is the snapshot's quantities plus the movements after it, so
+        only the movements since the snapshot are read. Movements dated
+        before the snapshot whose transaction had not committed when it was
+        taken are not in it and are added too; their transaction IDs are at
+        least the snapshot's xmin.
+        """
+        def movements():
+            query = select(InventoryMovement.sku, InventoryMovement.delta.label("quantity")).where(
+                InventoryMovement.warehouse_id == warehouse_id,
+                InventoryMovement.created_at <= until
+            )
+            if sku is not None:
+                query = query.where(InventoryMovement.sku == sku)
+            return query
+        
+        changes = movements()
+        if snapshot is not None:
+            items = select(InventorySnapshotItem.sku, InventorySnapshotItem.quantity).where(
+                InventorySnapshotItem.snapshot_id == snapshot.id
+            )
+            if sku is not None:
+                items = items.where(InventorySnapshotItem.sku == sku)
+            parts = [items, changes.where(InventoryMovement.created_at > snapshot.taken_at)]
+            if snapshot.visible_xids is not None:
+                parts.append(movements().where(
+                    InventoryMovement.created_at <= snapshot.taken_at,
+                    InventoryMovement.xact_id >= snapshot.snapshot_xmin,
+                    text(
+                        "NOT pg_visible_in_snapshot(inventory_movements.xact_id::text::xid8, CAST(:visible_xids AS pg_snapshot))"
+                    ).bindparams(visible_xids=snapshot.visible_xids)
+                ))
+            changes = union_all(*parts)
+        
+        changes = changes.subquery()
+        total = func.sum(changes.c.quantity)
+        return (
+            select(changes.c.sku, total.label("quantity"))
+            .group_by(changes.c.sku)
+            .having(total != 0)
+            .order_by(changes.c.sku)
+        )
+    
+    async def get_stock_at(self, warehouse_id: str, at: datetime, snapshot: Optional[InventorySnapshot],
+                           sku: Optional[str] = None) -> List:
+        """Get rows of (sku, quantity) for a warehouse's stock at a point in time"""
+        result = await self.db.execute(self._stock_query(warehouse_id, at, snapshot, sku))
+        return result.all()
+    
+    async def create_snapshot(self, warehouse_id: str, taken_at: datetime,
+                              previous: Optional[InventorySnapshot]) -> InventorySnapshot:
+        """
+        Create a snapshot by rolling the previous one forward, in two statements
+        
+        Must run in a REPEATABLE READ transaction, so the movements it holds
+        are exactly those visible to the pg_snapshot it records.
+        """
+        current = func.pg_current_snapshot()
+        result = await self.db.execute(select(
+            cast(current, String),
+            cast(cast(func.pg_snapshot_xmin(current), String), BigInteger)
+        ))
+        visible_xids, snapshot_xmin = result.one()
+        snapshot = InventorySnapshot(warehouse_id=warehouse_id, taken_at=taken_at, visible_xids=visible_xids,
+                                     snapshot_xmin=snapshot_xmin)
+        self.db.add(snapshot)
+        await self.db.flush()
+        
+        stock = self._stock_query(warehouse_id, taken_at, previous).subquery()
+        await self.db.execute(
+            insert(InventorySnapshotItem).from_select(
+                ["snapshot_id", "sku", "quantity"],
+                select(literal(snapshot.id), stock.c.sku, stock.c.quantity)
+            )
+        )
+        return snapshot
+    
+    async def get_warehouse_ids_without_snapshot(self, taken_at: datetime, after_id: Optional[str] = None,
+                                                 limit: int = 100) -> List[str]:
+        """Get the next batch of warehouse IDs, in ID order, lacking a snapshot at `taken_at`"""
+        taken = select(InventorySnapshot.id).where(
+            InventorySnapshot.warehouse_id == Warehouse.id,
+            InventorySnapshot.taken_at == taken_at
+        )
+        query = select(Warehouse.id).where(~taken.exists())
+        if after_id is not None:
+            query = query.where(Warehouse.id > after_id)
+        result = await self.db.execute(query.order_by(Warehouse.id).limit(limit))
+        return result.scalars().all()
@@ -0,0 +1,63 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+from datetime import datetime
+
+from api.modules.inventory_ledger.repository.inventory_ledger_repo import InventoryLedgerRepository
+from api.modules.inventory_ledger.entity.inventory_ledger_entity import InventorySnapshot, MovementReason
+from api.middlewares.auth.auth_bearer import current_user_id_var
+from api.utils.pagination import Page, decode_cursor, split_page
+
+class InventoryLedgerService:
+    """Service for inventory movement history"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repository = InventoryLedgerRepository(db)
+    
+    async def record_as(self, reason: MovementReason) -> None:
+        """Attribute the movements of the next writes to a reason and the current user"""
+        await self.repository.set_movement_context(reason.value, current_user_id_var.get())
+    
+    async def list_movements(self, warehouse_id: str, sku: Optional[str] = None, limit: int = 100,
+                             cursor: Optional[str] = None) -> Page:
+        """
+        Get a page of a warehouse's movements, newest first
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        before = None
+        if cursor is not None:
+            values = decode_cursor(cursor)
+            try:
+                before = (datetime.fromisoformat(values[0]), int(values[1]))
+            except (IndexError, TypeError, ValueError):
+                raise ValueError("Invalid cursor")
+        rows = await self.repository.get_movements(warehouse_id, sku, limit + 1, before)
+        return split_page(rows, limit, key=lambda row: (row.created_at.isoformat(), row.id))
+    
+    async def get_stock_at(self, warehouse_id: str, at: datetime,
+                           sku: Optional[str] = None) -> Tuple[Optional[InventorySnapshot], List]:
+        """
+        Get a warehouse's per-SKU stock at a point in time
+        
+        Returns:
+            Tuple of (snapshot the stock was rolled forward from, stock rows)
+        """
+        snapshot = await self.repository.get_latest_snapshot(warehouse_id, at)
+        rows = await self.repository.get_stock_at(warehouse_id, at, snapshot, sku)
+        return snapshot, rows
+    
+    async def take_snapshot(self, warehouse_id: str, taken_at: datetime) -> InventorySnapshot:
+        """
+        Snapshot a warehouse's stock at `taken_at` from its previous snapshot and the ledger
+        
+        Must be the first work of a REPEATABLE READ transaction.
+        """
+        previous = await self.repository.get_latest_snapshot(warehouse_id, taken_at)
+        return await self.repository.create_snapshot(warehouse_id, taken_at, previous)
+    
+    async def get_warehouse_ids_without_snapshot(self, taken_at: datetime, after_id: Optional[str] = None,
+                                                 limit: int = 100) -> List[str]:
+        """Get the next batch of warehouses still to snapshot at `taken_at`"""
+        return await self.repository.get_warehouse_ids_without_snapshot(taken_at, after_id, limit)
@@ -0,0 +1,52 @@
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from api.config import settings
+from api.logger import logger
+from api.modules.inventory_ledger.service.inventory_ledger_service import InventoryLedgerService
+
+def snapshot_boundary(now: Optional[float] = None) -> datetime:
+    """Latest snapshot boundary (UTC) that is at least INVENTORY_SNAPSHOT_LAG_SECONDS old"""
+    now = time.time() if now is None else now
+    interval = settings.INVENTORY_SNAPSHOT_INTERVAL_SECONDS
+    boundary = (now - settings.INVENTORY_SNAPSHOT_LAG_SECONDS) // interval * interval
+    return datetime.utcfromtimestamp(boundary)
+
+class SnapshotRunner:
+    """Takes the periodic per-warehouse inventory snapshots, one transaction per warehouse"""
+    
+    def __init__(self, session_factory: Callable, batch_size: int = 100):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+    
+    async def run(self, taken_at: Optional[datetime] = None) -> int:
+        """Snapshot every warehouse lacking a snapshot at the boundary; returns how many were taken"""
+        taken_at = taken_at or snapshot_boundary()
+        taken = 0
+        after_id = None
+        while True:
+            async with self.session_factory() as session:
+                warehouse_ids = await InventoryLedgerService(session).get_warehouse_ids_without_snapshot(
+                    taken_at, after_id, self.batch_size
+                )
+            if not warehouse_ids:
+                break
+            for warehouse_id in warehouse_ids:
+                async with self.session_factory() as session:
+                    # The snapshot's items and the pg_snapshot it records must agree
+                    await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+                    try:
+                        await InventoryLedgerService(session).take_snapshot(warehouse_id, taken_at)
+                        await session.commit()
+                    except IntegrityError:
+                        # Another runner took this snapshot first
+                        await session.rollback()
+                        continue
+                taken += 1
+            after_id = warehouse_ids[-1]
+        
+        logger.info(f"Took {taken} inventory snapshots at {taken_at.isoformat()}")
+        return taken
@@ -0,0 +1,44 @@
+import asyncio
+
+# Movements are recorded by triggers, so this runs against PostgreSQL (see run_db)
+
+def test_snapshot_plus_later_movements_equals_live_stock(run_db, create_stock):
+    from sqlalchemy import func, select
+
+    from api.database import async_session_factory
+    from api.modules.inventory_ledger.service.inventory_ledger_service import InventoryLedgerService
+    from api.modules.warehouse_inventory.service.warehouse_inventory_service import WarehouseInventoryService
+
+    async def db_now():
+        # Movements are dated by the database clock
+        async with async_session_factory() as session:
+            return await session.scalar(select(func.timezone("utc", func.clock_timestamp())))
+
+    async def main():
+        (warehouse_id,), stock = await create_stock(skus=3, quantity=10, unit_quantity=1)
+        items = [stock[key] for key in sorted(stock)]
+
+        # A movement dated before the snapshot but committed after it was taken
+        async with async_session_factory() as late_writer:
+            await WarehouseInventoryService(late_writer).adjust_quantity(items[0], 5)
+            await asyncio.sleep(0.05)
+            taken_at = await db_now()
+            async with async_session_factory() as session:
+                await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+                snapshot = await InventoryLedgerService(session).take_snapshot(warehouse_id, taken_at)
+                await session.commit()
+            await late_writer.commit()
+
+        # Movements after the snapshot
+        async with async_session_factory() as session:
+            await WarehouseInventoryService(session).adjust_quantity(items[1], -3)
+            await session.commit()
+
+        async with async_session_factory() as session:
+            used, rows = await InventoryLedgerService(session).get_stock_at(warehouse_id, await db_now())
+            live = await WarehouseInventoryService(session).get_inventory_by_warehouse(warehouse_id)
+        assert used is not None and used.id == snapshot.id
+        assert {row.sku: row.quantity for row in rows} == {item.sku: item.quantity for item in live}
+        assert sorted(item.quantity for item in live) == [7, 10, 15]
+
+    run_db(main())
@@ -1,17 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
 from api.database import get_db
 from api.modules.item_unit.service.item_unit_service import ItemUnitService
 from api.modules.item_unit.dto.input import ItemUnitCreate, ItemUnitUpdate, ItemUnitResponse
 from api.middlewares.auth.auth_bearer import get_current_user
+from api.utils.serialization import ResponseEncoder
+from api.utils.etag import VersionConflictError, entity_validator, is_not_modified, not_modified, parse_if_match, set_etag, set_validators
 
 router = APIRouter()
 
+list_encoder = ResponseEncoder(List[ItemUnitResponse])
+
 @router.post("/", response_model=ItemUnitResponse, status_code=status.HTTP_201_CREATED)
 async def create_item_unit(
     item_unit_data: ItemUnitCreate,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     _: dict = Depends(get_current_user)
 ):
@@ -19,6 +24,7 @@ async def create_item_unit(
     item_unit_service = ItemUnitService(db)
     try:
         item_unit = await item_unit_service.create_item_unit(item_unit_data)
+        set_etag(response, item_unit)
         return item_unit
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -26,6 +32,8 @@ async def create_item_unit(
 @router.get("/{item_unit_id}", response_model=ItemUnitResponse)
 async def get_item_unit(
     item_unit_id: str,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     _: dict = Depends(get_current_user)
 ):
@@ -34,36 +42,67 @@ async def get_item_unit(
     item_unit = await item_unit_service.get_by_id(item_unit_id)
     if not item_unit:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item unit not found")
+    validator = entity_validator(item_unit)
+    if is_not_modified(request, validator):
+        return not_modified(validator)
+    set_validators(response, validator)
     return item_unit
 
 @router.get("/", response_model=List[ItemUnitResponse])
 async def get_all_item_units(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     _: dict = Depends(get_current_user)
 ):
-    """Get all item units"""
+    """
+    Get all item units, paged by `cursor` (preferred) or `skip`
+    
+    The cursor of the next page is returned in the X-Next-Cursor header.
+    If-None-Match / If-Modified-Since get a 304 without loading the page.
+    """
     item_unit_service = ItemUnitService(db)
-    item_units = await item_unit_service.get_all_item_units(skip, limit)
-    return item_units
+    try:
+        validator = await item_unit_service.get_item_units_validator(skip, limit, cursor)
+        if is_not_modified(request, validator):
+            return not_modified(validator)
+        page = await item_unit_service.get_all_item_units(skip, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    set_validators(response, validator)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return list_encoder.response(page.items, response)
 
 @router.put("/{item_unit_id}", response_model=ItemUnitResponse)
 async def update_item_unit(
     item_unit_id: str,
     item_unit_data: ItemUnitUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
     _: dict = Depends(get_current_user)
 ):
-    """Update item unit"""
+    """
+    Update item unit
+    
+    With an If-Match header the update only applies to the version the
+    client last read (its ETag) and fails with 412 otherwise.
+    """
     item_unit_service = ItemUnitService(db)
     try:
-        item_unit = await item_unit_service.update_item_unit(item_unit_id, item_unit_data)
+        item_unit = await item_unit_service.update_item_unit(item_unit_id, item_unit_data, parse_if_match(if_match))
         if not item_unit:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item unit not found")
+        set_etag(response, item_unit)
         return item_unit
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except VersionConflictError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
 
 @router.delete("/{item_unit_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_item_unit(
@@ -19,6 +19,7 @@ class ItemUnitResponse(BaseModel):
     quantity: int
     created_at: datetime
     updated_at: datetime
+    version: int
     
     class Config:
         from_attributes = True
@@ -1,8 +1,8 @@
 from sqlalchemy import Column, String, Float
 from api.database import Base
-from api.models.base import TimestampModel
+from api.models.base import TimestampModel, VersionModel
 
-class ItemUnit(Base, TimestampModel):
+class ItemUnit(Base, TimestampModel, VersionModel):
     """Item unit entity model"""
     __tablename__ = "item_units"
     
@@ -1,9 +1,24 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete
-from typing import List, Optional
+from typing import Iterable, List, Optional, Sequence, Set
 
 from api.modules.item_unit.entity.item_unit_entity import ItemUnit
 from api.utils.id_generator import generate_id, Prefix
+from api.utils.pagination import fetch_page_validator
+from api.utils.etag import Validator
+from api.cache import EntityCache
+
+item_unit_cache = EntityCache(ItemUnit, "item_unit")
+
+# Columns of item unit lists, loaded as plain rows instead of entities
+LIST_COLUMNS = (
+    ItemUnit.id,
+    ItemUnit.unit,
+    ItemUnit.quantity,
+    ItemUnit.created_at,
+    ItemUnit.updated_at,
+    ItemUnit.version,
+)
 
 class ItemUnitRepository:
     """Repository for item unit data access"""
@@ -26,7 +41,10 @@ class ItemUnitRepository:
         return item_unit
     
     async def get_by_id(self, item_unit_id: str) -> Optional[ItemUnit]:
-        """Get item unit by ID"""
+        """Get item unit by ID, served from the entity cache when possible"""
+        return await item_unit_cache.get_or_load(item_unit_id, lambda: self._load_by_id(item_unit_id), db=self.db)
+    
+    async def _load_by_id(self, item_unit_id: str) -> Optional[ItemUnit]:
         query = select(ItemUnit).where(ItemUnit.id == item_unit_id)
         result = await self.db.execute(query)
         return result.scalars().first()
@@ -37,21 +55,59 @@ class ItemUnitRepository:
         result = await self.db.execute(query)
         return result.scalars().first()
     
-    async def get_all(self, skip: int = 0, limit: int = 100) -> List[ItemUnit]:
-        """Get all item units with pagination"""
-        query = select(ItemUnit).offset(skip).limit(limit)
+    async def get_existing_ids(self, item_unit_ids: Iterable[str]) -> Set[str]:
+        """Return the subset of the given IDs that exist"""
+        query = select(ItemUnit.id).where(ItemUnit.id.in_(list(item_unit_ids)))
         result = await self.db.execute(query)
-        return result.scalars().all()
+        return set(result.scalars().all())
+    
+    def _page_query(self, skip: int, limit: int, after_id: Optional[str]):
+        """Build the ID-ordered page query, by keyset when `after_id` is given"""
+        query = select(ItemUnit).order_by(ItemUnit.id)
+        if after_id is not None:
+            query = query.where(ItemUnit.id > after_id)
+        else:
+            query = query.offset(skip)
+        return query.limit(limit)
     
-    async def update(self, item_unit_id: str, item_unit_data: dict) -> Optional[ItemUnit]:
-        """Update an item unit"""
-        query = update(ItemUnit).where(ItemUnit.id == item_unit_id).values(**item_unit_data).returning(ItemUnit)
+    async def get_all(self, skip: int = 0, limit: int = 100, after_id: Optional[str] = None) -> List[Sequence]:
+        """
+        Get item unit rows (LIST_COLUMNS) ordered by ID
+        
+        Pages by keyset (`id > after_id`) when `after_id` is given and falls
+        back to OFFSET otherwise.
+        """
+        result = await self.db.execute(self._page_query(skip, limit, after_id).with_only_columns(*LIST_COLUMNS))
+        return result.all()
+    
+    async def get_page_validator(self, skip: int = 0, limit: int = 100, after_id: Optional[str] = None) -> Validator:
+        """Get the ETag and Last-Modified of the page `get_all` would return"""
+        return await fetch_page_validator(self.db, self._page_query(skip, limit, after_id), None)
+    
+    async def update(self, item_unit_id: str, item_unit_data: dict,
+                     expected_versions: Optional[List[int]] = None) -> Optional[ItemUnit]:
+        """
+        Update an item unit and bump its version
+        
+        With `expected_versions` only a row at one of those versions is
+        updated, in the same statement; None is returned otherwise.
+        """
+        query = (
+            update(ItemUnit)
+            .where(ItemUnit.id == item_unit_id)
+            .values(**item_unit_data, version=ItemUnit.version + 1)
+            .returning(ItemUnit)
+        )
+        if expected_versions is not None:
+            query = query.where(ItemUnit.version.in_(expected_versions))
         result = await self.db.execute(query)
+        await item_unit_cache.invalidate(item_unit_id, self.db)
         return result.scalars().first()
     
     async def delete(self, item_unit_id: str) -> bool:
         """Delete an item unit"""
         query = delete(ItemUnit).where(ItemUnit.id == item_unit_id)
         result = await self.db.execute(query)
+        await item_unit_cache.invalidate(item_unit_id, self.db)
         return result.rowcount > 0
       
\ No newline at end of file
@@ -1,9 +1,11 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from typing import Iterable, List, Optional, Set
 
 from api.modules.item_unit.repository.item_unit_repo import ItemUnitRepository
 from api.modules.item_unit.entity.item_unit_entity import ItemUnit
 from api.modules.item_unit.dto.input import ItemUnitCreate, ItemUnitUpdate
+from api.utils.pagination import Page, decode_id_cursor, split_page
+from api.utils.etag import Validator, check_version
 
 class ItemUnitService:
     """Service for item unit business logic"""
@@ -25,31 +27,49 @@ class ItemUnitService:
         """Get item unit by ID"""
         return await self.repository.get_by_id(item_unit_id)
     
-    async def get_all_item_units(self, skip: int = 0, limit: int = 100) -> List[ItemUnit]:
-        """Get all item units"""
-        return await self.repository.get_all(skip, limit)
+    async def get_existing_ids(self, item_unit_ids: Iterable[str]) -> Set[str]:
+        """Return the subset of the given item unit IDs that exist"""
+        return await self.repository.get_existing_ids(item_unit_ids)
     
-    async def update_item_unit(self, item_unit_id: str, item_unit_data: ItemUnitUpdate) -> Optional[ItemUnit]:
-        """Update an item unit"""
-        # Get existing item unit
-        existing_item_unit = await self.repository.get_by_id(item_unit_id)
-        if not existing_item_unit:
-            return None
+    async def get_all_item_units(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Page:
+        """Get a page of item units and the cursor of the next page"""
+        after_id = decode_id_cursor(cursor)
+        rows = await self.repository.get_all(skip, limit + 1, after_id)
+        return split_page(rows, limit)
+    
+    async def get_item_units_validator(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Validator:
+        """Get the ETag and Last-Modified of a page of item units without loading it"""
+        after_id = decode_id_cursor(cursor)
+        return await self.repository.get_page_validator(skip, limit + 1, after_id)
+    
+    async def update_item_unit(self, item_unit_id: str, item_unit_data: ItemUnitUpdate,
+                               expected_versions: Optional[List[int]] = None) -> Optional[ItemUnit]:
+        """
+        Update an item unit in one conditional UPDATE
         
+        Raises VersionConflictError when `expected_versions` is given and the
+        item unit is at another version.
+        """
         # Filter out None values
         update_data = {k: v for k, v in item_unit_data.model_dump().items() if v is not None}
+        if not update_data:
+            existing_item_unit = await self.repository.get_by_id(item_unit_id)
+            check_version(existing_item_unit, expected_versions)
+            return existing_item_unit
         
         # Check unit uniqueness if unit is being updated
-        if "unit" in update_data and update_data["unit"] != existing_item_unit.unit:
+        if "unit" in update_data:
             unit_check = await self.repository.get_by_unit(update_data["unit"])
-            if unit_check:
+            if unit_check and unit_check.id != item_unit_id:
                 raise ValueError(f"Unit '{update_data['unit']}' already exists")
         
-        # Perform update
-        if update_data:
-            return await self.repository.update(item_unit_id, update_data)
+        item_unit = await self.repository.update(item_unit_id, update_data, expected_versions)
+        if item_unit or expected_versions is None:
+            return item_unit
         
-        return existing_item_unit
+        # Only the failure path pays for a second query to explain the failure
+        check_version(await self.repository.get_by_id(item_unit_id), expected_versions)
+        return None
     
     async def delete_item_unit(self, item_unit_id: str) -> bool:
         """Delete an item unit"""
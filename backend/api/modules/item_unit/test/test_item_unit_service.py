@@ -0,0 +1,41 @@
+import asyncio
+import uuid
+
+import pytest
+
+# Conditional updates run against PostgreSQL (see run_db)
+
+def test_update_applies_only_at_an_expected_version(run_db):
+    from api.database import async_session_factory
+    from api.modules.item_unit.dto.input import ItemUnitCreate, ItemUnitUpdate
+    from api.modules.item_unit.service.item_unit_service import ItemUnitService
+    from api.utils.etag import VersionConflictError
+
+    async def main():
+        run = uuid.uuid4().hex[:8]
+        async with async_session_factory() as session:
+            service = ItemUnitService(session)
+            unit = await service.create_item_unit(ItemUnitCreate(unit=f"crate-{run}", quantity=6))
+            await session.commit()
+            unit_id = unit.id
+            assert unit.version == 1
+
+            updated = await service.update_item_unit(unit_id, ItemUnitUpdate(quantity=8), expected_versions=[1])
+            await session.commit()
+            assert (updated.quantity, updated.version) == (8, 2)
+
+            # A writer that read version 1 loses
+            with pytest.raises(VersionConflictError):
+                await service.update_item_unit(unit_id, ItemUnitUpdate(quantity=10), expected_versions=[1])
+            with pytest.raises(VersionConflictError):
+                await service.update_item_unit(unit_id, ItemUnitUpdate(), expected_versions=[1])
+            await session.rollback()
+
+            unchanged = await service.get_by_id(unit_id)
+            assert (unchanged.quantity, unchanged.version) == (8, 2)
+            # Without If-Match the last writer wins, and a missing unit is not a conflict
+            assert (await service.update_item_unit(unit_id, ItemUnitUpdate(quantity=12))).version == 3
+            assert await service.update_item_unit(f"missing-{run}", ItemUnitUpdate(quantity=1), expected_versions=[1]) is None
+            await session.commit()
+
+    run_db(main())
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.database import get_db
+from api.modules.job.service.job_service import JobService
+from api.modules.job.dto.input import JobCreate, JobResponse
+from api.middlewares.auth.auth_bearer import get_current_user, check_permission
+
+router = APIRouter()
+
+@router.post("/", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_job(
+    job_data: JobCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(check_permission("warehouse"))
+):
+    """Submit a background job; poll GET /api/jobs/{job_id} for progress"""
+    job_service = JobService(db)
+    try:
+        return await job_service.submit_job(job_data, current_user.get("user_id"))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(get_current_user)
+):
+    """Get job status and progress"""
+    job_service = JobService(db)
+    job = await job_service.get_by_id(job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+@router.post("/{job_id}/retry", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def retry_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(check_permission("warehouse"))
+):
+    """Resume a failed or interrupted job from its last completed batch"""
+    job_service = JobService(db)
+    job = await job_service.retry_job(job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Job not found or not retryable")
+    return job
@@ -0,0 +1,30 @@
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+from datetime import datetime
+
+from api.modules.job.entity.job_entity import JobType, JobStatus
+
+class JobCreate(BaseModel):
+    """DTO for submitting a background job"""
+    type: JobType
+    warehouse_id: str
+
+class JobResponse(BaseModel):
+    """DTO for job response"""
+    id: str
+    type: JobType
+    status: JobStatus
+    params: Dict[str, Any]
+    progress_done: int
+    progress_total: Optional[int] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int
+    created_by: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
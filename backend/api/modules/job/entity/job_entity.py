@@ -0,0 +1,42 @@
+from sqlalchemy import Column, String, Integer, DateTime, JSON, Enum as SQLEnum
+import enum
+
+from api.database import Base
+from api.models.base import TimestampModel
+
+class JobType(str, enum.Enum):
+    WAREHOUSE_DELETE = "warehouse_delete"
+    WAREHOUSE_RECOUNT = "warehouse_recount"
+
+class JobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class Job(Base, TimestampModel):
+    """Background job entity model"""
+    __tablename__ = "jobs"
+    
+    id = Column(String, primary_key=True)
+    type = Column(SQLEnum(JobType), nullable=False)
+    status = Column(SQLEnum(JobStatus), nullable=False, default=JobStatus.PENDING, index=True)
+    params = Column(JSON, nullable=False, default=lambda: {})
+    # Rows processed so far and the total expected, for progress reporting
+    progress_done = Column(Integer, nullable=False, default=0)
+    progress_total = Column(Integer, nullable=True)
+    # Key of the last processed row, so an interrupted job resumes from there
+    cursor = Column(String, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    # Lease of the runner executing a running job: its token, and when the
+    # lease expires unless renewed; only then may another runner take over
+    lease_token = Column(String, nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    created_by = Column(String, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f"<Job {self.id}: {self.type} - {self.status}>"
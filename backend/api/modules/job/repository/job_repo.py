@@ -0,0 +1,98 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func, or_, and_
+from typing import Optional
+from datetime import datetime, timedelta
+
+from api.modules.job.entity.job_entity import Job, JobStatus
+from api.utils.id_generator import generate_id, Prefix
+
+class JobRepository:
+    """Repository for job data access"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create(self, job_data: dict) -> Job:
+        """Create a new job"""
+        # Generate ID with proper prefix
+        job_data["id"] = generate_id(Prefix.JOB)
+        
+        # Create job instance
+        job = Job(**job_data)
+        
+        # Add to database
+        self.db.add(job)
+        await self.db.flush()
+        
+        return job
+    
+    async def get_by_id(self, job_id: str) -> Optional[Job]:
+        """Get job by ID"""
+        query = select(Job).where(Job.id == job_id)
+        result = await self.db.execute(query)
+        return result.scalars().first()
+    
+    def _lease_expired(self):
+        """Running jobs whose runner stopped renewing its lease"""
+        return and_(
+            Job.status == JobStatus.RUNNING,
+            or_(Job.locked_until.is_(None), Job.locked_until < func.timezone("utc", func.now()))
+        )
+    
+    async def claim(self, job_id: str, lease_token: str, lease_seconds: float) -> Optional[Job]:
+        """
+        Take the lease of a pending job, or of a running one whose lease expired
+        
+        The check and the update are one statement, so of runners claiming
+        the same job at once exactly one gets it. Returns None when the job
+        does not exist, has finished or is leased to a live runner.
+        """
+        query = (
+            update(Job)
+            .where(Job.id == job_id, or_(Job.status == JobStatus.PENDING, self._lease_expired()))
+            .values(
+                status=JobStatus.RUNNING,
+                attempts=Job.attempts + 1,
+                error=None,
+                started_at=func.coalesce(Job.started_at, datetime.utcnow()),
+                lease_token=lease_token,
+                locked_until=func.timezone("utc", func.now()) + timedelta(seconds=lease_seconds)
+            )
+            .returning(Job)
+        )
+        result = await self.db.execute(query)
+        return result.scalars().first()
+    
+    async def update_leased(self, job_id: str, lease_token: str, lease_seconds: float, job_data: dict) -> Optional[Job]:
+        """
+        Update a running job and renew its lease, if the lease is still held
+        
+        Values in `job_data` win, so finishing a job can clear the lease.
+        Returns None when another runner took the job over, in which case the
+        caller must roll back and stop.
+        """
+        query = (
+            update(Job)
+            .where(Job.id == job_id, Job.status == JobStatus.RUNNING, Job.lease_token == lease_token)
+            .values({"locked_until": func.timezone("utc", func.now()) + timedelta(seconds=lease_seconds), **job_data})
+            .returning(Job)
+        )
+        result = await self.db.execute(query)
+        return result.scalars().first()
+    
+    async def reset_for_retry(self, job_id: str) -> Optional[Job]:
+        """Put a failed job, or a running one whose lease expired, back to pending, keeping its progress"""
+        query = (
+            update(Job)
+            .where(Job.id == job_id, or_(Job.status == JobStatus.FAILED, self._lease_expired()))
+            .values(status=JobStatus.PENDING, lease_token=None, locked_until=None)
+            .returning(Job)
+        )
+        result = await self.db.execute(query)
+        return result.scalars().first()
+    
+    async def update(self, job_id: str, job_data: dict) -> Optional[Job]:
+        """Update a job"""
+        query = update(Job).where(Job.id == job_id).values(**job_data).returning(Job)
+        result = await self.db.execute(query)
+        return result.scalars().first()
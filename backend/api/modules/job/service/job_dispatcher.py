@@ -0,0 +1,34 @@
+import asyncio
+from typing import Optional, Set
+
+from api.config import settings
+from api.database import async_session_factory
+from api.modules.job.service.job_runner import JobRunner
+
+# Keep references to in-process job tasks so they are not garbage collected
+_tasks: Set[asyncio.Task] = set()
+_semaphore: Optional[asyncio.Semaphore] = None
+
+def dispatch_job(job_id: str) -> None:
+    """
+    Hand a committed job to the configured backend
+    
+    With JOB_BACKEND=celery the job is queued for the Celery workers in
+    `worker/`; with the default JOB_BACKEND=memory it runs as a task in this
+    process, which needs no broker and is meant for development and tests.
+    """
+    if settings.JOB_BACKEND == "celery":
+        from worker.tasks import run_job
+        run_job.delay(job_id)
+        return
+    
+    task = asyncio.create_task(_run_in_process(job_id))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+async def _run_in_process(job_id: str) -> None:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.JOB_MEMORY_CONCURRENCY)
+    async with _semaphore:
+        await JobRunner(async_session_factory).run(job_id)
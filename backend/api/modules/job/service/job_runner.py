@@ -0,0 +1,135 @@
+import secrets
+from datetime import datetime
+from typing import Any, Callable, Dict
+
+from api.config import settings
+from api.logger import logger
+from api.middlewares.auth.auth_bearer import current_user_id_var
+from api.modules.job.entity.job_entity import Job, JobType, JobStatus
+from api.modules.job.repository.job_repo import JobRepository
+from api.modules.warehouse.service.warehouse_service import WarehouseService
+from api.modules.warehouse_inventory.service.warehouse_inventory_service import WarehouseInventoryService
+
+class LeaseLostError(Exception):
+    """The job's lease lapsed and another runner took the job over"""
+
+class JobRunner:
+    """
+    Executes background jobs in bounded, resumable batches
+    
+    Every batch runs in its own transaction and records the job's progress and
+    cursor in the same commit, so an interrupted job picks up after the last
+    committed batch when it is run again. The runner holds a lease on the job,
+    renewed with every batch, so no second runner starts while it is alive.
+    """
+    
+    def __init__(self, session_factory: Callable):
+        self.session_factory = session_factory
+        self.batch_size = settings.JOB_BATCH_SIZE
+        self.lease_seconds = settings.JOB_LEASE_SECONDS
+        self.lease_token = secrets.token_hex(16)
+        self.handlers = {
+            JobType.WAREHOUSE_DELETE: self._delete_warehouse,
+            JobType.WAREHOUSE_RECOUNT: self._recount_warehouse,
+        }
+    
+    async def run(self, job_id: str) -> None:
+        """Run a job to completion, recording failures on the job"""
+        async with self.session_factory() as session:
+            job = await JobRepository(session).claim(job_id, self.lease_token, self.lease_seconds)
+            await session.commit()
+        if not job:
+            logger.warning(f"Job {job_id} not found, already finished or running elsewhere")
+            return
+        
+        # Attribute the job's inventory movements to the user who submitted it
+        current_user_id_var.set(job.created_by)
+        try:
+            await self.handlers[job.type](job)
+        except LeaseLostError as e:
+            logger.warning(str(e))
+        except Exception as e:
+            logger.exception(f"Job {job_id} failed")
+            async with self.session_factory() as session:
+                await JobRepository(session).update_leased(job_id, self.lease_token, self.lease_seconds, {
+                    "status": JobStatus.FAILED,
+                    "error": str(e),
+                    "finished_at": datetime.utcnow(),
+                    "lease_token": None,
+                    "locked_until": None,
+                })
+                await session.commit()
+    
+    async def _update(self, session, job_id: str, job_data: Dict[str, Any]) -> None:
+        """Update the job and renew the lease; raises LeaseLostError when it is no longer held"""
+        job = await JobRepository(session).update_leased(job_id, self.lease_token, self.lease_seconds, job_data)
+        if job is None:
+            raise LeaseLostError(f"Job {job_id} was taken over by another runner, stopping")
+    
+    async def _delete_warehouse(self, job: Job) -> None:
+        """Delete a warehouse's inventory batch by batch, then the warehouse"""
+        warehouse_id = job.params["warehouse_id"]
+        cursor = job.cursor
+        done = job.progress_done
+        
+        if job.progress_total is None:
+            async with self.session_factory() as session:
+                total = await WarehouseInventoryService(session).count_inventory_by_warehouse(warehouse_id)
+                await self._update(session, job.id, {"progress_total": total})
+                await session.commit()
+        
+        while True:
+            async with self.session_factory() as session:
+                inventory_service = WarehouseInventoryService(session)
+                ids = await inventory_service.get_inventory_ids_by_warehouse(warehouse_id, cursor, self.batch_size)
+                if not ids:
+                    break
+                done += await inventory_service.delete_inventory_batch(ids)
+                cursor = ids[-1]
+                await self._update(session, job.id, {"progress_done": done, "cursor": cursor})
+                await session.commit()
+        
+        async with self.session_factory() as session:
+            deleted = await WarehouseService(session).delete_warehouse(warehouse_id)
+            await self._finish(session, job.id, {"inventory_deleted": done, "warehouse_deleted": deleted})
+    
+    async def _recount_warehouse(self, job: Job) -> None:
+        """Total a warehouse's stock in base units, batch by batch"""
+        warehouse_id = job.params["warehouse_id"]
+        cursor = job.cursor
+        done = job.progress_done
+        totals: Dict[str, Any] = job.result or {"items": 0, "quantity": 0, "base_quantity": 0}
+        
+        if job.progress_total is None:
+            async with self.session_factory() as session:
+                total = await WarehouseInventoryService(session).count_inventory_by_warehouse(warehouse_id)
+                await self._update(session, job.id, {"progress_total": total})
+                await session.commit()
+        
+        while True:
+            async with self.session_factory() as session:
+                rows = await WarehouseInventoryService(session).get_stock_batch(warehouse_id, cursor, self.batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    totals["items"] += 1
+                    totals["quantity"] += row.quantity
+                    totals["base_quantity"] += row.quantity * row.unit_factor
+                done += len(rows)
+                cursor = rows[-1].id
+                # Partial totals are saved with the cursor so a resumed job continues them
+                await self._update(session, job.id, {"progress_done": done, "cursor": cursor, "result": dict(totals)})
+                await session.commit()
+        
+        async with self.session_factory() as session:
+            await self._finish(session, job.id, totals)
+    
+    async def _finish(self, session, job_id: str, result: Dict[str, Any]) -> None:
+        await self._update(session, job_id, {
+            "status": JobStatus.SUCCEEDED,
+            "result": result,
+            "finished_at": datetime.utcnow(),
+            "lease_token": None,
+            "locked_until": None,
+        })
+        await session.commit()
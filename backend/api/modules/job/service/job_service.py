@@ -0,0 +1,51 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from api.modules.job.repository.job_repo import JobRepository
+from api.modules.job.entity.job_entity import Job
+from api.modules.job.dto.input import JobCreate
+from api.modules.job.service.job_dispatcher import dispatch_job
+from api.modules.warehouse.service.warehouse_service import WarehouseService
+
+class JobService:
+    """Service for background job business logic"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repository = JobRepository(db)
+        self.warehouse_service = WarehouseService(db)
+    
+    async def submit_job(self, job_data: JobCreate, user_id: Optional[str] = None) -> Job:
+        """Create a job and hand it to the job backend"""
+        warehouse = await self.warehouse_service.get_by_id(job_data.warehouse_id)
+        if not warehouse:
+            raise ValueError(f"Warehouse with ID {job_data.warehouse_id} not found")
+        
+        job = await self.repository.create({
+            "type": job_data.type,
+            "params": {"warehouse_id": job_data.warehouse_id},
+            "created_by": user_id,
+        })
+        
+        # The worker reads the job in its own transaction, so commit first
+        await self.db.commit()
+        dispatch_job(job.id)
+        return job
+    
+    async def get_by_id(self, job_id: str) -> Optional[Job]:
+        """Get job by ID"""
+        return await self.repository.get_by_id(job_id)
+    
+    async def retry_job(self, job_id: str) -> Optional[Job]:
+        """
+        Resume a failed or interrupted job from its last committed batch
+        
+        A running job counts as interrupted only once its runner's lease
+        lapsed, so a retry never starts a second runner next to a live one.
+        """
+        job = await self.repository.reset_for_retry(job_id)
+        if not job:
+            return None
+        await self.db.commit()
+        dispatch_job(job.id)
+        return job
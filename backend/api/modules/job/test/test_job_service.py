@@ -0,0 +1,72 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+# Jobs and their leases live in PostgreSQL (see run_db); the memory backend runs them in this process
+
+def test_claim_is_exclusive_until_the_lease_lapses(run_db, create_stock):
+    from api.database import async_session_factory
+    from api.modules.job.entity.job_entity import JobStatus, JobType
+    from api.modules.job.repository.job_repo import JobRepository
+
+    async def main():
+        (warehouse_id,), _ = await create_stock()
+        async with async_session_factory() as session:
+            job = await JobRepository(session).create({"type": JobType.WAREHOUSE_RECOUNT, "params": {"warehouse_id": warehouse_id}})
+            await session.commit()
+
+        async with async_session_factory() as session:
+            repository = JobRepository(session)
+            claimed = await repository.claim(job.id, "runner-a", 60)
+            assert claimed is not None and claimed.status == JobStatus.RUNNING and claimed.attempts == 1
+            # A second runner, or a retry, must not start while the lease is live
+            assert await repository.claim(job.id, "runner-b", 60) is None
+            assert await repository.reset_for_retry(job.id) is None
+            await session.commit()
+
+        async with async_session_factory() as session:
+            # The first runner stops renewing its lease
+            await JobRepository(session).update(job.id, {"locked_until": datetime.utcnow() - timedelta(hours=1)})
+            await session.commit()
+
+        async with async_session_factory() as session:
+            retried = await JobRepository(session).reset_for_retry(job.id)
+            assert retried is not None and retried.status == JobStatus.PENDING
+            taken_over = await JobRepository(session).claim(job.id, "runner-b", 60)
+            assert taken_over is not None and taken_over.attempts == 2
+            # The first runner finds out when it next renews its lease
+            assert await JobRepository(session).update_leased(job.id, "runner-a", 60, {"progress_done": 1}) is None
+            assert await JobRepository(session).update_leased(job.id, "runner-b", 60, {"progress_done": 1}) is not None
+            await session.rollback()
+
+    run_db(main())
+
+@pytest.mark.skipif(os.getenv("JOB_BACKEND", "memory") != "memory", reason="needs the memory job backend")
+def test_memory_backend_runs_a_job_once(run_db, create_stock):
+    from api.database import async_session_factory
+    from api.modules.job.dto.input import JobCreate
+    from api.modules.job.entity.job_entity import JobStatus, JobType
+    from api.modules.job.service import job_dispatcher
+    from api.modules.job.service.job_service import JobService
+
+    async def main():
+        (warehouse_id,), _ = await create_stock(skus=3, quantity=10, unit_quantity=6)
+        async with async_session_factory() as session:
+            job = await JobService(session).submit_job(JobCreate(type=JobType.WAREHOUSE_RECOUNT, warehouse_id=warehouse_id))
+        # Dispatch the same job again, as a redelivered task would
+        job_dispatcher.dispatch_job(job.id)
+        await asyncio.wait_for(asyncio.gather(*list(job_dispatcher._tasks)), timeout=10)
+
+        async with async_session_factory() as session:
+            service = JobService(session)
+            finished = await service.get_by_id(job.id)
+            assert finished.status == JobStatus.SUCCEEDED
+            assert finished.attempts == 1
+            assert finished.result == {"items": 3, "quantity": 30, "base_quantity": 180}
+            assert finished.lease_token is None
+            # Finished jobs are not retried
+            assert await service.retry_job(job.id) is None
+
+    run_db(main())
@@ -1,14 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
 from api.database import get_db
 from api.modules.user.service.user_service import UserService
-from api.modules.user.dto.input import UserCreate, UserUpdate, UserResponse, UserLogin, TokenResponse, PaginatedUsersResponse
+from api.modules.user.dto.input import UserCreate, UserUpdate, UserResponse, UserLogin, TokenResponse, PaginatedUsersResponse, ApiKeyResponse
 from api.middlewares.auth.auth_bearer import get_current_user, admin_required
+from api.utils.pagination import CountMode
+from api.utils.serialization import ResponseEncoder
+from api.utils.password import PasswordHasherBusyError
+from api.utils.api_key import parse_api_key
+from api.utils.etag import VersionConflictError, entity_validator, is_not_modified, not_modified, parse_if_match, set_etag, set_validators
 
 router = APIRouter()
 
+page_encoder = ResponseEncoder(PaginatedUsersResponse)
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register_user(
     user_data: UserCreate,
@@ -21,6 +28,8 @@ async def register_user(
         return user
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except PasswordHasherBusyError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "1"})
 
 @router.post("/login", response_model=TokenResponse)
 async def login(
@@ -29,7 +38,10 @@ async def login(
 ):
     """Authenticate user and return token"""
     user_service = UserService(db)
-    result = await user_service.authenticate_user(user_data.email, user_data.password)
+    try:
+        result = await user_service.authenticate_user(user_data.email, user_data.password)
+    except PasswordHasherBusyError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "1"})
     if not result:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -40,6 +52,8 @@ async def login(
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -48,11 +62,17 @@ async def get_current_user_info(
     user = await user_service.get_by_id(current_user["user_id"])
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    validator = entity_validator(user)
+    if is_not_modified(request, validator):
+        return not_modified(validator)
+    set_validators(response, validator)
     return user
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: str,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     _: dict = Depends(admin_required)
 ):
@@ -61,39 +81,111 @@ async def get_user(
     user = await user_service.get_by_id(user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    validator = entity_validator(user)
+    if is_not_modified(request, validator):
+        return not_modified(validator)
+    set_validators(response, validator)
     return user
 
 @router.get("/", response_model=PaginatedUsersResponse)
 async def get_all_users(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.EXACT,
     db: AsyncSession = Depends(get_db),
     _: dict = Depends(admin_required)
 ):
-    """Get all users (admin only)"""
+    """
+    Get all users (admin only), paged by `cursor` (preferred) or `skip`
+    
+    `count` selects how the total is computed: exact, estimate or none.
+    If-None-Match / If-Modified-Since get a 304 without loading the page.
+    """
     user_service = UserService(db)
-    users = await user_service.get_all_users(skip, limit)
-    count = await user_service.count_all_users()
-    return PaginatedUsersResponse(users=users, count=count, offset=skip, limit=limit)
+    try:
+        validator = await user_service.get_users_validator(skip, limit, cursor, count)
+        if is_not_modified(request, validator):
+            return not_modified(validator)
+        page = await user_service.get_all_users(skip, limit, cursor, count, validator)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    set_validators(response, validator)
+    return page_encoder.response({
+        "users": page.items,
+        "count": page.count,
+        "offset": skip,
+        "limit": limit,
+        "next_cursor": page.next_cursor,
+    }, response)
 
 @router.put("/{user_id}", response_model=UserResponse)
 async def update_user(
     user_id: str,
     user_data: UserUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
-    """Update user"""
+    """
+    Update user
+    
+    With an If-Match header the update only applies to the version the
+    client last read (its ETag) and fails with 412 otherwise.
+    """
     # Only allow users to update themselves unless admin
     if current_user["user_id"] != user_id and current_user["role"] != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
     
     user_service = UserService(db)
-    user = await user_service.update_user(user_id, user_data)
+    try:
+        user = await user_service.update_user(user_id, user_data, parse_if_match(if_match))
+    except VersionConflictError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    set_etag(response, user)
     return user
 
+@router.post("/{user_id}/api-key", response_model=ApiKeyResponse, status_code=status.HTTP_201_CREATED)
+async def issue_api_key(
+    user_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Issue or rotate a user's API key
+    
+    The key replaces any previous one and is only returned here. Send it as
+    `Authorization: Bearer <key>` instead of a login token.
+    """
+    if current_user["user_id"] != user_id and current_user["role"] != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    
+    user_service = UserService(db)
+    api_key = await user_service.issue_api_key(user_id)
+    if not api_key:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return ApiKeyResponse(api_key=api_key, api_key_prefix=parse_api_key(api_key)[0], user_id=user_id)
+
+@router.delete("/{user_id}/api-key", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_api_key(
+    user_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Revoke a user's API key"""
+    if current_user["user_id"] != user_id and current_user["role"] != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    
+    user_service = UserService(db)
+    if not await user_service.revoke_api_key(user_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return None
+
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(
     user_id: str,
@@ -28,8 +28,10 @@ class UserResponse(BaseModel):
     role: user_entity.UserRole
     phone: Optional[str] = None
     permissions: List[str]
+    api_key_prefix: Optional[str] = None
     created_at: datetime
     updated_at: datetime
+    version: int
     
     class Config:
         from_attributes = True
@@ -46,9 +48,17 @@ class TokenResponse(BaseModel):
     expires_in: int
     user: UserResponse
 
+class ApiKeyResponse(BaseModel):
+    """DTO for a newly issued API key, shown only once"""
+    api_key: str
+    api_key_prefix: str
+    user_id: str
+
 class PaginatedUsersResponse(BaseModel):
+    """DTO for pagination response"""
     users: List[UserResponse]
-    count: int
+    count: Optional[int] = None
     offset: int
     limit: int
+    next_cursor: Optional[str] = None
     
\ No newline at end of file
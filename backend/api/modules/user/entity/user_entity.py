@@ -4,14 +4,14 @@ import enum
 from typing import List, Optional
 
 from api.database import Base
-from api.models.base import TimestampModel
+from api.models.base import TimestampModel, VersionModel
 
 class UserRole(str, enum.Enum):
     ADMIN = "admin"
     MEMBER = "member"
     MODERATOR = "moderator"
 
-class User(Base, TimestampModel):
+class User(Base, TimestampModel, VersionModel):
     """User entity model"""
     __tablename__ = "users"
     
@@ -19,7 +19,9 @@ class User(Base, TimestampModel):
     email = Column(String, unique=True, nullable=False, index=True)
     username = Column(String, unique=True, nullable=False, index=True)
     password_hash = Column(String, nullable=False)
+    # HMAC digest of the user's API key, found by its public prefix
     api_token = Column(String, nullable=True)
+    api_key_prefix = Column(String, nullable=True, unique=True, index=True)
     role = Column(SQLEnum(UserRole), nullable=False, default=UserRole.MEMBER)
     phone = Column(String, nullable=True)
     permissions = Column(JSON, nullable=False, default=lambda: [])
@@ -1,9 +1,29 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete, func
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 
 from api.modules.user.entity import user_entity
 from api.utils.id_generator import generate_id, Prefix
+from api.utils.pagination import CountMode, count_column, fetch_page, fetch_page_validator
+from api.utils.etag import Validator
+from api.cache import EntityCache
+
+# Password hash and API token never leave the database
+user_cache = EntityCache(user_entity.User, "user", exclude=("password_hash", "api_token"))
+
+# Columns of user lists, loaded as plain rows instead of entities
+LIST_COLUMNS = (
+    user_entity.User.id,
+    user_entity.User.email,
+    user_entity.User.username,
+    user_entity.User.role,
+    user_entity.User.phone,
+    user_entity.User.permissions,
+    user_entity.User.api_key_prefix,
+    user_entity.User.created_at,
+    user_entity.User.updated_at,
+    user_entity.User.version,
+)
 
 class UserRepository:
     """Repository for user data access"""
@@ -26,7 +46,10 @@ class UserRepository:
         return user
     
     async def get_by_id(self, user_id: str) -> Optional[user_entity.User]:
-        """Get user by ID"""
+        """Get user by ID, served from the entity cache when possible"""
+        return await user_cache.get_or_load(user_id, lambda: self._load_by_id(user_id), db=self.db)
+    
+    async def _load_by_id(self, user_id: str) -> Optional[user_entity.User]:
         query = select(user_entity.User).where(user_entity.User.id == user_id)
         result = await self.db.execute(query)
         return result.scalars().first()
@@ -37,32 +60,82 @@ class UserRepository:
         result = await self.db.execute(query)
         return result.scalars().first()
     
+    async def get_by_api_key_prefix(self, prefix: str) -> Optional[user_entity.User]:
+        """Get the user holding the API key with this prefix"""
+        query = select(user_entity.User).where(user_entity.User.api_key_prefix == prefix)
+        result = await self.db.execute(query)
+        return result.scalars().first()
+    
     async def get_by_username(self, username: str) -> Optional[user_entity.User]:
         """Get user by username"""
         query = select(user_entity.User).where(user_entity.User.username == username)
         result = await self.db.execute(query)
         return result.scalars().first()
     
-    async def get_all(self, skip: int = 0, limit: int = 100) -> List[user_entity.User]:
-        """Get all users with pagination"""
-        query = select(user_entity.User).offset(skip).limit(limit)
-        result = await self.db.execute(query)
+    def _page_query(self, skip: int, limit: int, after_id: Optional[str]):
+        """Build the ID-ordered page query, by keyset when `after_id` is given"""
+        query = select(user_entity.User).order_by(user_entity.User.id)
+        if after_id is not None:
+            query = query.where(user_entity.User.id > after_id)
+        else:
+            query = query.offset(skip)
+        return query.limit(limit)
+    
+    async def get_all(self, skip: int = 0, limit: int = 100, after_id: Optional[str] = None) -> List[user_entity.User]:
+        """
+        Get all users ordered by ID
+        
+        Pages by keyset (`id > after_id`) when `after_id` is given and falls
+        back to OFFSET otherwise.
+        """
+        result = await self.db.execute(self._page_query(skip, limit, after_id))
         return result.scalars().all()
     
+    async def get_page(self, skip: int = 0, limit: int = 100, after_id: Optional[str] = None,
+                       count_mode: CountMode = CountMode.EXACT,
+                       validator: Optional[Validator] = None) -> Tuple[List[Sequence], Optional[int]]:
+        """Get a page of user rows (LIST_COLUMNS) and the total count in one round trip"""
+        total = count_column(user_entity.User, count_mode)
+        query = self._page_query(skip, limit, after_id).with_only_columns(*LIST_COLUMNS)
+        return await fetch_page(self.db, query, total, validator)
+    
+    async def get_page_validator(self, skip: int = 0, limit: int = 100, after_id: Optional[str] = None,
+                                 count_mode: CountMode = CountMode.EXACT) -> Validator:
+        """Get the ETag and Last-Modified of the page `get_page` would return"""
+        total = count_column(user_entity.User, count_mode)
+        return await fetch_page_validator(
+            self.db, self._page_query(skip, limit, after_id), total, count_mode == CountMode.EXACT
+        )
+    
     async def count_all(self) -> int:
         """Count all users"""
         query = select(func.count()).select_from(user_entity.User)
         result = await self.db.execute(query)
         return result.scalar()
     
-    async def update(self, user_id: str, user_data: dict) -> Optional[user_entity.User]:
-        """Update a user"""
-        query = update(user_entity.User).where(user_entity.User.id == user_id).values(**user_data).returning(user_entity.User)
+    async def update(self, user_id: str, user_data: dict,
+                     expected_versions: Optional[List[int]] = None) -> Optional[user_entity.User]:
+        """
+        Update a user and bump its version
+        
+        With `expected_versions` only a row at one of those versions is
+        updated, in the same statement; None is returned otherwise.
+        """
+        query = (
+            update(user_entity.User)
+            .where(user_entity.User.id == user_id)
+            .values(**user_data, version=user_entity.User.version + 1)
+            .returning(user_entity.User)
+        )
+        if expected_versions is not None:
+            query = query.where(user_entity.User.version.in_(expected_versions))
         result = await self.db.execute(query)
+        await user_cache.invalidate(user_id, self.db)
         return result.scalars().first()
     
     async def delete(self, user_id: str) -> bool:
         """Delete a user"""
         query = delete(user_entity.User).where(user_entity.User.id == user_id)
         result = await self.db.execute(query)
+        await user_cache.invalidate(user_id, self.db)
         return result.rowcount > 0
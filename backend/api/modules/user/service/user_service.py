@@ -5,14 +5,19 @@ from datetime import timedelta
 from api.modules.user.repository.user_repo import UserRepository
 from api.modules.user.entity import user_entity
 from api.modules.user.dto.input import UserCreate, UserUpdate
-from api.utils.password import hash_password, verify_password
+from api.utils.password import hash_password_async, verify_and_update_password_async
 from api.middlewares.auth.jwt_token_handler import create_access_token
+from api.middlewares.auth.principal_cache import invalidate_user_on_commit
 from api.config import settings
+from api.utils.pagination import CountMode, Page, decode_id_cursor, split_page
+from api.utils.etag import Validator, check_version
+from api.utils.api_key import generate_api_key, parse_api_key, verify_api_key_secret
 
 class UserService:
     """Service for user business logic"""
     
     def __init__(self, db: AsyncSession):
+        self.db = db
         self.repository = UserRepository(db)
     
     async def create_user(self, user_data: UserCreate) -> user_entity.User:
@@ -29,7 +34,7 @@ class UserService:
         
         # Hash password
         user_dict = user_data.model_dump()
-        user_dict["password_hash"] = hash_password(user_dict.pop("password"))
+        user_dict["password_hash"] = await hash_password_async(user_dict.pop("password"))
         
         # Create user
         return await self.repository.create(user_dict)
@@ -42,33 +47,96 @@ class UserService:
         """Get user by email"""
         return await self.repository.get_by_email(email)
     
-    async def get_all_users(self, skip: int = 0, limit: int = 100) -> List[user_entity.User]:
-        """Get all users"""
-        return await self.repository.get_all(skip, limit)
+    async def get_all_users(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                       count_mode: CountMode = CountMode.NONE, validator: Optional[Validator] = None) -> Page:
+        """
+        Get a page of users, the next cursor and, unless disabled, the total count
+        
+        Pass the page's validator to reuse its total instead of counting again.
+        """
+        after_id = decode_id_cursor(cursor)
+        rows, count = await self.repository.get_page(skip, limit + 1, after_id, count_mode, validator)
+        return split_page(rows, limit, count)
+    
+    async def get_users_validator(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                                  count_mode: CountMode = CountMode.NONE) -> Validator:
+        """Get the ETag and Last-Modified of a page of users without loading it"""
+        after_id = decode_id_cursor(cursor)
+        return await self.repository.get_page_validator(skip, limit + 1, after_id, count_mode)
     
     async def count_all_users(self) -> int:
         """Count all users"""
         return await self.repository.count_all()
     
-    async def update_user(self, user_id: str, user_data: UserUpdate) -> Optional[user_entity.User]:
-        """Update a user"""
-        # Get existing user
-        existing_user = await self.repository.get_by_id(user_id)
-        if not existing_user:
-            return None
+    async def update_user(self, user_id: str, user_data: UserUpdate,
+                          expected_versions: Optional[List[int]] = None) -> Optional[user_entity.User]:
+        """
+        Update a user in one conditional UPDATE
         
+        Raises VersionConflictError when `expected_versions` is given and the
+        user is at another version.
+        """
         # Filter out None values
         update_data = {k: v for k, v in user_data.model_dump().items() if v is not None}
+        if not update_data:
+            existing_user = await self.repository.get_by_id(user_id)
+            check_version(existing_user, expected_versions)
+            return existing_user
         
-        # Perform update
-        if update_data:
-            return await self.repository.update(user_id, update_data)
+        user = await self.repository.update(user_id, update_data, expected_versions)
+        if user:
+            # Role and permissions live in cached principals, drop them
+            invalidate_user_on_commit(self.db, user_id)
+            return user
         
-        return existing_user
+        # Only the failure path pays for a second query to explain the failure
+        if expected_versions is not None:
+            check_version(await self.repository.get_by_id(user_id), expected_versions)
+        return None
     
     async def delete_user(self, user_id: str) -> bool:
         """Delete a user"""
-        return await self.repository.delete(user_id)
+        deleted = await self.repository.delete(user_id)
+        invalidate_user_on_commit(self.db, user_id)
+        return deleted
+    
+    async def issue_api_key(self, user_id: str) -> Optional[str]:
+        """
+        Issue a user an API key, replacing (rotating) any previous one
+        
+        Returns:
+            The key, which is not stored and cannot be shown again, or None
+            when the user does not exist
+        """
+        issued = generate_api_key()
+        user = await self.repository.update(user_id, {"api_key_prefix": issued.prefix, "api_token": issued.digest})
+        if not user:
+            return None
+        invalidate_user_on_commit(self.db, user_id)
+        return issued.key
+    
+    async def revoke_api_key(self, user_id: str) -> bool:
+        """Revoke a user's API key, returns False when the user does not exist"""
+        user = await self.repository.update(user_id, {"api_key_prefix": None, "api_token": None})
+        invalidate_user_on_commit(self.db, user_id)
+        return user is not None
+    
+    async def authenticate_api_key(self, api_key: str) -> Optional[Dict[str, Any]]:
+        """Return the principal of a valid API key, or None"""
+        parsed = parse_api_key(api_key)
+        if parsed is None:
+            return None
+        prefix, secret = parsed
+        user = await self.repository.get_by_api_key_prefix(prefix)
+        if not user or not verify_api_key_secret(secret, user.api_token):
+            return None
+        # Same claims as a login token
+        return {
+            "user_id": user.id,
+            "email": user.email,
+            "role": user.role.value,
+            "permissions": user.permissions
+        }
     
     async def authenticate_user(self, email: str, password: str) -> Optional[Dict[str, Any]]:
         """Authenticate a user and return JWT token if valid"""
@@ -78,9 +146,14 @@ class UserService:
             return None
         
         # Verify password
-        if not verify_password(password, user.password_hash):
+        valid, new_hash = await verify_and_update_password_async(password, user.password_hash)
+        if not valid:
             return None
         
+        # Rehash passwords stored with an outdated bcrypt cost
+        if new_hash:
+            await self.repository.update(user.id, {"password_hash": new_hash})
+        
         # Generate token
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         token_data = {
@@ -0,0 +1,36 @@
+import asyncio
+import uuid
+
+# Conditional updates run against PostgreSQL (see run_db)
+
+def test_concurrent_updates_at_the_same_version_let_one_win(run_db):
+    from api.database import async_session_factory
+    from api.modules.user.dto.input import UserCreate, UserUpdate
+    from api.modules.user.service.user_service import UserService
+    from api.utils.etag import VersionConflictError
+
+    async def update(user_id: str, phone: str):
+        async with async_session_factory() as session:
+            try:
+                await UserService(session).update_user(user_id, UserUpdate(phone=phone), expected_versions=[1])
+                await session.commit()
+                return phone
+            except VersionConflictError:
+                return None
+
+    async def main():
+        run = uuid.uuid4().hex[:8]
+        async with async_session_factory() as session:
+            user = await UserService(session).create_user(
+                UserCreate(email=f"versions-{run}@example.com", username=f"versions-{run}", password="correct-horse")
+            )
+            await session.commit()
+
+        winners = [phone for phone in await asyncio.gather(*(update(user.id, f"555-{index}") for index in range(5))) if phone]
+        assert len(winners) == 1
+
+        async with async_session_factory() as session:
+            stored = await UserService(session).get_by_id(user.id)
+            assert (stored.phone, stored.version) == (winners[0], 2)
+
+    run_db(main())
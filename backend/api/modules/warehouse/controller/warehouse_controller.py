@@ -1,28 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Literal, Optional
 
-from api.database import get_db
+from api.database import get_db, read_session_factory
 from api.modules.warehouse.service.warehouse_service import WarehouseService
+from api.modules.warehouse_inventory.service.warehouse_inventory_service import WarehouseInventoryService
 from api.modules.warehouse.dto.input import WarehouseCreate, WarehouseUpdate, WarehouseResponse, PaginationWarehouseResponse
 from api.middlewares.auth.auth_bearer import get_current_user, check_permission
+from api.utils.pagination import CountMode
+from api.utils.serialization import ResponseEncoder
+from api.utils.etag import VersionConflictError, entity_validator, is_not_modified, not_modified, parse_if_match, set_etag, set_validators
 
 router = APIRouter()
 
+page_encoder = ResponseEncoder(PaginationWarehouseResponse)
+
 @router.post("/", response_model=WarehouseResponse, status_code=status.HTTP_201_CREATED)
 async def create_warehouse(
     warehouse_data: WarehouseCreate,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     _: dict = Depends(check_permission("warehouse"))
 ):
     """Create a new warehouse"""
     warehouse_service = WarehouseService(db)
     warehouse = await warehouse_service.create_warehouse(warehouse_data)
+    set_etag(response, warehouse)
     return warehouse
 
 @router.get("/{warehouse_id}", response_model=WarehouseResponse)
 async def get_warehouse(
     warehouse_id: str,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     _: dict = Depends(get_current_user)
 ):
@@ -31,38 +42,104 @@ async def get_warehouse(
     warehouse = await warehouse_service.get_by_id(warehouse_id)
     if not warehouse:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Warehouse not found")
+    validator = entity_validator(warehouse)
+    if is_not_modified(request, validator):
+        return not_modified(validator)
+    set_validators(response, validator)
     return warehouse
 
+@router.get("/{warehouse_id}/inventory/export")
+async def export_warehouse_inventory(
+    request: Request,
+    warehouse_id: str,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(get_current_user)
+):
+    """
+    Stream a warehouse's inventory as NDJSON or CSV
+    
+    Rows are read from a server-side cursor and sent in chunks of
+    EXPORT_CHUNK_SIZE, so memory use does not grow with the warehouse size.
+    """
+    warehouse_service = WarehouseService(db)
+    warehouse = await warehouse_service.get_by_id(warehouse_id)
+    if not warehouse:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Warehouse not found")
+    session_factory = await read_session_factory(request)
+    
+    async def body():
+        # The request session is closed before the body is sent, so the
+        # stream holds its own. On client disconnect this generator is
+        # cancelled, which closes the cursor and ends the query.
+        async with session_factory() as session:
+            async for chunk in WarehouseInventoryService(session).export_inventory(warehouse_id, format):
+                yield chunk
+    
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{warehouse_id}-inventory.{format}"'}
+    )
+
 @router.get("/", response_model=PaginationWarehouseResponse)
 async def get_all_warehouses(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.EXACT,
     db: AsyncSession = Depends(get_db),
     _: dict = Depends(get_current_user)
 ):
-    """Get all warehouses"""
+    """
+    Get all warehouses, paged by `cursor` (preferred) or `skip`
+    
+    `count` selects how the total is computed: exact, estimate or none.
+    If-None-Match / If-Modified-Since get a 304 without loading the page.
+    """
     warehouse_service = WarehouseService(db)
-    warehouses = await warehouse_service.get_all_warehouses(skip, limit)
-    count = await warehouse_service.count_all_warehouses()
-    return PaginationWarehouseResponse(
-        warehouses=warehouses,
-        count=count,
-        offset=skip,
-        limit=limit
-    )
+    try:
+        validator = await warehouse_service.get_warehouses_validator(skip, limit, cursor, count)
+        if is_not_modified(request, validator):
+            return not_modified(validator)
+        page = await warehouse_service.get_all_warehouses(skip, limit, cursor, count, validator)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    set_validators(response, validator)
+    return page_encoder.response({
+        "warehouses": page.items,
+        "count": page.count,
+        "offset": skip,
+        "limit": limit,
+        "next_cursor": page.next_cursor,
+    }, response)
 
 @router.put("/{warehouse_id}", response_model=WarehouseResponse)
 async def update_warehouse(
     warehouse_id: str,
     warehouse_data: WarehouseUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
     _: dict = Depends(check_permission("warehouse"))
 ):
-    """Update warehouse"""
+    """
+    Update warehouse
+    
+    With an If-Match header the update only applies to the version the
+    client last read (its ETag) and fails with 412 otherwise.
+    """
     warehouse_service = WarehouseService(db)
-    warehouse = await warehouse_service.update_warehouse(warehouse_id, warehouse_data)
+    try:
+        warehouse = await warehouse_service.update_warehouse(warehouse_id, warehouse_data, parse_if_match(if_match))
+    except VersionConflictError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
     if not warehouse:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Warehouse not found")
+    set_etag(response, warehouse)
     return warehouse
 
 @router.delete("/{warehouse_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -16,6 +16,7 @@ class WarehouseResponse(BaseModel):
     location: str
     created_at: datetime
     updated_at: datetime
+    version: int
     
     class Config:
         from_attributes = True
@@ -23,7 +24,8 @@ class WarehouseResponse(BaseModel):
 class PaginationWarehouseResponse(BaseModel):
     """DTO for pagination response"""
     warehouses: List[WarehouseResponse]
-    count: int
+    count: Optional[int] = None
     offset: int
     limit: int
+    next_cursor: Optional[str] = None
     
\ No newline at end of file
@@ -1,8 +1,8 @@
 from sqlalchemy import Column, String, JSON
 from api.database import Base
-from api.models.base import TimestampModel
+from api.models.base import TimestampModel, VersionModel
 
-class Warehouse(Base, TimestampModel):
+class Warehouse(Base, TimestampModel, VersionModel):
     """Warehouse entity model"""
     __tablename__ = "warehouses"
     
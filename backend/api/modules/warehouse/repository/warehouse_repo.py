@@ -1,9 +1,23 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete, func
-from typing import List, Optional
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
 
 from api.modules.warehouse.entity.warehouse_entity import Warehouse
 from api.utils.id_generator import generate_id, Prefix
+from api.utils.pagination import CountMode, count_column, fetch_page, fetch_page_validator
+from api.utils.etag import Validator
+from api.cache import EntityCache
+
+warehouse_cache = EntityCache(Warehouse, "warehouse")
+
+# Columns of warehouse lists, loaded as plain rows instead of entities
+LIST_COLUMNS = (
+    Warehouse.id,
+    Warehouse.location,
+    Warehouse.created_at,
+    Warehouse.updated_at,
+    Warehouse.version,
+)
 
 class WarehouseRepository:
     """Repository for warehouse data access"""
@@ -32,16 +46,54 @@ class WarehouseRepository:
         return warehouse
     
     async def get_by_id(self, warehouse_id: str) -> Optional[Warehouse]:
-        """Get warehouse by ID"""
+        """Get warehouse by ID, served from the entity cache when possible"""
+        return await warehouse_cache.get_or_load(warehouse_id, lambda: self._load_by_id(warehouse_id), db=self.db)
+    
+    async def _load_by_id(self, warehouse_id: str) -> Optional[Warehouse]:
         query = select(Warehouse).where(Warehouse.id == warehouse_id)
         result = await self.db.execute(query)
         return result.scalars().first()
     
-    async def get_all(self, skip: int = 0, limit: int = 100) -> List[Warehouse]:
-        """Get all warehouses with pagination"""
-        query = select(Warehouse).offset(skip).limit(limit)
+    async def get_existing_ids(self, warehouse_ids: Iterable[str]) -> Set[str]:
+        """Return the subset of the given IDs that exist"""
+        query = select(Warehouse.id).where(Warehouse.id.in_(list(warehouse_ids)))
         result = await self.db.execute(query)
+        return set(result.scalars().all())
+    
+    def _page_query(self, skip: int, limit: int, after_id: Optional[str]):
+        """Build the ID-ordered page query, by keyset when `after_id` is given"""
+        query = select(Warehouse).order_by(Warehouse.id)
+        if after_id is not None:
+            query = query.where(Warehouse.id > after_id)
+        else:
+            query = query.offset(skip)
+        return query.limit(limit)
+    
+    async def get_all(self, skip: int = 0, limit: int = 100, after_id: Optional[str] = None) -> List[Warehouse]:
+        """
+        Get all warehouses ordered by ID
+        
+        Pages by keyset (`id > after_id`) when `after_id` is given and falls
+        back to OFFSET otherwise.
+        """
+        result = await self.db.execute(self._page_query(skip, limit, after_id))
         return result.scalars().all()
+    
+    async def get_page(self, skip: int = 0, limit: int = 100, after_id: Optional[str] = None,
+                       count_mode: CountMode = CountMode.EXACT,
+                       validator: Optional[Validator] = None) -> Tuple[List[Sequence], Optional[int]]:
+        """Get a page of warehouse rows (LIST_COLUMNS) and the total count in one round trip"""
+        total = count_column(Warehouse, count_mode)
+        query = self._page_query(skip, limit, after_id).with_only_columns(*LIST_COLUMNS)
+        return await fetch_page(self.db, query, total, validator)
+    
+    async def get_page_validator(self, skip: int = 0, limit: int = 100, after_id: Optional[str] = None,
+                                 count_mode: CountMode = CountMode.EXACT) -> Validator:
+        """Get the ETag and Last-Modified of the page `get_page` would return"""
+        total = count_column(Warehouse, count_mode)
+        return await fetch_page_validator(
+            self.db, self._page_query(skip, limit, after_id), total, count_mode == CountMode.EXACT
+        )
 
     async def count_all(self) -> int:
         """Count all warehouses"""
@@ -49,14 +101,29 @@ class WarehouseRepository:
         result = await self.db.execute(query)
         return result.scalar()
     
-    async def update(self, warehouse_id: str, warehouse_data: dict) -> Optional[Warehouse]:
-        """Update a warehouse"""
-        query = update(Warehouse).where(Warehouse.id == warehouse_id).values(**warehouse_data).returning(Warehouse)
+    async def update(self, warehouse_id: str, warehouse_data: dict,
+                     expected_versions: Optional[List[int]] = None) -> Optional[Warehouse]:
+        """
+        Update a warehouse and bump its version
+        
+        With `expected_versions` only a row at one of those versions is
+        updated, in the same statement; None is returned otherwise.
+        """
+        query = (
+            update(Warehouse)
+            .where(Warehouse.id == warehouse_id)
+            .values(**warehouse_data, version=Warehouse.version + 1)
+            .returning(Warehouse)
+        )
+        if expected_versions is not None:
+            query = query.where(Warehouse.version.in_(expected_versions))
         result = await self.db.execute(query)
+        await warehouse_cache.invalidate(warehouse_id, self.db)
         return result.scalars().first()
     
     async def delete(self, warehouse_id: str) -> bool:
         """Delete a warehouse"""
         query = delete(Warehouse).where(Warehouse.id == warehouse_id)
         result = await self.db.execute(query)
+        await warehouse_cache.invalidate(warehouse_id, self.db)
         return result.rowcount > 0
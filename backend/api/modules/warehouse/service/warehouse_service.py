@@ -1,9 +1,11 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from typing import Iterable, List, Optional, Set
 
 from api.modules.warehouse.repository.warehouse_repo import WarehouseRepository
 from api.modules.warehouse.entity.warehouse_entity import Warehouse
 from api.modules.warehouse.dto.input import WarehouseCreate, WarehouseUpdate
+from api.utils.pagination import CountMode, Page, decode_id_cursor, split_page
+from api.utils.etag import Validator, check_version
 from fastapi import HTTPException
 
 class WarehouseService:
@@ -26,29 +28,53 @@ class WarehouseService:
         """Get warehouse by ID"""
         return await self.repository.get_by_id(warehouse_id)
     
-    async def get_all_warehouses(self, skip: int = 0, limit: int = 100) -> List[Warehouse]:
-        """Get all warehouses"""
-        return await self.repository.get_all(skip, limit)
+    async def get_existing_ids(self, warehouse_ids: Iterable[str]) -> Set[str]:
+        """Return the subset of the given warehouse IDs that exist"""
+        return await self.repository.get_existing_ids(warehouse_ids)
+    
+    async def get_all_warehouses(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                       count_mode: CountMode = CountMode.NONE, validator: Optional[Validator] = None) -> Page:
+        """
+        Get a page of warehouses, the next cursor and, unless disabled, the total count
+        
+        Pass the page's validator to reuse its total instead of counting again.
+        """
+        after_id = decode_id_cursor(cursor)
+        rows, count = await self.repository.get_page(skip, limit + 1, after_id, count_mode, validator)
+        return split_page(rows, limit, count)
+    
+    async def get_warehouses_validator(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                                       count_mode: CountMode = CountMode.NONE) -> Validator:
+        """Get the ETag and Last-Modified of a page of warehouses without loading it"""
+        after_id = decode_id_cursor(cursor)
+        return await self.repository.get_page_validator(skip, limit + 1, after_id, count_mode)
     
     async def count_all_warehouses(self) -> int:
         """Count all warehouses"""
         return await self.repository.count_all()
     
-    async def update_warehouse(self, warehouse_id: str, warehouse_data: WarehouseUpdate) -> Optional[Warehouse]:
-        """Update a warehouse"""
-        # Get existing warehouse
-        existing_warehouse = await self.repository.get_by_id(warehouse_id)
-        if not existing_warehouse:
-            return None
+    async def update_warehouse(self, warehouse_id: str, warehouse_data: WarehouseUpdate,
+                               expected_versions: Optional[List[int]] = None) -> Optional[Warehouse]:
+        """
+        Update a warehouse in one conditional UPDATE
         
+        Raises VersionConflictError when `expected_versions` is given and the
+        warehouse is at another version.
+        """
         # Filter out None values
         update_data = {k: v for k, v in warehouse_data.model_dump().items() if v is not None}
+        if not update_data:
+            existing_warehouse = await self.repository.get_by_id(warehouse_id)
+            check_version(existing_warehouse, expected_versions)
+            return existing_warehouse
         
-        # Perform update
-        if update_data:
-            return await self.repository.update(warehouse_id, update_data)
+        warehouse = await self.repository.update(warehouse_id, update_data, expected_versions)
+        if warehouse or expected_versions is None:
+            return warehouse
         
-        return existing_warehouse
+        # Only the failure path pays for a second query to explain the failure
+        check_version(await self.repository.get_by_id(warehouse_id), expected_versions)
+        return None
     
     async def delete_warehouse(self, warehouse_id: str) -> bool:
         """Delete a warehouse"""
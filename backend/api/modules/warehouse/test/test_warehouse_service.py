@@ -0,0 +1,75 @@
+import asyncio
+import uuid
+
+import pytest
+
+# Pages are read from PostgreSQL (see run_db)
+
+def test_cursor_pages_visit_every_warehouse_once_in_id_order(run_db):
+    from api.database import async_session_factory
+    from api.modules.warehouse.dto.input import WarehouseCreate
+    from api.modules.warehouse.service.warehouse_service import WarehouseService
+    from api.utils.pagination import CountMode
+
+    async def main():
+        run = uuid.uuid4().hex[:8]
+        async with async_session_factory() as session:
+            service = WarehouseService(session)
+            created = [(await service.create_warehouse(WarehouseCreate(location=f"page-{run}-{index}"))).id for index in range(5)]
+            await session.commit()
+
+            seen = []
+            cursor = None
+            while True:
+                page = await service.get_all_warehouses(limit=2, cursor=cursor, count_mode=CountMode.EXACT)
+                seen.extend(warehouse.id for warehouse in page.items)
+                assert page.count is not None and page.count >= 5
+                if page.next_cursor is None:
+                    break
+                # A warehouse created mid-walk makes no row repeat or go missing
+                if len(seen) == 2:
+                    await service.create_warehouse(WarehouseCreate(location=f"page-{run}-late"))
+                    await session.commit()
+                cursor = page.next_cursor
+
+            assert seen == sorted(set(seen))
+            assert set(created) <= set(seen)
+
+            # A cursor the client edited is refused
+            payload, _, signature = cursor.partition(".")
+            with pytest.raises(ValueError):
+                await service.get_all_warehouses(cursor=f"{payload}A.{signature}")
+
+    run_db(main())
+
+def test_list_validator_changes_when_a_row_of_the_page_changes(run_db):
+    from api.database import async_session_factory
+    from api.modules.warehouse.dto.input import WarehouseCreate, WarehouseUpdate
+    from api.modules.warehouse.service.warehouse_service import WarehouseService
+    from api.utils.pagination import CountMode, encode_cursor
+
+    async def main():
+        run = uuid.uuid4().hex[:8]
+        async with async_session_factory() as session:
+            service = WarehouseService(session)
+            warehouse = await service.create_warehouse(WarehouseCreate(location=f"etag-{run}"))
+            await session.commit()
+            # A page starting at the new warehouse
+            warehouse_id = warehouse.id
+            cursor = encode_cursor(warehouse_id[:-1])
+
+            async def validator():
+                return await service.get_warehouses_validator(limit=5, cursor=cursor, count_mode=CountMode.EXACT)
+
+            first = await validator()
+            assert first.etag.startswith('W/"')
+            assert first.rows >= 1 and first.total >= 1
+            assert await validator() == first
+
+            await service.update_warehouse(warehouse_id, WarehouseUpdate(location=f"etag-{run}-moved"))
+            await session.commit()
+            second = await validator()
+            assert second.etag != first.etag
+            assert second.last_modified >= first.last_modified
+
+    run_db(main())
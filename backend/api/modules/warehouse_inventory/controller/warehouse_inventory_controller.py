@@ -1,62 +1,254 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
-from api.database import get_db
+from api.cache import flush_invalidations
+from api.database import async_session_factory, get_db, replica_router
 from api.modules.warehouse_inventory.service.warehouse_inventory_service import WarehouseInventoryService
-from api.modules.warehouse_inventory.dto.input import WarehouseInventoryCreate, WarehouseInventoryUpdate, WarehouseInventoryResponse
+from api.modules.warehouse_inventory.service.inventory_summary_service import InventorySummaryService
+from api.modules.warehouse_inventory.dto.input import WarehouseInventoryCreate, WarehouseInventoryUpdate, WarehouseInventoryResponse, PaginationWarehouseInventoryResponse, BulkImportResponse, AdjustInventoryQuantity, BatchAdjustInventory, InventoryFilter, InventorySortField, SummaryGroupBy, StockSummaryResponse, InventoryTransfer, BatchInventoryTransfer
 from api.middlewares.auth.auth_bearer import get_current_user, check_permission
+from api.utils.pagination import CountMode, SortOrder
+from api.utils.serialization import ResponseEncoder
+from api.utils.streaming import iter_lines, iter_records
+from api.utils.etag import VersionConflictError, entity_validator, is_not_modified, not_modified, parse_if_match, set_etag, set_validators
 
 router = APIRouter()  
 
+page_encoder = ResponseEncoder(PaginationWarehouseInventoryResponse)
+
 @router.post("/", response_model=WarehouseInventoryResponse, status_code=status.HTTP_201_CREATED)
 async def create_warehouse(
     warehouse_data: WarehouseInventoryCreate,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     _: dict = Depends(check_permission("warehouse"))
 ):
     """Create a new warehouse"""
     warehouse_service = WarehouseInventoryService(db)
     warehouse = await warehouse_service.create_inventory(warehouse_data)
+    set_etag(response, warehouse)
     return warehouse
 
+@router.post("/bulk", response_model=BulkImportResponse)
+async def bulk_import_inventory(
+    request: Request,
+    format: Optional[str] = None,
+    _: dict = Depends(check_permission("warehouse"))
+):
+    """
+    Upsert inventory items from a streamed CSV (with header) or NDJSON body
+    
+    The format is taken from the `format` query parameter or the Content-Type
+    header (text/csv, application/x-ndjson).
+    
+    Rows are committed batch by batch, not as one transaction: if the import
+    fails part way, the batches before the failure stay imported. Rows are
+    upserted, so re-sending the whole upload is safe.
+    """
+    content_type = request.headers.get("content-type", "")
+    if format is None:
+        if "csv" in content_type:
+            format = "csv"
+        elif "ndjson" in content_type or "jsonl" in content_type:
+            format = "ndjson"
+    if format not in ("csv", "ndjson"):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Body must be CSV (text/csv) or NDJSON (application/x-ndjson)"
+        )
+    
+    records = iter_records(iter_lines(request.stream()), format)
+    # The import commits as it goes, so it runs in a session of its own
+    # instead of the request's unit of work from get_db
+    try:
+        async with async_session_factory() as session:
+            try:
+                return await WarehouseInventoryService(session).bulk_import(records)
+            except Exception:
+                await session.rollback()
+                await flush_invalidations(session)
+                raise
+    finally:
+        await replica_router.record_write(request)
+
+@router.post("/adjust", response_model=List[WarehouseInventoryResponse])
+async def adjust_inventory_quantities(
+    adjustment_data: BatchAdjustInventory,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(check_permission("warehouse"))
+):
+    """Add quantity deltas to many inventory items atomically"""
+    warehouse_service = WarehouseInventoryService(db)
+    try:
+        return await warehouse_service.adjust_quantities(adjustment_data.adjustments)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.get("/summary", response_model=StockSummaryResponse)
+async def get_stock_summary(
+    group_by: SummaryGroupBy = SummaryGroupBy.SKU,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    sku_prefix: Optional[str] = Query(None, min_length=1, max_length=100),
+    warehouse_id: Optional[str] = None,
+    live: bool = False,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(get_current_user)
+):
+    """
+    Get total stock in base units (quantity times unit conversion factor)
+    per SKU across warehouses, or per warehouse across SKUs
+    
+    Totals come from summary tables kept current in the same transaction as
+    every inventory write; `live=true` recomputes them from the inventory
+    instead, which scans it and is meant for small catalogs and checks.
+    """
+    summary_service = InventorySummaryService(db)
+    try:
+        page = await summary_service.get_summary(group_by, limit, cursor, sku_prefix, warehouse_id, live)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return StockSummaryResponse(group_by=group_by, items=page.items, next_cursor=page.next_cursor)
+
+@router.post("/transfers", response_model=List[WarehouseInventoryResponse])
+async def transfer_inventory(
+    transfer_data: InventoryTransfer,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(check_permission("warehouse"))
+):
+    """Move stock of a SKU from one warehouse to another atomically"""
+    warehouse_service = WarehouseInventoryService(db)
+    try:
+        return await warehouse_service.transfer_stock([transfer_data])
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.post("/transfers/batch", response_model=List[WarehouseInventoryResponse])
+async def transfer_inventory_batch(
+    transfer_data: BatchInventoryTransfer,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(check_permission("warehouse"))
+):
+    """Apply many stock transfers in one transaction, all or nothing"""
+    warehouse_service = WarehouseInventoryService(db)
+    try:
+        return await warehouse_service.transfer_stock(transfer_data.transfers)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.post("/{inventory_id}/adjust", response_model=WarehouseInventoryResponse)
+async def adjust_inventory_quantity(
+    inventory_id: str,
+    adjustment_data: AdjustInventoryQuantity,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(check_permission("warehouse"))
+):
+    """Add a quantity delta (positive or negative) to an inventory item"""
+    warehouse_service = WarehouseInventoryService(db)
+    try:
+        inventory = await warehouse_service.adjust_quantity(inventory_id, adjustment_data.quantity)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not inventory:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Inventory not found")
+    return inventory
+
 @router.get("/{warehouse_id}", response_model=WarehouseInventoryResponse)
 async def get_warehouse(
     warehouse_id: str,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     _: dict = Depends(get_current_user)
 ):
     """Get warehouse by ID"""
     warehouse_service = WarehouseInventoryService(db)
-    warehouse = await warehouse_service.get_by_id(warehouse_id)
+    warehouse = await warehouse_service.get_inventory_by_id(warehouse_id)
     if not warehouse:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Warehouse not found")
+    validator = entity_validator(warehouse)
+    if is_not_modified(request, validator):
+        return not_modified(validator)
+    set_validators(response, validator)
     return warehouse
 
-@router.get("/", response_model=List[WarehouseInventoryResponse])
+@router.get("/", response_model=PaginationWarehouseInventoryResponse)
 async def get_all_warehouses(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.ESTIMATE,
+    warehouse_id: Optional[str] = None,
+    sku_prefix: Optional[str] = Query(None, min_length=1, max_length=100),
+    sku_contains: Optional[str] = Query(None, min_length=3, max_length=100),
+    unit_id: Optional[str] = None,
+    min_quantity: Optional[float] = None,
+    max_quantity: Optional[float] = None,
+    sort: InventorySortField = InventorySortField.ID,
+    order: SortOrder = SortOrder.ASC,
     db: AsyncSession = Depends(get_db),
     _: dict = Depends(get_current_user)
 ):
-    """Get all warehouses"""
+    """
+    Search inventory items, paged by `cursor` (preferred) or `skip`
+    
+    Filters combine with AND; `sku_contains` is case-insensitive and needs at
+    least 3 characters. `count` selects how the total is computed: exact,
+    estimate or none; filtered totals are always exact, so pass `none` for
+    the fastest search. If-None-Match / If-Modified-Since get a 304
+    without loading the page.
+    """
+    filters = InventoryFilter(
+        warehouse_id=warehouse_id,
+        sku_prefix=sku_prefix,
+        sku_contains=sku_contains,
+        unit_id=unit_id,
+        min_quantity=min_quantity,
+        max_quantity=max_quantity
+    )
     warehouse_service = WarehouseInventoryService(db)
-    warehouses = await warehouse_service.get_all_inventory(skip, limit)
-    return warehouses
+    try:
+        validator = await warehouse_service.get_inventory_validator(skip, limit, cursor, count, filters, sort, order)
+        if is_not_modified(request, validator):
+            return not_modified(validator)
+        page = await warehouse_service.get_all_inventory(skip, limit, cursor, count, filters, sort, order, validator)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    set_validators(response, validator)
+    return page_encoder.response({
+        "inventory": page.items,
+        "count": page.count,
+        "offset": skip,
+        "limit": limit,
+        "next_cursor": page.next_cursor,
+    }, response)
 
 @router.put("/{warehouse_id}", response_model=WarehouseInventoryResponse)
 async def update_warehouse(
     warehouse_id: str,
     warehouse_data: WarehouseInventoryUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
     _: dict = Depends(check_permission("warehouse"))
 ):
-    """Update warehouse"""
+    """
+    Update warehouse
+    
+    With an If-Match header the update only applies to the version the
+    client last read (its ETag) and fails with 412 otherwise.
+    """
     warehouse_service = WarehouseInventoryService(db)
-    warehouse = await warehouse_service.update_inventory(warehouse_id, warehouse_data)
+    try:
+        warehouse = await warehouse_service.update_inventory(warehouse_id, warehouse_data, parse_if_match(if_match))
+    except VersionConflictError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
     if not warehouse:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Warehouse not found")
+    set_etag(response, warehouse)
     return warehouse
 
 @router.delete("/{warehouse_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
+from enum import Enum
 
 class WarehouseInventoryCreate(BaseModel):
     """DTO for creating a new warehouse inventory item"""
@@ -24,11 +25,89 @@ class WarehouseInventoryResponse(BaseModel):
     unit_id: str
     created_at: datetime
     updated_at: datetime
+    version: int
     
     class Config:
         from_attributes = True
 
+class PaginationWarehouseInventoryResponse(BaseModel):
+    """DTO for pagination response"""
+    inventory: List[WarehouseInventoryResponse]
+    count: Optional[int] = None
+    offset: int
+    limit: int
+    next_cursor: Optional[str] = None
+
+class InventorySortField(str, Enum):
+    """Sortable inventory columns"""
+    ID = "id"
+    SKU = "sku"
+    QUANTITY = "quantity"
+
+class InventoryFilter(BaseModel):
+    """DTO for inventory search filters"""
+    warehouse_id: Optional[str] = None
+    sku_prefix: Optional[str] = Field(None, min_length=1, max_length=100)
+    sku_contains: Optional[str] = Field(None, min_length=3, max_length=100)
+    unit_id: Optional[str] = None
+    min_quantity: Optional[float] = None
+    max_quantity: Optional[float] = None
+
+class SummaryGroupBy(str, Enum):
+    """Grouping of stock totals"""
+    SKU = "sku"
+    WAREHOUSE = "warehouse"
+
+class StockSummaryItem(BaseModel):
+    """DTO for the stock total of a SKU or a warehouse, in base units"""
+    sku: Optional[str] = None
+    warehouse_id: Optional[str] = None
+    base_quantity: float
+    warehouse_count: Optional[int] = None
+    sku_count: Optional[int] = None
+    
+    class Config:
+        from_attributes = True
+
+class StockSummaryResponse(BaseModel):
+    """DTO for stock summary response"""
+    group_by: SummaryGroupBy
+    items: List[StockSummaryItem]
+    next_cursor: Optional[str] = None
+
 class AdjustInventoryQuantity(BaseModel):
     """DTO for adjusting inventory quantity"""
     quantity: int
-    
\ No newline at end of file
+
+class InventoryAdjustment(BaseModel):
+    """DTO for one quantity delta of a batch adjustment"""
+    inventory_id: str
+    quantity: int
+
+class BatchAdjustInventory(BaseModel):
+    """DTO for adjusting many inventory quantities at once"""
+    adjustments: List[InventoryAdjustment] = Field(..., min_length=1)
+
+class InventoryTransfer(BaseModel):
+    """DTO for moving stock of a SKU between warehouses"""
+    source_warehouse_id: str
+    destination_warehouse_id: str
+    sku: str = Field(..., min_length=1, max_length=100)
+    quantity: int = Field(..., gt=0)
+
+class BatchInventoryTransfer(BaseModel):
+    """DTO for many stock transfers applied atomically"""
+    transfers: List[InventoryTransfer] = Field(..., min_length=1)
+
+class BulkImportRowError(BaseModel):
+    """DTO for a rejected row of a bulk import"""
+    row: int
+    error: str
+
+class BulkImportResponse(BaseModel):
+    """DTO for bulk import report (batches are committed one by one)"""
+    processed: int
+    upserted: int
+    failed: int
+    errors: List[BulkImportRowError]
+    errors_truncated: bool = False
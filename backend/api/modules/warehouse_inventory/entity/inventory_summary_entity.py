@@ -0,0 +1,209 @@
+from sqlalchemy import Column, String, Integer, Float, BigInteger, DateTime, Identity, Index, DDL, event
+from datetime import datetime
+
+from api.database import Base
+from api.utils.ddl import create_trigger_if_missing
+
+class InventorySkuSummary(Base):
+    """
+    Stock of a SKU across all warehouses, in base units, as of the last fold
+    
+    Pending changes are in InventorySkuSummaryDelta; the current total is
+    the row plus the SKU's deltas.
+    """
+    __tablename__ = "inventory_sku_summary"
+
+    sku = Column(String, primary_key=True)
+    base_quantity = Column(Float, nullable=False, default=0)
+    # Warehouses stocking the SKU; rows at zero are kept and filtered on read
+    warehouse_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<InventorySkuSummary {self.sku}: {self.base_quantity}>"
+
+class InventorySkuSummaryDelta(Base):
+    """
+    Append-only change to a SKU's summary, folded into it periodically
+    
+    Updating the summary row instead would lock it until the writer
+    commits, after the inventory rows the writer locked before; a writer
+    that inserts rows and then updates others would take the two kinds of
+    lock out of order.
+    """
+    __tablename__ = "inventory_sku_summary_deltas"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    sku = Column(String, nullable=False)
+    base_quantity = Column(Float, nullable=False)
+    warehouse_count = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index('ix_inventory_sku_summary_deltas_sku', 'sku'),
+    )
+
+    def __repr__(self):
+        return f"<InventorySkuSummaryDelta {self.sku}: {self.base_quantity:+}>"
+
+class InventoryWarehouseSummary(Base):
+    """
+    Stock of a warehouse across all SKUs, in base units, as of the last fold
+    
+    Pending changes are in InventoryWarehouseSummaryDelta; the current total
+    is the row plus the warehouse's deltas.
+    """
+    __tablename__ = "inventory_warehouse_summary"
+
+    warehouse_id = Column(String, primary_key=True)
+    base_quantity = Column(Float, nullable=False, default=0)
+    sku_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<InventoryWarehouseSummary {self.warehouse_id}: {self.base_quantity}>"
+
+class InventoryWarehouseSummaryDelta(Base):
+    """
+    Append-only change to a warehouse's summary, folded into it periodically
+    
+    Every write to a warehouse's inventory would otherwise update the same
+    summary row, serializing the warehouse's writers on its lock.
+    """
+    __tablename__ = "inventory_warehouse_summary_deltas"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    warehouse_id = Column(String, nullable=False)
+    base_quantity = Column(Float, nullable=False)
+    sku_count = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index('ix_inventory_warehouse_summary_deltas_warehouse', 'warehouse_id'),
+    )
+
+    def __repr__(self):
+        return f"<InventoryWarehouseSummaryDelta {self.warehouse_id}: {self.base_quantity:+}>"
+
+# The summaries are maintained by triggers on warehouse_inventory, so every
+# write path (ORM, bulk upsert, batch adjust, cascaded warehouse deletes)
+# updates them in its own transaction. Statement-level triggers with
+# transition tables aggregate a whole statement's rows into one insert of
+# SKU deltas and one of warehouse deltas, which take no row locks: many
+# writers share a warehouse or a SKU, and a writer's only row locks stay
+# those of the inventory rows, taken in the order it chose.
+
+_INSERT_CHANGES = """
+    SELECT n.warehouse_id, n.sku, n.quantity * u.quantity AS base, 1 AS items
+    FROM new_rows n JOIN item_units u ON u.id = n.unit_id
+"""
+
+_DELETE_CHANGES = """
+    SELECT o.warehouse_id, o.sku, -(o.quantity * u.quantity) AS base, -1 AS items
+    FROM old_rows o JOIN item_units u ON u.id = o.unit_id
+"""
+
+# Rows whose stock-relevant columns did not change contribute nothing
+_UPDATE_CHANGES = """
+    WITH changed AS (
+        SELECT n.id FROM new_rows n JOIN old_rows o ON o.id = n.id
+        WHERE (n.warehouse_id, n.sku, n.quantity, n.unit_id)
+            IS DISTINCT FROM (o.warehouse_id, o.sku, o.quantity, o.unit_id)
+    )
+    SELECT n.warehouse_id, n.sku, n.quantity * u.quantity AS base, 1 AS items
+    FROM new_rows n JOIN changed c ON c.id = n.id JOIN item_units u ON u.id = n.unit_id
+    UNION ALL
+    SELECT o.warehouse_id, o.sku, -(o.quantity * u.quantity) AS base, -1 AS items
+    FROM old_rows o JOIN changed c ON c.id = o.id JOIN item_units u ON u.id = o.unit_id
+"""
+
+def _apply_changes(changes: str) -> str:
+    return f"""
+        WITH changes AS ({changes}),
+        sku_deltas AS (
+            INSERT INTO inventory_sku_summary_deltas (sku, base_quantity, warehouse_count)
+            SELECT sku, sum(base), sum(items) FROM changes
+            GROUP BY sku
+        )
+        INSERT INTO inventory_warehouse_summary_deltas (warehouse_id, base_quantity, sku_count)
+        SELECT warehouse_id, sum(base), sum(items) FROM changes
+        GROUP BY warehouse_id;
+    """
+
+_SUMMARY_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION inventory_summary_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        {_apply_changes(_INSERT_CHANGES)}
+    ELSIF TG_OP = 'UPDATE' THEN
+        {_apply_changes(_UPDATE_CHANGES)}
+    ELSE
+        {_apply_changes(_DELETE_CHANGES)}
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+# A changed conversion factor rescales the stock of every row in that unit
+_UNIT_FACTOR_FUNCTION = """
+CREATE OR REPLACE FUNCTION inventory_summary_unit_factor() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO inventory_sku_summary_deltas (sku, base_quantity, warehouse_count)
+    SELECT sku, sum(quantity) * (NEW.quantity - OLD.quantity), 0
+    FROM warehouse_inventory WHERE unit_id = NEW.id GROUP BY sku;
+    INSERT INTO inventory_warehouse_summary_deltas (warehouse_id, base_quantity, sku_count)
+    SELECT warehouse_id, sum(quantity) * (NEW.quantity - OLD.quantity), 0
+    FROM warehouse_inventory WHERE unit_id = NEW.id GROUP BY warehouse_id;
+    RETURN NULL;
+END;
+$$
+"""
+
+_TRIGGERS = [
+    create_trigger_if_missing(
+        "inventory_summary_insert",
+        "AFTER INSERT ON warehouse_inventory REFERENCING NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION inventory_summary_apply()"
+    ),
+    create_trigger_if_missing(
+        "inventory_summary_update",
+        "AFTER UPDATE ON warehouse_inventory REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION inventory_summary_apply()"
+    ),
+    create_trigger_if_missing(
+        "inventory_summary_delete",
+        "AFTER DELETE ON warehouse_inventory REFERENCING OLD TABLE AS old_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION inventory_summary_apply()"
+    ),
+    create_trigger_if_missing(
+        "inventory_summary_unit_factor",
+        "AFTER UPDATE OF quantity ON item_units FOR EACH ROW "
+        "WHEN (OLD.quantity IS DISTINCT FROM NEW.quantity) "
+        "EXECUTE FUNCTION inventory_summary_unit_factor()"
+    ),
+]
+
+# Fill empty summaries from existing inventory, e.g. on first deploy. Runs in
+# the transaction that created the triggers, which blocks concurrent writes.
+_BACKFILL = [
+    """
+INSERT INTO inventory_sku_summary (sku, base_quantity, warehouse_count, updated_at)
+SELECT i.sku, sum(i.quantity * u.quantity), count(*), now() AT TIME ZONE 'utc'
+FROM warehouse_inventory i JOIN item_units u ON u.id = i.unit_id
+WHERE NOT EXISTS (SELECT 1 FROM inventory_sku_summary)
+    AND NOT EXISTS (SELECT 1 FROM inventory_sku_summary_deltas)
+GROUP BY i.sku
+""",
+    """
+INSERT INTO inventory_warehouse_summary (warehouse_id, base_quantity, sku_count, updated_at)
+SELECT i.warehouse_id, sum(i.quantity * u.quantity), count(*), now() AT TIME ZONE 'utc'
+FROM warehouse_inventory i JOIN item_units u ON u.id = i.unit_id
+WHERE NOT EXISTS (SELECT 1 FROM inventory_warehouse_summary)
+    AND NOT EXISTS (SELECT 1 FROM inventory_warehouse_summary_deltas)
+GROUP BY i.warehouse_id
+""",
+]
+
+for statement in [_SUMMARY_FUNCTION, _UNIT_FACTOR_FUNCTION, *_TRIGGERS, *_BACKFILL]:
+    event.listen(Base.metadata, "after_create", DDL(statement))
@@ -1,9 +1,9 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Float, UniqueConstraint
+from sqlalchemy import Column, String, Integer, ForeignKey, Float, UniqueConstraint, Index, DDL, event
 from sqlalchemy.orm import relationship
 from api.database import Base
-from api.models.base import TimestampModel
+from api.models.base import TimestampModel, VersionModel
 
-class WarehouseInventory(Base, TimestampModel):
+class WarehouseInventory(Base, TimestampModel, VersionModel):
     """Warehouse inventory entity model"""
     __tablename__ = "warehouse_inventory"
     
@@ -17,10 +17,21 @@ class WarehouseInventory(Base, TimestampModel):
     warehouse = relationship("Warehouse")
     unit = relationship("ItemUnit")
     
-    # Make sku unique per warehouse
+    # Make sku unique per warehouse; the other indexes back inventory search
     __table_args__ = (
         UniqueConstraint('warehouse_id', 'sku', name='uix_warehouse_sku'),
+        # SKU prefix search (LIKE 'abc%') regardless of the database collation
+        Index('ix_warehouse_inventory_sku_pattern', 'sku', postgresql_ops={'sku': 'text_pattern_ops'}),
+        # SKU substring search (ILIKE '%abc%')
+        Index('ix_warehouse_inventory_sku_trgm', 'sku', postgresql_using='gin', postgresql_ops={'sku': 'gin_trgm_ops'}),
+        Index('ix_warehouse_inventory_unit_id', 'unit_id'),
+        # Quantity ranges and quantity ordering within a warehouse
+        Index('ix_warehouse_inventory_warehouse_quantity', 'warehouse_id', 'quantity', 'id'),
     )
     
     def __repr__(self):
         return f"<WarehouseInventory {self.warehouse_id}: {self.sku} - {self.quantity}>"
+
+# The trigram index needs pg_trgm; runs on every create_all so existing
+# databases get the extension before missing indexes are added
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
@@ -0,0 +1,162 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func, literal, union_all
+from sqlalchemy.dialects.postgresql import insert
+from typing import List, Optional
+from datetime import datetime
+
+from api.database import SUMMARY_FOLD_LOCK_KEY
+from api.modules.warehouse_inventory.entity.inventory_summary_entity import (
+    InventorySkuSummary, InventorySkuSummaryDelta, InventoryWarehouseSummary, InventoryWarehouseSummaryDelta
+)
+from api.modules.warehouse_inventory.entity.warehouse_inventory_entity import WarehouseInventory
+from api.modules.item_unit.entity.item_unit_entity import ItemUnit
+
+class InventorySummaryRepository:
+    """
+    Repository for stock totals in base units
+    
+    Totals are read from the trigger-maintained summary tables, or computed
+    live from warehouse_inventory joined to item_units when `live` is set.
+    Summary totals add the deltas not folded into their row yet.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_sku_totals(self, limit: int = 100, after_sku: Optional[str] = None,
+                             sku_prefix: Optional[str] = None, live: bool = False) -> List:
+        """Get per-SKU totals in SKU order; rows carry sku, base_quantity and warehouse_count"""
+        if live:
+            query = (
+                select(
+                    WarehouseInventory.sku,
+                    func.sum(WarehouseInventory.quantity * ItemUnit.quantity).label("base_quantity"),
+                    func.count().label("warehouse_count")
+                )
+                .join(ItemUnit, ItemUnit.id == WarehouseInventory.unit_id)
+                .group_by(WarehouseInventory.sku)
+            )
+            sku = WarehouseInventory.sku
+            if sku_prefix is not None:
+                query = query.where(sku.startswith(sku_prefix, autoescape=True))
+            if after_sku is not None:
+                query = query.where(sku > after_sku)
+        else:
+            parts = []
+            for table in (InventorySkuSummary, InventorySkuSummaryDelta):
+                part = select(table.sku, table.base_quantity, table.warehouse_count)
+                if sku_prefix is not None:
+                    part = part.where(table.sku.startswith(sku_prefix, autoescape=True))
+                if after_sku is not None:
+                    part = part.where(table.sku > after_sku)
+                parts.append(part)
+            totals = union_all(*parts).subquery()
+            warehouse_count = func.sum(totals.c.warehouse_count)
+            query = (
+                select(
+                    totals.c.sku,
+                    func.sum(totals.c.base_quantity).label("base_quantity"),
+                    warehouse_count.label("warehouse_count")
+                )
+                .group_by(totals.c.sku)
+                .having(warehouse_count > 0)
+            )
+            sku = totals.c.sku
+        
+        result = await self.db.execute(query.order_by(sku).limit(limit))
+        return result.all()
+    
+    async def get_warehouse_totals(self, limit: int = 100, after_warehouse_id: Optional[str] = None,
+                                   warehouse_id: Optional[str] = None, live: bool = False) -> List:
+        """Get per-warehouse totals in warehouse order; rows carry warehouse_id, base_quantity and sku_count"""
+        if live:
+            query = (
+                select(
+                    WarehouseInventory.warehouse_id,
+                    func.sum(WarehouseInventory.quantity * ItemUnit.quantity).label("base_quantity"),
+                    func.count().label("sku_count")
+                )
+                .join(ItemUnit, ItemUnit.id == WarehouseInventory.unit_id)
+                .group_by(WarehouseInventory.warehouse_id)
+            )
+            key = WarehouseInventory.warehouse_id
+            if warehouse_id is not None:
+                query = query.where(key == warehouse_id)
+            if after_warehouse_id is not None:
+                query = query.where(key > after_warehouse_id)
+        else:
+            parts = []
+            for table in (InventoryWarehouseSummary, InventoryWarehouseSummaryDelta):
+                part = select(table.warehouse_id, table.base_quantity, table.sku_count)
+                if warehouse_id is not None:
+                    part = part.where(table.warehouse_id == warehouse_id)
+                if after_warehouse_id is not None:
+                    part = part.where(table.warehouse_id > after_warehouse_id)
+                parts.append(part)
+            totals = union_all(*parts).subquery()
+            sku_count = func.sum(totals.c.sku_count)
+            query = (
+                select(
+                    totals.c.warehouse_id,
+                    func.sum(totals.c.base_quantity).label("base_quantity"),
+                    sku_count.label("sku_count")
+                )
+                .group_by(totals.c.warehouse_id)
+                .having(sku_count > 0)
+            )
+            key = totals.c.warehouse_id
+        
+        result = await self.db.execute(query.order_by(key).limit(limit))
+        return result.all()
+    
+    async def try_lock_fold(self) -> bool:
+        """Take the fold lock until the transaction ends, returns False when another fold holds it"""
+        return await self.db.scalar(select(func.pg_try_advisory_xact_lock(SUMMARY_FOLD_LOCK_KEY)))
+    
+    async def fold_deltas(self) -> int:
+        """
+        Move pending SKU and warehouse deltas into their summary rows
+        
+        Returns:
+            Number of summaries updated
+        """
+        folded = await self._fold(InventorySkuSummaryDelta, InventorySkuSummary, "sku", "warehouse_count")
+        return folded + await self._fold(
+            InventoryWarehouseSummaryDelta, InventoryWarehouseSummary, "warehouse_id", "sku_count"
+        )
+    
+    async def _fold(self, delta, summary, key: str, count: str) -> int:
+        """
+        Fold one kind of delta in one statement
+        
+        The deltas are deleted and added to their summary row together, so
+        reads see each change exactly once. Rows are updated in key order,
+        so concurrent folds wait for each other instead of deadlocking.
+        """
+        folded = (
+            delete(delta)
+            .returning(getattr(delta, key), delta.base_quantity, getattr(delta, count))
+            .cte("folded")
+        )
+        totals = (
+            select(
+                folded.c[key],
+                func.sum(folded.c.base_quantity),
+                func.sum(folded.c[count]),
+                literal(datetime.utcnow())
+            )
+            .group_by(folded.c[key])
+            .order_by(folded.c[key])
+        )
+        table = summary.__table__
+        query = insert(table).from_select([key, "base_quantity", count, "updated_at"], totals)
+        query = query.on_conflict_do_update(
+            index_elements=[table.c[key]],
+            set_={
+                "base_quantity": table.c.base_quantity + query.excluded.base_quantity,
+                count: table.c[count] + query.excluded[count],
+                "updated_at": query.excluded.updated_at,
+            },
+        )
+        result = await self.db.execute(query)
+        return result.rowcount
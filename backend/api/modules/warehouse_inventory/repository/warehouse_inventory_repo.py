@@ -1,9 +1,49 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
-from typing import List, Optional
+from sqlalchemy import select, update, delete, values, column, func, literal, bindparam, tuple_, and_, String, Float
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from datetime import datetime
 
 from api.modules.warehouse_inventory.entity.warehouse_inventory_entity import WarehouseInventory
+from api.modules.item_unit.entity.item_unit_entity import ItemUnit
 from api.utils.id_generator import generate_id, Prefix
+from api.utils.pagination import CountMode, count_column, fetch_page, fetch_page_validator
+from api.utils.etag import Validator
+
+# Columns written by inventory exports, in output order
+EXPORT_COLUMNS = (
+    WarehouseInventory.id,
+    WarehouseInventory.warehouse_id,
+    WarehouseInventory.sku,
+    WarehouseInventory.quantity,
+    WarehouseInventory.unit_id,
+    WarehouseInventory.created_at,
+    WarehouseInventory.updated_at,
+)
+
+# Columns of inventory lists, loaded as plain rows instead of entities
+LIST_COLUMNS = (
+    WarehouseInventory.id,
+    WarehouseInventory.warehouse_id,
+    WarehouseInventory.sku,
+    WarehouseInventory.quantity,
+    WarehouseInventory.unit_id,
+    WarehouseInventory.created_at,
+    WarehouseInventory.updated_at,
+    WarehouseInventory.version,
+)
+
+# Columns inventory lists can be sorted by
+SORT_COLUMNS = {
+    "id": WarehouseInventory.id,
+    "sku": WarehouseInventory.sku,
+    "quantity": WarehouseInventory.quantity,
+}
+
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards so user input matches literally"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
 class WarehouseInventoryRepository:
     """Repository for warehouse inventory data access"""
@@ -25,6 +65,57 @@ class WarehouseInventoryRepository:
         
         return inventory
     
+    async def bulk_upsert(self, rows: List[dict]) -> int:
+        """
+        Insert or update many inventory items in one statement
+        
+        The rows are sent as one array per column and expanded with unnest,
+        so a batch is a single INSERT ... SELECT whatever its size: the
+        statement-level triggers fire once and the bind parameter limit does
+        not apply. Rows that collide on (warehouse_id, sku) overwrite the
+        stored quantity and unit. The caller must not pass the same
+        (warehouse_id, sku) twice. Rows are written in (warehouse_id, sku)
+        order, the order other multi-row writers lock in.
+        """
+        if not rows:
+            return 0
+        
+        rows = sorted(rows, key=lambda row: (row["warehouse_id"], row["sku"]))
+        now = datetime.utcnow()
+        source = func.unnest(
+            bindparam("ids", [generate_id(Prefix.WAREHOUSE_INVENTORY) for _ in rows], type_=ARRAY(String)),
+            bindparam("warehouse_ids", [row["warehouse_id"] for row in rows], type_=ARRAY(String)),
+            bindparam("skus", [row["sku"] for row in rows], type_=ARRAY(String)),
+            bindparam("quantities", [float(row["quantity"]) for row in rows], type_=ARRAY(Float)),
+            bindparam("unit_ids", [row["unit_id"] for row in rows], type_=ARRAY(String)),
+        ).table_valued(
+            column("id", String), column("warehouse_id", String), column("sku", String),
+            column("quantity", Float), column("unit_id", String), name="batch"
+        ).render_derived()
+        batch = (
+            select(
+                source.c.id, source.c.warehouse_id, source.c.sku, source.c.quantity,
+                source.c.unit_id, literal(now), literal(now)
+            )
+            .order_by(source.c.warehouse_id, source.c.sku)
+        )
+        
+        table = WarehouseInventory.__table__
+        query = insert(table).from_select(
+            ["id", "warehouse_id", "sku", "quantity", "unit_id", "created_at", "updated_at"], batch
+        )
+        query = query.on_conflict_do_update(
+            constraint="uix_warehouse_sku",
+            set_={
+                "quantity": query.excluded.quantity,
+                "unit_id": query.excluded.unit_id,
+                "updated_at": query.excluded.updated_at,
+                "version": table.c.version + 1,
+            },
+        )
+        await self.db.execute(query)
+        return len(rows)
+    
     async def get_by_id(self, inventory_id: str) -> Optional[WarehouseInventory]:
         """Get inventory item by ID"""
         query = select(WarehouseInventory).where(WarehouseInventory.id == inventory_id)
@@ -46,18 +137,296 @@ class WarehouseInventoryRepository:
         result = await self.db.execute(query)
         return result.scalars().all()
     
-    async def get_all(self, skip: int = 0, limit: int = 100) -> List[WarehouseInventory]:
-        """Get all inventory items with pagination"""
-        query = select(WarehouseInventory).offset(skip).limit(limit)
+    async def stream_by_warehouse(self, warehouse_id: str, chunk_size: int) -> AsyncIterator[Sequence]:
+        """
+        Stream a warehouse's inventory from a server-side cursor in SKU order
+        
+        Yields batches of at most `chunk_size` column mappings; no ORM objects
+        are built and only one batch is held in memory at a time.
+        """
+        query = (
+            select(*EXPORT_COLUMNS)
+            .where(WarehouseInventory.warehouse_id == warehouse_id)
+            .order_by(WarehouseInventory.sku)
+            .execution_options(yield_per=chunk_size)
+        )
+        result = await self.db.stream(query)
+        try:
+            async for partition in result.mappings().partitions():
+                yield partition
+        finally:
+            # Also runs when the consumer goes away, releasing the cursor early
+            await result.close()
+    
+    async def count_by_warehouse(self, warehouse_id: str) -> int:
+        """Count inventory items of a warehouse"""
+        query = select(func.count()).select_from(WarehouseInventory).where(WarehouseInventory.warehouse_id == warehouse_id)
         result = await self.db.execute(query)
+        return result.scalar()
+    
+    async def get_ids_by_warehouse(self, warehouse_id: str, after_id: Optional[str] = None, limit: int = 1000) -> List[str]:
+        """Get the next batch of inventory IDs of a warehouse in ID order"""
+        query = select(WarehouseInventory.id).where(WarehouseInventory.warehouse_id == warehouse_id)
+        if after_id is not None:
+            query = query.where(WarehouseInventory.id > after_id)
+        result = await self.db.execute(query.order_by(WarehouseInventory.id).limit(limit))
         return result.scalars().all()
     
-    async def update(self, inventory_id: str, inventory_data: dict) -> Optional[WarehouseInventory]:
-        """Update an inventory item"""
-        query = update(WarehouseInventory).where(WarehouseInventory.id == inventory_id).values(**inventory_data).returning(WarehouseInventory)
+    async def get_stock_batch(self, warehouse_id: str, after_id: Optional[str] = None, limit: int = 1000):
+        """
+        Get the next batch of a warehouse's inventory in ID order
+        
+        Rows carry id, sku, quantity and the conversion factor of their unit.
+        """
+        query = (
+            select(
+                WarehouseInventory.id,
+                WarehouseInventory.sku,
+                WarehouseInventory.quantity,
+                ItemUnit.quantity.label("unit_factor")
+            )
+            .join(ItemUnit, ItemUnit.id == WarehouseInventory.unit_id)
+            .where(WarehouseInventory.warehouse_id == warehouse_id)
+        )
+        if after_id is not None:
+            query = query.where(WarehouseInventory.id > after_id)
+        result = await self.db.execute(query.order_by(WarehouseInventory.id).limit(limit))
+        return result.all()
+    
+    async def delete_by_ids(self, inventory_ids: List[str]) -> int:
+        """Delete many inventory items"""
+        query = delete(WarehouseInventory).where(WarehouseInventory.id.in_(inventory_ids))
+        result = await self.db.execute(query)
+        return result.rowcount
+    
+    def _page_query(self, skip: int, limit: int, after_id: Optional[str]):
+        """Build the ID-ordered page query, by keyset when `after_id` is given"""
+        query = select(WarehouseInventory).order_by(WarehouseInventory.id)
+        if after_id is not None:
+            query = query.where(WarehouseInventory.id > after_id)
+        else:
+            query = query.offset(skip)
+        return query.limit(limit)
+    
+    def _search_criteria(self, filters: Dict[str, Any]) -> list:
+        """Translate search filters into WHERE criteria"""
+        criteria = []
+        if filters.get("warehouse_id") is not None:
+            criteria.append(WarehouseInventory.warehouse_id == filters["warehouse_id"])
+        if filters.get("unit_id") is not None:
+            criteria.append(WarehouseInventory.unit_id == filters["unit_id"])
+        if filters.get("sku_prefix") is not None:
+            # Plain LIKE with a literal prefix so the planner can use the pattern index
+            criteria.append(WarehouseInventory.sku.like(_escape_like(filters["sku_prefix"]) + "%"))
+        if filters.get("sku_contains") is not None:
+            criteria.append(WarehouseInventory.sku.ilike("%" + _escape_like(filters["sku_contains"]) + "%"))
+        if filters.get("min_quantity") is not None:
+            criteria.append(WarehouseInventory.quantity >= filters["min_quantity"])
+        if filters.get("max_quantity") is not None:
+            criteria.append(WarehouseInventory.quantity <= filters["max_quantity"])
+        return criteria
+    
+    def _search_query(self, criteria: list, sort: str, descending: bool, skip: int, limit: int,
+                      after: Optional[Sequence[Any]]):
+        """
+        Build a filtered, sorted page query
+        
+        Rows are ordered by the sort column and then by ID, so the order is
+        total and a page can resume after `after`, the sort key of the last
+        row seen: (id,) when sorting by ID, (value, id) otherwise.
+        """
+        sort_column = SORT_COLUMNS[sort]
+        if sort == "id":
+            order_by = [WarehouseInventory.id.desc() if descending else WarehouseInventory.id]
+            key = WarehouseInventory.id
+        else:
+            order_by = [sort_column.desc(), WarehouseInventory.id.desc()] if descending else [sort_column, WarehouseInventory.id]
+            key = tuple_(sort_column, WarehouseInventory.id)
+        
+        query = select(WarehouseInventory).where(*criteria).order_by(*order_by)
+        if after is not None:
+            bound = after[0] if sort == "id" else tuple_(*after)
+            query = query.where(key < bound if descending else key > bound)
+        else:
+            query = query.offset(skip)
+        return query.limit(limit)
+    
+    async def search_page(self, filters: Dict[str, Any], sort: str = "id", descending: bool = False,
+                          skip: int = 0, limit: int = 100, after: Optional[Sequence[Any]] = None,
+                          count_mode: CountMode = CountMode.EXACT,
+                          validator: Optional[Validator] = None) -> Tuple[List[Sequence], Optional[int]]:
+        """Get a page of inventory rows (LIST_COLUMNS) matching the filters and their total count"""
+        criteria = self._search_criteria(filters)
+        total = count_column(WarehouseInventory, count_mode, *criteria)
+        query = self._search_query(criteria, sort, descending, skip, limit, after).with_only_columns(*LIST_COLUMNS)
+        return await fetch_page(self.db, query, total, validator)
+    
+    async def search_page_validator(self, filters: Dict[str, Any], sort: str = "id", descending: bool = False,
+                                    skip: int = 0, limit: int = 100, after: Optional[Sequence[Any]] = None,
+                                    count_mode: CountMode = CountMode.EXACT) -> Validator:
+        """Get the ETag and Last-Modified of the page `search_page` would return"""
+        criteria = self._search_criteria(filters)
+        total = count_column(WarehouseInventory, count_mode, *criteria)
+        query = self._search_query(criteria, sort, descending, skip, limit, after)
+        return await fetch_page_validator(self.db, query, total, count_mode == CountMode.EXACT)
+    
+    async def get_all(self, skip: int = 0, limit: int = 100, after_id: Optional[str] = None) -> List[WarehouseInventory]:
+        """
+        Get all inventory items ordered by ID
+        
+        Pages by keyset (`id > after_id`) when `after_id` is given and falls
+        back to OFFSET otherwise.
+        """
+        result = await self.db.execute(self._page_query(skip, limit, after_id))
+        return result.scalars().all()
+    
+    async def update(self, inventory_id: str, inventory_data: dict,
+                     expected_versions: Optional[List[int]] = None) -> Optional[WarehouseInventory]:
+        """
+        Update an inventory item and bump its version
+        
+        With `expected_versions` only a row at one of those versions is
+        updated, in the same statement; None is returned otherwise.
+        """
+        query = (
+            update(WarehouseInventory)
+            .where(WarehouseInventory.id == inventory_id)
+            .values(**inventory_data, version=WarehouseInventory.version + 1)
+            .returning(WarehouseInventory)
+        )
+        if expected_versions is not None:
+            query = query.where(WarehouseInventory.version.in_(expected_versions))
+        result = await self.db.execute(query)
+        return result.scalars().first()
+    
+    async def adjust_quantity(self, inventory_id: str, delta: float) -> Optional[WarehouseInventory]:
+        """
+        Atomically add a delta to an inventory quantity
+        
+        Returns None when the item does not exist or the result would be negative.
+        """
+        query = (
+            update(WarehouseInventory)
+            .where(
+                WarehouseInventory.id == inventory_id,
+                WarehouseInventory.quantity + delta >= 0
+            )
+            .values(quantity=WarehouseInventory.quantity + delta, version=WarehouseInventory.version + 1)
+            .returning(WarehouseInventory)
+        )
         result = await self.db.execute(query)
         return result.scalars().first()
     
+    async def create_transfer_destinations(self, destinations: List[Tuple[str, str, str]]) -> None:
+        """
+        Create missing destination rows of a transfer with zero quantity
+        
+        Args:
+            destinations: Tuples of (destination warehouse ID, SKU, source
+                warehouse ID); a new row takes the unit of its source row
+        
+        Rows are inserted in (warehouse_id, sku) order; rows that exist by
+        now are skipped.
+        """
+        if not destinations:
+            return
+        
+        now = datetime.utcnow()
+        targets = values(
+            column("id", String), column("warehouse_id", String), column("sku", String),
+            column("source_warehouse_id", String), name="destinations"
+        ).data([
+            (generate_id(Prefix.WAREHOUSE_INVENTORY), warehouse_id, sku, source_warehouse_id)
+            for warehouse_id, sku, source_warehouse_id in destinations
+        ])
+        source = aliased(WarehouseInventory)
+        rows = (
+            select(
+                targets.c.id, targets.c.warehouse_id, targets.c.sku, literal(0.0),
+                source.unit_id, literal(now), literal(now)
+            )
+            .join(source, and_(source.warehouse_id == targets.c.source_warehouse_id, source.sku == targets.c.sku))
+            .order_by(targets.c.warehouse_id, targets.c.sku)
+        )
+        query = insert(WarehouseInventory.__table__).from_select(
+            ["id", "warehouse_id", "sku", "quantity", "unit_id", "created_at", "updated_at"], rows
+        ).on_conflict_do_nothing(constraint="uix_warehouse_sku")
+        await self.db.execute(query)
+    
+    async def get_existing_keys(self, keys: Iterable[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        """Return the subset of the given (warehouse_id, sku) keys that exist"""
+        query = select(WarehouseInventory.warehouse_id, WarehouseInventory.sku).where(
+            tuple_(WarehouseInventory.warehouse_id, WarehouseInventory.sku).in_(list(keys))
+        )
+        result = await self.db.execute(query)
+        return {tuple(row) for row in result.all()}
+    
+    async def lock_by_keys(self, keys: Iterable[Tuple[str, str]]) -> List[WarehouseInventory]:
+        """
+        Lock inventory rows by (warehouse_id, sku) for the rest of the transaction
+        
+        Locks are taken in (warehouse_id, sku) order, so transactions locking
+        overlapping rows wait for each other instead of deadlocking.
+        """
+        keys = list(keys)
+        if not keys:
+            return []
+        query = (
+            select(WarehouseInventory)
+            .where(tuple_(WarehouseInventory.warehouse_id, WarehouseInventory.sku).in_(keys))
+            .order_by(WarehouseInventory.warehouse_id, WarehouseInventory.sku)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        result = await self.db.execute(query)
+        return result.scalars().all()
+    
+    async def adjust_quantities(self, deltas: Dict[str, float]) -> List[WarehouseInventory]:
+        """
+        Atomically add deltas to many inventory quantities in one statement
+        
+        Rows are locked in (warehouse_id, sku) order, like transfers, so
+        concurrent batches cannot deadlock. Only rows that exist and stay
+        non-negative are updated and returned.
+        """
+        if not deltas:
+            return []
+        adjustments = values(
+            column("id", String), column("delta", Float), name="adjustments"
+        ).data(sorted(deltas.items()))
+        
+        locked = (
+            select(WarehouseInventory.id)
+            .where(WarehouseInventory.id.in_(select(adjustments.c.id)))
+            .order_by(WarehouseInventory.warehouse_id, WarehouseInventory.sku)
+            .with_for_update()
+            .cte("locked")
+            .prefix_with("MATERIALIZED")
+        )
+        query = (
+            update(WarehouseInventory)
+            .where(
+                WarehouseInventory.id == adjustments.c.id,
+                WarehouseInventory.id.in_(select(locked.c.id)),
+                WarehouseInventory.quantity + adjustments.c.delta >= 0
+            )
+            .values(
+                quantity=WarehouseInventory.quantity + adjustments.c.delta,
+                version=WarehouseInventory.version + 1
+            )
+            .returning(WarehouseInventory)
+            # Rows locked earlier in the transaction are already in the session
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        result = await self.db.execute(query)
+        return result.scalars().all()
+    
+    async def get_existing_ids(self, inventory_ids: Iterable[str]) -> Set[str]:
+        """Return the subset of the given IDs that exist"""
+        query = select(WarehouseInventory.id).where(WarehouseInventory.id.in_(list(inventory_ids)))
+        result = await self.db.execute(query)
+        return set(result.scalars().all())
+    
     async def delete(self, inventory_id: str) -> bool:
         """Delete an inventory item"""
         query = delete(WarehouseInventory).where(WarehouseInventory.id == inventory_id)
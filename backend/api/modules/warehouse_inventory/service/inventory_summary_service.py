@@ -0,0 +1,45 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from api.modules.warehouse_inventory.repository.inventory_summary_repo import InventorySummaryRepository
+from api.modules.warehouse_inventory.dto.input import SummaryGroupBy
+from api.utils.pagination import Page, decode_id_cursor, split_page
+
+class InventorySummaryService:
+    """Service for cross-warehouse stock totals in base units"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repository = InventorySummaryRepository(db)
+    
+    async def get_summary(self, group_by: SummaryGroupBy, limit: int = 100, cursor: Optional[str] = None,
+                          sku_prefix: Optional[str] = None, warehouse_id: Optional[str] = None,
+                          live: bool = False) -> Page:
+        """
+        Get a page of stock totals per SKU or per warehouse
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        after = decode_id_cursor(cursor)
+        if group_by == SummaryGroupBy.SKU:
+            rows = await self.repository.get_sku_totals(limit + 1, after, sku_prefix, live)
+            return split_page(rows, limit, key=lambda row: (row.sku,))
+        
+        rows = await self.repository.get_warehouse_totals(limit + 1, after, warehouse_id, live)
+        return split_page(rows, limit, key=lambda row: (row.warehouse_id,))
+    
+    async def fold_deltas(self) -> int:
+        """Fold pending per-SKU and per-warehouse changes into the summaries; returns how many changed"""
+        return await self.repository.fold_deltas()
+    
+    async def try_fold_deltas(self) -> Optional[int]:
+        """
+        Fold pending changes unless another process is folding them
+        
+        Returns:
+            How many summaries changed, or None when another fold was running
+        """
+        if not await self.repository.try_lock_fold():
+            return None
+        return await self.repository.fold_deltas()
@@ -1,19 +1,29 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from pydantic import ValidationError
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from api.modules.warehouse_inventory.repository.warehouse_inventory_repo import WarehouseInventoryRepository
+from api.modules.warehouse_inventory.repository.warehouse_inventory_repo import WarehouseInventoryRepository, EXPORT_COLUMNS
 from api.modules.warehouse_inventory.entity.warehouse_inventory_entity import WarehouseInventory
-from api.modules.warehouse_inventory.dto.input import WarehouseInventoryCreate, WarehouseInventoryUpdate
+from api.modules.warehouse_inventory.dto.input import WarehouseInventoryCreate, WarehouseInventoryUpdate, InventoryAdjustment, InventoryFilter, InventorySortField, InventoryTransfer
 from api.modules.warehouse.service.warehouse_service import WarehouseService
 from api.modules.item_unit.service.item_unit_service import ItemUnitService
+from api.modules.inventory_ledger.service.inventory_ledger_service import InventoryLedgerService
+from api.modules.inventory_ledger.entity.inventory_ledger_entity import MovementReason
+from api.config import settings
+from api.cache import flush_invalidations
+from api.utils.pagination import CountMode, Page, SortOrder, decode_cursor, split_page
+from api.utils.streaming import encode_rows
+from api.utils.etag import Validator, check_version
 
 class WarehouseInventoryService:
     """Service for warehouse inventory business logic"""
     
     def __init__(self, db: AsyncSession):
+        self.db = db
         self.repository = WarehouseInventoryRepository(db)
         self.warehouse_service = WarehouseService(db)
         self.item_unit_service = ItemUnitService(db)
+        self.ledger_service = InventoryLedgerService(db)
     
     async def create_inventory(self, inventory_data: WarehouseInventoryCreate) -> WarehouseInventory:
         """Create a new inventory item"""
@@ -29,21 +39,227 @@ class WarehouseInventoryService:
         
         # Create inventory item
         inventory_dict = inventory_data.model_dump()
+        await self.ledger_service.record_as(MovementReason.CREATE)
         return await self.repository.create(inventory_dict)
       
-    async def update_inventory(self, inventory_id: str, inventory_data: WarehouseInventoryUpdate) -> Optional[WarehouseInventory]:
-        """Update an inventory item"""
-        # Check if inventory exists
-        inventory = await self.repository.get_by_id(inventory_id)
-        if not inventory:
-            raise ValueError(f"Inventory with ID {inventory_id} not found")
+    async def bulk_import(self, records: AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]) -> Dict[str, Any]:
+        """
+        Upsert inventory items from a stream of parsed records
+        
+        Records are consumed in batches of BULK_IMPORT_BATCH_SIZE so memory stays
+        bounded by the batch, not by the size of the upload. Warehouse and unit
+        IDs are checked once per batch and rows that fail validation are
+        reported instead of aborting the import.
+        
+        Each batch commits on its own, so no transaction outlives a batch and
+        row locks, the ledger's transition tables and WAL are bounded by
+        BULK_IMPORT_BATCH_SIZE too. An import that fails part way keeps the
+        batches committed before the failure; re-sending the upload is safe,
+        since rows are upserted. Give it a session of its own, not one other
+        work still has to commit or roll back.
+        """
+        report = {"processed": 0, "upserted": 0, "failed": 0, "errors": [], "errors_truncated": False}
+        known_warehouses = set()
+        known_units = set()
+        batch: List[Tuple[int, WarehouseInventoryCreate]] = []
+        
+        def reject(row_number: int, error: str):
+            report["failed"] += 1
+            if len(report["errors"]) < settings.BULK_IMPORT_MAX_ERRORS:
+                report["errors"].append({"row": row_number, "error": error})
+            else:
+                report["errors_truncated"] = True
+        
+        async def flush():
+            # Resolve references not seen in earlier batches in one query each
+            missing_warehouses = {item.warehouse_id for _, item in batch} - known_warehouses
+            if missing_warehouses:
+                known_warehouses.update(await self.warehouse_service.get_existing_ids(missing_warehouses))
+            missing_units = {item.unit_id for _, item in batch} - known_units
+            if missing_units:
+                known_units.update(await self.item_unit_service.get_existing_ids(missing_units))
+            
+            # Later rows win over earlier rows for the same (warehouse_id, sku)
+            rows: Dict[Tuple[str, str], dict] = {}
+            for row_number, item in batch:
+                if item.warehouse_id not in known_warehouses:
+                    reject(row_number, f"Warehouse with ID {item.warehouse_id} not found")
+                elif item.unit_id not in known_units:
+                    reject(row_number, f"Unit with ID {item.unit_id} not found")
+                else:
+                    rows[(item.warehouse_id, item.sku)] = item.model_dump()
+            
+            await self.ledger_service.record_as(MovementReason.BULK_IMPORT)
+            report["upserted"] += await self.repository.bulk_upsert(list(rows.values()))
+            await self.db.commit()
+            await flush_invalidations(self.db)
+            batch.clear()
+        
+        async for row_number, record, error in records:
+            report["processed"] += 1
+            if error:
+                reject(row_number, error)
+                continue
+            try:
+                batch.append((row_number, WarehouseInventoryCreate(**record)))
+            except ValidationError as e:
+                reject(row_number, "; ".join(
+                    f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors()
+                ))
+                continue
+            
+            if len(batch) >= settings.BULK_IMPORT_BATCH_SIZE:
+                await flush()
+        
+        if batch:
+            await flush()
+        
+        return report
+    
+    async def update_inventory(self, inventory_id: str, inventory_data: WarehouseInventoryUpdate,
+                               expected_versions: Optional[List[int]] = None) -> Optional[WarehouseInventory]:
+        """
+        Update an inventory item in one conditional UPDATE
+        
+        Raises VersionConflictError when `expected_versions` is given and the
+        item is at another version.
+        """
+        # Filter out None values
+        inventory_dict = {k: v for k, v in inventory_data.model_dump().items() if v is not None}
+        if not inventory_dict:
+            inventory = await self.repository.get_by_id(inventory_id)
+            check_version(inventory, expected_versions)
+            return inventory
         
         # Update inventory item
-        inventory_dict = inventory_data.model_dump()
-        return await self.repository.update(inventory_id, inventory_dict)
+        await self.ledger_service.record_as(MovementReason.UPDATE)
+        inventory = await self.repository.update(inventory_id, inventory_dict, expected_versions)
+        if inventory or expected_versions is None:
+            return inventory
+        
+        # Only the failure path pays for a second query to explain the failure
+        check_version(await self.repository.get_by_id(inventory_id), expected_versions)
+        return None
+        
+    async def adjust_quantity(self, inventory_id: str, delta: int) -> Optional[WarehouseInventory]:
+        """Add a delta to an inventory quantity without reading it first"""
+        await self.ledger_service.record_as(MovementReason.ADJUST)
+        inventory = await self.repository.adjust_quantity(inventory_id, delta)
+        if inventory:
+            return inventory
+        
+        # Only the failure path pays for a second query to explain the failure
+        if not await self.repository.get_by_id(inventory_id):
+            return None
+        raise ValueError(f"Insufficient quantity for inventory {inventory_id}")
+    
+    async def adjust_quantities(self, adjustments: List[InventoryAdjustment]) -> List[WarehouseInventory]:
+        """Apply many quantity deltas atomically, all or nothing"""
+        deltas: Dict[str, int] = {}
+        for adjustment in adjustments:
+            deltas[adjustment.inventory_id] = deltas.get(adjustment.inventory_id, 0) + adjustment.quantity
+        
+        await self.ledger_service.record_as(MovementReason.ADJUST)
+        inventories = await self.repository.adjust_quantities(deltas)
+        if len(inventories) == len(deltas):
+            return inventories
+        
+        # Raising rolls back the rows that were already adjusted
+        failed = set(deltas) - {inventory.id for inventory in inventories}
+        existing = await self.repository.get_existing_ids(failed)
+        missing = sorted(failed - existing)
+        if missing:
+            raise ValueError(f"Inventory not found: {', '.join(missing)}")
+        raise ValueError(f"Insufficient quantity for inventory: {', '.join(sorted(existing))}")
+    
+    async def transfer_stock(self, transfers: List[InventoryTransfer]) -> List[WarehouseInventory]:
+        """
+        Move stock between warehouses atomically, all or nothing
+        
+        Source rows are decremented and destination rows incremented, created
+        with the source's unit when missing. Every row involved is locked in
+        (warehouse_id, sku) order before any is changed, so concurrent
+        transfers in opposite directions wait for each other instead of
+        deadlocking, also while rows are created.
         
+        Returns:
+            The changed inventory rows
+        """
+        for transfer in transfers:
+            if transfer.source_warehouse_id == transfer.destination_warehouse_id:
+                raise ValueError(f"Cannot transfer {transfer.sku} to the warehouse it is in")
+        
+        warehouse_ids = {t.source_warehouse_id for t in transfers} | {t.destination_warehouse_id for t in transfers}
+        missing_warehouses = warehouse_ids - await self.warehouse_service.get_existing_ids(warehouse_ids)
+        if missing_warehouses:
+            raise ValueError(f"Warehouse not found: {', '.join(sorted(missing_warehouses))}")
+        
+        # Net quantity change per (warehouse_id, sku)
+        net: Dict[Tuple[str, str], int] = {}
+        sources: Dict[Tuple[str, str], str] = {}
+        for transfer in transfers:
+            source_key = (transfer.source_warehouse_id, transfer.sku)
+            destination_key = (transfer.destination_warehouse_id, transfer.sku)
+            net[source_key] = net.get(source_key, 0) - transfer.quantity
+            net[destination_key] = net.get(destination_key, 0) + transfer.quantity
+            sources.setdefault(destination_key, transfer.source_warehouse_id)
+        
+        await self.ledger_service.record_as(MovementReason.TRANSFER)
+        rows = await self._lock_transfer_rows(sorted(net), sources)
+        
+        # Raising after this point rolls back the destination rows created above
+        missing = sorted(f"{sku} in {warehouse_id}" for (warehouse_id, sku) in net if (warehouse_id, sku) not in rows)
+        if missing:
+            raise ValueError(f"Inventory not found: {', '.join(missing)}")
+        for transfer in transfers:
+            source = rows[(transfer.source_warehouse_id, transfer.sku)]
+            destination = rows[(transfer.destination_warehouse_id, transfer.sku)]
+            if source.unit_id != destination.unit_id:
+                raise ValueError(
+                    f"Unit mismatch for {transfer.sku}: {source.unit_id} in {source.warehouse_id}, "
+                    f"{destination.unit_id} in {destination.warehouse_id}"
+                )
+        insufficient = sorted(
+            f"{sku} in {warehouse_id}" for (warehouse_id, sku), delta in net.items()
+            if rows[(warehouse_id, sku)].quantity + delta < 0
+        )
+        if insufficient:
+            raise ValueError(f"Insufficient quantity: {', '.join(insufficient)}")
+        
+        deltas = {rows[key].id: delta for key, delta in net.items() if delta != 0}
+        return await self.repository.adjust_quantities(deltas)
+    
+    async def _lock_transfer_rows(self, keys: List[Tuple[str, str]],
+                                  sources: Dict[Tuple[str, str], str]) -> Dict[Tuple[str, str], WarehouseInventory]:
+        """
+        Lock the rows of a transfer in key order, creating missing destination rows
+        
+        A missing destination is inserted only after the rows before it are
+        locked, and locked together with the rows after it, so rows created
+        and rows locked follow one (warehouse_id, sku) order. An insert that
+        meets a row created concurrently skips it and the row is locked in
+        its turn.
+        
+        Returns:
+            The locked rows that exist, by (warehouse_id, sku)
+        """
+        existing = await self.repository.get_existing_keys(keys)
+        rows = {}
+        run = []
+        for key in keys:
+            if key not in existing and key in sources:
+                for row in await self.repository.lock_by_keys(run):
+                    rows[(row.warehouse_id, row.sku)] = row
+                run = []
+                await self.repository.create_transfer_destinations([(*key, sources[key])])
+            run.append(key)
+        for row in await self.repository.lock_by_keys(run):
+            rows[(row.warehouse_id, row.sku)] = row
+        return rows
+    
     async def delete_inventory(self, inventory_id: str) -> bool:
         """Delete an inventory item"""
+        await self.ledger_service.record_as(MovementReason.DELETE)
         return await self.repository.delete(inventory_id)
       
     async def get_inventory_by_id(self, inventory_id: str) -> Optional[WarehouseInventory]:
@@ -58,7 +274,76 @@ class WarehouseInventoryService:
         """Get all inventory items for a warehouse"""
         return await self.repository.get_by_warehouse(warehouse_id)
         
-    async def get_all_inventory(self, skip: int = 0, limit: int = 100) -> List[WarehouseInventory]:
-        """Get all inventory items with pagination"""
-        return await self.repository.get_all(skip, limit)
+    def export_inventory(self, warehouse_id: str, fmt: str) -> AsyncIterator[bytes]:
+        """Stream a warehouse's inventory as encoded CSV or NDJSON chunks"""
+        partitions = self.repository.stream_by_warehouse(warehouse_id, settings.EXPORT_CHUNK_SIZE)
+        return encode_rows(partitions, [column.key for column in EXPORT_COLUMNS], fmt)
+    
+    async def count_inventory_by_warehouse(self, warehouse_id: str) -> int:
+        """Count inventory items of a warehouse"""
+        return await self.repository.count_by_warehouse(warehouse_id)
+    
+    async def get_inventory_ids_by_warehouse(self, warehouse_id: str, after_id: Optional[str] = None, limit: int = 1000) -> List[str]:
+        """Get the next batch of inventory IDs of a warehouse"""
+        return await self.repository.get_ids_by_warehouse(warehouse_id, after_id, limit)
+    
+    async def get_stock_batch(self, warehouse_id: str, after_id: Optional[str] = None, limit: int = 1000):
+        """Get the next batch of a warehouse's stock with unit conversion factors"""
+        return await self.repository.get_stock_batch(warehouse_id, after_id, limit)
+    
+    async def delete_inventory_batch(self, inventory_ids: List[str]) -> int:
+        """Delete many inventory items"""
+        await self.ledger_service.record_as(MovementReason.DELETE)
+        return await self.repository.delete_by_ids(inventory_ids)
+    
+    async def get_all_inventory(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                       count_mode: CountMode = CountMode.NONE, filters: Optional[InventoryFilter] = None,
+                       sort: InventorySortField = InventorySortField.ID, order: SortOrder = SortOrder.ASC,
+                       validator: Optional[Validator] = None) -> Page:
+        """
+        Get a page of inventory items matching the filters, the next cursor and,
+        unless disabled, the total count
+        
+        Pass the page's validator to reuse its total instead of counting again.
+        
+        Raises:
+            ValueError: If the cursor is malformed or was issued for another sort
+        """
+        after = self._decode_sort_cursor(cursor, sort)
+        filter_data = filters.model_dump(exclude_none=True) if filters else {}
+        rows, count = await self.repository.search_page(
+            filter_data, sort.value, order == SortOrder.DESC, skip, limit + 1, after, count_mode, validator
+        )
+        if sort == InventorySortField.ID:
+            return split_page(rows, limit, count)
+        return split_page(rows, limit, count, key=lambda row: (getattr(row, sort.value), row.id))
+    
+    async def get_inventory_validator(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                       count_mode: CountMode = CountMode.NONE, filters: Optional[InventoryFilter] = None,
+                       sort: InventorySortField = InventorySortField.ID, order: SortOrder = SortOrder.ASC) -> Validator:
+        """Get the ETag and Last-Modified of the page `get_all_inventory` would return, without loading it"""
+        after = self._decode_sort_cursor(cursor, sort)
+        filter_data = filters.model_dump(exclude_none=True) if filters else {}
+        return await self.repository.search_page_validator(
+            filter_data, sort.value, order == SortOrder.DESC, skip, limit + 1, after, count_mode
+        )
+    
+    def _decode_sort_cursor(self, cursor: Optional[str], sort: InventorySortField) -> Optional[List[Any]]:
+        """Decode and type-check a cursor over (id,) or (sort value, id)"""
+        if cursor is None:
+            return None
+        values = decode_cursor(cursor)
+        if sort == InventorySortField.ID:
+            valid = len(values) == 1 and isinstance(values[0], str)
+        elif sort == InventorySortField.SKU:
+            valid = len(values) == 2 and all(isinstance(value, str) for value in values)
+        else:
+            valid = (
+                len(values) == 2
+                and isinstance(values[0], (int, float)) and not isinstance(values[0], bool)
+                and isinstance(values[1], str)
+            )
+        if not valid:
+            raise ValueError("Invalid cursor")
+        return values
         
\ No newline at end of file
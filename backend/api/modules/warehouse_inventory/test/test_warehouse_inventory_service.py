@@ -0,0 +1,170 @@
+import asyncio
+
+# The summaries are kept by triggers, so these run against PostgreSQL (see run_db)
+
+async def _summary_and_live(warehouse_id: str):
+    from api.database import async_session_factory
+    from api.modules.warehouse_inventory.repository.inventory_summary_repo import InventorySummaryRepository
+
+    async with async_session_factory() as session:
+        repository = InventorySummaryRepository(session)
+        summary = await repository.get_warehouse_totals(warehouse_id=warehouse_id)
+        live = await repository.get_warehouse_totals(warehouse_id=warehouse_id, live=True)
+    return [tuple(row) for row in summary], [tuple(row) for row in live]
+
+async def _fold():
+    from api.database import async_session_factory
+    from api.modules.warehouse_inventory.service.inventory_summary_service import InventorySummaryService
+
+    async with async_session_factory() as session:
+        await InventorySummaryService(session).fold_deltas()
+        await session.commit()
+
+def test_concurrent_adjustments_in_one_warehouse_keep_summary_exact(run_db, create_stock):
+    from api.database import async_session_factory
+    from api.modules.warehouse_inventory.service.warehouse_inventory_service import WarehouseInventoryService
+
+    async def adjust(inventory_id: str, delta: int, release: asyncio.Event = None):
+        async with async_session_factory() as session:
+            assert await WarehouseInventoryService(session).adjust_quantity(inventory_id, delta) is not None
+            if release is not None:
+                await release.wait()
+            await session.commit()
+
+    async def adjust_others(inventory_ids, release: asyncio.Event):
+        await asyncio.gather(*(adjust(inventory_id, 5) for inventory_id in inventory_ids))
+        release.set()
+
+    async def main():
+        (warehouse_id,), items = await create_stock(warehouses=1, skus=10, quantity=100)
+        first, *others = items.values()
+        # Writers of different rows in one warehouse do not wait on each
+        # other: queued behind the open transaction on the warehouse's
+        # summary row, the others would never release it
+        release = asyncio.Event()
+        await asyncio.wait_for(asyncio.gather(adjust(first, 5, release), adjust_others(others, release), _fold()), timeout=10)
+
+        summary, live = await _summary_and_live(warehouse_id)
+        assert summary == live
+        assert summary[0][1:] == (10 * (100 + 5) * 12, 10)
+        await _fold()
+        assert await _summary_and_live(warehouse_id) == (live, live)
+
+    run_db(main())
+
+def test_opposite_transfers_do_not_deadlock(run_db, create_stock):
+    from api.database import async_session_factory
+    from api.modules.warehouse_inventory.dto.input import InventoryTransfer
+    from api.modules.warehouse_inventory.service.warehouse_inventory_service import WarehouseInventoryService
+
+    async def transfer(source: str, destination: str, sku: str):
+        async with async_session_factory() as session:
+            await WarehouseInventoryService(session).transfer_stock([
+                InventoryTransfer(source_warehouse_id=source, destination_warehouse_id=destination, sku=sku, quantity=1)
+            ])
+            await asyncio.sleep(0.05)
+            await session.commit()
+
+    async def main():
+        (first, second), items = await create_stock(warehouses=2, skus=2, quantity=50)
+        skus = sorted({sku for _, sku in items})
+        # Different SKUs, so the inventory rows do not conflict; only the
+        # warehouse summaries are shared between the two directions
+        transfers = []
+        for _ in range(10):
+            transfers.append(transfer(first, second, skus[0]))
+            transfers.append(transfer(second, first, skus[1]))
+        await asyncio.wait_for(asyncio.gather(*transfers), timeout=10)
+
+        for warehouse_id in (first, second):
+            summary, live = await _summary_and_live(warehouse_id)
+            assert summary == live
+
+    run_db(main())
+
+def test_transfers_creating_destinations_do_not_deadlock(run_db, create_stock):
+    from api.database import async_session_factory
+    from api.modules.warehouse.dto.input import WarehouseCreate
+    from api.modules.warehouse.service.warehouse_service import WarehouseService
+    from api.modules.warehouse_inventory.dto.input import InventoryTransfer
+    from api.modules.warehouse_inventory.repository.inventory_summary_repo import InventorySummaryRepository
+    from api.modules.warehouse_inventory.service.warehouse_inventory_service import WarehouseInventoryService
+
+    async def transfer(moves):
+        try:
+            async with async_session_factory() as session:
+                await WarehouseInventoryService(session).transfer_stock([
+                    InventoryTransfer(source_warehouse_id=source, destination_warehouse_id=destination, sku=sku, quantity=1)
+                    for source, destination, sku in moves
+                ])
+                await asyncio.sleep(0.01)
+                await session.commit()
+        except ValueError:
+            # Moving back stock that has not arrived yet
+            pass
+
+    async def main():
+        (stocked,), items = await create_stock(warehouses=1, skus=4, quantity=100)
+        skus = sorted(sku for _, sku in items)
+        async with async_session_factory() as session:
+            empty = [
+                (await WarehouseService(session).create_warehouse(WarehouseCreate(location=f"empty-{stocked}-{index}"))).id
+                for index in range(2)
+            ]
+            await session.commit()
+        # Multi-SKU batches into warehouses without the rows yet, in both
+        # directions, so rows are created while others are locked
+        batches = []
+        for index in range(30):
+            destination = empty[index % 2]
+            order = skus if index % 3 else list(reversed(skus))
+            batches.append(transfer([(stocked, destination, sku) for sku in order]))
+            batches.append(transfer([(destination, stocked, skus[index % 4]), (empty[1 - index % 2], destination, skus[0])]))
+        await asyncio.wait_for(asyncio.gather(*batches), timeout=30)
+
+        async with async_session_factory() as session:
+            service = WarehouseInventoryService(session)
+            totals = {}
+            for warehouse_id in (stocked, *empty):
+                for item in await service.get_inventory_by_warehouse(warehouse_id):
+                    assert item.quantity >= 0
+                    totals[item.sku] = totals.get(item.sku, 0) + item.quantity
+        assert totals == {sku: 100 for sku in skus}
+        for warehouse_id in (stocked, *empty):
+            summary, live = await _summary_and_live(warehouse_id)
+            assert summary == live
+        async with async_session_factory() as session:
+            repository = InventorySummaryRepository(session)
+            prefix = skus[0].rsplit("-", 1)[0]
+            summary = await repository.get_sku_totals(sku_prefix=prefix)
+            live = await repository.get_sku_totals(sku_prefix=prefix, live=True)
+        assert [tuple(row) for row in summary] == [tuple(row) for row in live]
+        assert [row.warehouse_count for row in live] == [3] * 4
+
+    run_db(main())
+
+def test_one_process_folds_at_a_time(run_db, create_stock):
+    from api.database import async_session_factory
+    from api.modules.warehouse_inventory.service.inventory_summary_service import InventorySummaryService
+    from api.modules.warehouse_inventory.service.warehouse_inventory_service import WarehouseInventoryService
+
+    async def main():
+        (warehouse_id,), items = await create_stock(skus=2, quantity=10)
+        async with async_session_factory() as session:
+            await WarehouseInventoryService(session).adjust_quantity(next(iter(items.values())), 1)
+            await session.commit()
+
+        async with async_session_factory() as folding:
+            assert await InventorySummaryService(folding).try_fold_deltas() is not None
+            # Another worker's turn comes while this fold is uncommitted
+            async with async_session_factory() as other:
+                assert await InventorySummaryService(other).try_fold_deltas() is None
+            await folding.commit()
+
+        async with async_session_factory() as other:
+            assert await InventorySummaryService(other).try_fold_deltas() is not None
+            await other.commit()
+        summary, live = await _summary_and_live(warehouse_id)
+        assert summary == live
+
+    run_db(main())
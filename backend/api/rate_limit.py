@@ -0,0 +1,185 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from redis.exceptions import RedisError
+
+from api.cache import get_redis
+from api.config import settings
+from api.logger import logger
+
+# Atomically refill a bucket by the time since its last use and take one
+# token. Uses the Redis clock so workers with skewed clocks agree; returns
+# 0 when a token was taken, otherwise the seconds until one is available.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local retry = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(retry)
+"""
+
+def route_class(method: str, path: str) -> str:
+    """
+    Group a request into the class its rate limit is set for
+
+    - auth: login and registration, which run bcrypt
+    - export: streaming inventory exports
+    - write: other non-GET requests
+    - read: everything else
+    """
+    if method == "POST" and path.rstrip("/") in (f"{settings.API_PREFIX}/users/login", f"{settings.API_PREFIX}/users/register"):
+        return "auth"
+    if path.rstrip("/").endswith("/export"):
+        return "export"
+    if method not in ("GET", "HEAD", "OPTIONS"):
+        return "write"
+    return "read"
+
+class TokenBucketLimiter:
+    """
+    Token buckets per principal and route class
+
+    A class allows `rates[class]` requests per second on average and bursts
+    of up to `bursts[class]`; classes without a positive rate are not
+    limited. Buckets live in Redis so the limit holds across workers. When
+    Redis is not configured or fails, each worker keeps its own buckets, at
+    most `max_local_buckets` of them.
+    """
+
+    def __init__(self, rates: Dict[str, float], bursts: Dict[str, float], max_local_buckets: int = 10000):
+        self.rates = rates
+        self.bursts = bursts
+        self.max_local_buckets = max_local_buckets
+        self._local: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._script = None
+        self._script_client = None
+        self.errors = 0
+
+    def limit(self, route_class: str) -> Optional[Tuple[float, float]]:
+        """Return (rate, burst) of a route class, or None when it is not limited"""
+        rate = self.rates.get(route_class, 0)
+        if rate <= 0:
+            return None
+        return rate, max(1.0, self.bursts.get(route_class, rate))
+
+    async def acquire(self, principal: str, route_class: str) -> float:
+        """
+        Take a token for a request
+
+        Returns:
+            0 when the request may proceed, otherwise the seconds until the
+            bucket has a token again
+        """
+        limit = self.limit(route_class)
+        if limit is None:
+            return 0.0
+        rate, burst = limit
+        key = f"{settings.CACHE_KEY_PREFIX}:ratelimit:{route_class}:{principal}"
+
+        client = get_redis()
+        if client is not None:
+            try:
+                if self._script is None or self._script_client is not client:
+                    self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+                    self._script_client = client
+                return float(await self._script(keys=[key], args=[rate, burst]))
+            except RedisError as e:
+                self.errors += 1
+                logger.warning(f"Rate limiter falling back to in-process buckets: {e}")
+        return self._acquire_local(key, rate, burst)
+
+    def _acquire_local(self, key: str, rate: float, burst: float) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self._local.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated_at) * rate)
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+        self._local[key] = (tokens, now)
+        while len(self._local) > self.max_local_buckets:
+            self._local.popitem(last=False)
+        return retry_after
+
+class ConcurrencyLimiter:
+    """
+    Cap on requests handled at once by this worker
+
+    A request over the cap waits up to `queue_seconds` for a slot and is
+    shed otherwise, instead of queueing for a pool connection until
+    DB_POOL_TIMEOUT.
+    """
+
+    def __init__(self, limit: int, queue_seconds: float):
+        self.limit = limit
+        self.queue_seconds = queue_seconds
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def acquire(self) -> bool:
+        """Take a slot, returns False when none freed up in time"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        if self._semaphore.locked():
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_seconds)
+            except asyncio.TimeoutError:
+                return False
+        else:
+            await self._semaphore.acquire()
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return True
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+class RejectionCounter:
+    """Requests turned away, by reason and route class"""
+
+    def __init__(self):
+        self.counts: Dict[str, Dict[str, int]] = {}
+
+    def record(self, reason: str, route_class: str) -> None:
+        by_class = self.counts.setdefault(reason, {})
+        by_class[route_class] = by_class.get(route_class, 0) + 1
+
+rate_limiter = TokenBucketLimiter(settings.RATE_LIMIT_RATES, settings.RATE_LIMIT_BURSTS)
+db_request_limiter = ConcurrencyLimiter(settings.MAX_CONCURRENT_DB_REQUESTS, settings.LOAD_SHED_QUEUE_SECONDS)
+rejections = RejectionCounter()
+
+def retry_after_header(seconds: float) -> str:
+    """Format a Retry-After value, in whole seconds and at least 1"""
+    return str(max(1, math.ceil(seconds)))
+
+def rate_limit_stats() -> Dict[str, Any]:
+    return {
+        "enabled": settings.RATE_LIMIT_ENABLED,
+        "rates": rate_limiter.rates,
+        "bursts": rate_limiter.bursts,
+        "redis_errors": rate_limiter.errors,
+        "db_requests": {
+            "limit": db_request_limiter.limit,
+            "in_flight": db_request_limiter.in_flight,
+            "max_in_flight": db_request_limiter.max_in_flight,
+        },
+        "rejected": rejections.counts,
+    }
@@ -0,0 +1,122 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import Column, DateTime, Integer, String, create_engine, insert, select
+from sqlalchemy.orm import Session, declarative_base
+
+Base = declarative_base()
+
+class Thing(Base):
+    __tablename__ = "things"
+    id = Column(String, primary_key=True)
+    name = Column(String)
+    created_at = Column(DateTime)
+
+@pytest.fixture
+def redis_client():
+    import fakeredis
+
+    from api.cache import set_redis_client
+
+    client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+    set_redis_client(client)
+    yield client
+    set_redis_client(None)
+
+def _cache(namespace: str):
+    from api.cache import EntityCache
+
+    return EntityCache(Thing, namespace)
+
+class _Loader:
+    def __init__(self, name: str = "bolt"):
+        self.name = name
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return Thing(id="t1", name=self.name, created_at=datetime(2024, 1, 2, 3, 4, 5))
+
+def test_misses_are_loaded_once_and_cached(redis_client):
+    cache = _cache("things-fill")
+    loader = _Loader()
+
+    async def main():
+        loaded = await asyncio.gather(*(cache.get_or_load("t1", loader) for _ in range(5)))
+        assert loader.calls == 1
+        assert {thing.name for thing in loaded} == {"bolt"}
+        cached = await cache.get_or_load("t1", loader)
+        assert loader.calls == 1
+        assert (cached.name, cached.created_at) == ("bolt", datetime(2024, 1, 2, 3, 4, 5))
+
+    asyncio.run(main())
+    assert cache.stats()["hits"] == 1
+
+def test_sessions_with_pending_writes_bypass_the_cache(redis_client):
+    cache = _cache("things-writes")
+
+    async def main():
+        await cache.get_or_load("t1", _Loader("committed"))
+
+        # Sees its own write, and does not cache it as it may roll back
+        writer = SimpleNamespace(info={"pending_writes": True})
+        assert (await cache.get_or_load("t1", _Loader("uncommitted"), db=writer)).name == "uncommitted"
+        assert (await cache.get_or_load("t1", _Loader())).name == "committed"
+
+    asyncio.run(main())
+
+def test_replica_reads_are_served_but_not_cached(redis_client):
+    cache = _cache("things-replica")
+    replica = SimpleNamespace(info={"replica": "replica0"})
+
+    async def main():
+        loader = _Loader("lagging")
+        await cache.get_or_load("t1", loader, db=replica)
+        assert await redis_client.get(cache.key("t1")) is None
+        await cache.get_or_load("t1", _Loader("primary"))
+        assert (await cache.get_or_load("t1", loader, db=replica)).name == "primary"
+        assert loader.calls == 1
+
+    asyncio.run(main())
+
+def test_invalidations_are_dropped_again_after_the_transaction(redis_client):
+    from api.cache import flush_invalidations
+
+    cache = _cache("things-invalidate")
+    session = SimpleNamespace(info={})
+
+    async def main():
+        await cache.get_or_load("t1", _Loader())
+        await cache.invalidate("t1", session)
+        assert await redis_client.get(cache.key("t1")) is None
+
+        # Re-cached by a concurrent reader before the transaction ended
+        await cache.get_or_load("t1", _Loader("stale"))
+        await flush_invalidations(session)
+        assert await redis_client.get(cache.key("t1")) is None
+        assert "cache_invalidations" not in session.info
+
+    asyncio.run(main())
+
+def test_writes_are_tracked_until_the_transaction_ends():
+    from api.cache import has_pending_writes
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.execute(select(Thing))
+        assert not has_pending_writes(session)
+        session.execute(insert(Thing).values(id="t1", name="bolt"))
+        assert has_pending_writes(session)
+        session.commit()
+        assert not has_pending_writes(session)
+
+        session.add(Thing(id="t2", name="nut"))
+        session.flush()
+        assert has_pending_writes(session)
+        session.rollback()
+        assert not has_pending_writes(session)
+        assert session.scalars(select(Thing.id)).all() == ["t1"]
@@ -0,0 +1,96 @@
+import asyncio
+
+from starlette.requests import Request
+
+class _Connection:
+    def __init__(self, engine):
+        self.engine = engine
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def scalar(self, query):
+        if isinstance(self.engine.lag, Exception):
+            raise self.engine.lag
+        return self.engine.lag
+
+class _Engine:
+    """Answers the lag query with `lag`: seconds, None (no WAL receiver) or an exception to raise"""
+
+    def __init__(self, lag):
+        self.lag = lag
+
+    def connect(self):
+        return _Connection(self)
+
+def _request(authorization: str = None, **headers):
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    if authorization is not None:
+        raw.append((b"authorization", authorization.encode()))
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+def _router(*lags, sticky_seconds: float = 5):
+    from api.db_replicas import Replica, ReplicaRouter
+
+    replicas = [Replica(f"replica{index}", _Engine(lag)) for index, lag in enumerate(lags)]
+    return ReplicaRouter(replicas, max_lag=1, check_interval=60, sticky_seconds=sticky_seconds)
+
+async def _checked(router):
+    for replica in router.replicas:
+        await replica.check_lag()
+    return router
+
+def test_caught_up_replicas_are_used_round_robin():
+    async def main():
+        router = await _checked(_router(0, 0.5, 30))
+        chosen = [(await router.choose(_request())).name for _ in range(4)]
+        assert chosen == ["replica0", "replica1", "replica0", "replica1"]
+        assert router.replica_reads == 4
+    asyncio.run(main())
+
+def test_lagging_or_not_streaming_replicas_fall_back_to_the_primary():
+    async def main():
+        # Behind by 30 s, no WAL receiver, failing its check
+        router = await _checked(_router(30, None, OSError("connection refused")))
+        assert [replica.healthy for replica in router.replicas] == [True, False, False]
+        assert await router.choose(_request()) is None
+        assert router.fallback_reads == 1
+
+        # A check result older than a few intervals is not trusted
+        router = await _checked(_router(0))
+        router.replicas[0].checked_at -= router.check_interval * 4
+        assert await router.choose(_request()) is None
+    asyncio.run(main())
+
+def test_callers_read_from_the_primary_after_writing():
+    async def main():
+        router = await _checked(_router(0))
+        await router.record_write(_request("Bearer writer"))
+        assert await router.choose(_request("Bearer writer")) is None
+        assert await router.choose(_request("Bearer other")) is not None
+        assert await router.choose(_request("Bearer other", x_read_consistency="primary")) is None
+        assert router.sticky_reads == 2
+
+        router.sticky_seconds = 0
+        assert await router.choose(_request("Bearer writer")) is not None
+    asyncio.run(main())
+
+def test_recent_writes_are_shared_across_workers_through_redis():
+    import fakeredis
+
+    from api.cache import set_redis_client
+
+    async def main():
+        set_redis_client(fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer()))
+        try:
+            writer_worker = await _checked(_router(0))
+            reader_worker = await _checked(_router(0))
+            await writer_worker.record_write(_request("Bearer writer"))
+            assert await reader_worker.choose(_request("Bearer writer")) is None
+            assert await reader_worker.choose(_request("Bearer other")) is not None
+        finally:
+            set_redis_client(None)
+    asyncio.run(main())
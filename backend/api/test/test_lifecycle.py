@@ -0,0 +1,52 @@
+import asyncio
+import os
+import signal
+
+import pytest
+
+@pytest.fixture
+def lifecycle():
+    # Importing api.lifecycle creates the engines
+    if not os.getenv("DATABASE_URL"):
+        pytest.skip("DATABASE_URL is not set")
+    from api import lifecycle
+
+    handlers = {sig: signal.getsignal(sig) for sig in (signal.SIGTERM, signal.SIGINT)}
+    try:
+        yield lifecycle
+    finally:
+        for sig, handler in handlers.items():
+            signal.signal(sig, handler)
+        lifecycle.serving_state.draining = False
+
+def test_sigterm_drains_before_reaching_the_server(lifecycle):
+    received = []
+    # Like uvicorn's Server.capture_signals, also used by its gunicorn worker
+    signal.signal(signal.SIGTERM, lambda signum, frame: received.append(signum))
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    async def main():
+        assert lifecycle.install_drain_handlers(0.05)
+        signal.raise_signal(signal.SIGTERM)
+        await asyncio.sleep(0)
+        assert lifecycle.serving_state.status == "draining"
+        assert received == []
+        await asyncio.sleep(0.1)
+        assert received == [signal.SIGTERM]
+
+        # A second signal goes through at once
+        signal.raise_signal(signal.SIGTERM)
+        assert received == [signal.SIGTERM, signal.SIGTERM]
+
+    asyncio.run(main())
+
+def test_no_server_handler_is_left_alone(lifecycle):
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # Not default_int_handler, which asyncio.run replaces with its own
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    async def main():
+        return lifecycle.install_drain_handlers(0.05)
+
+    assert not asyncio.run(main())
+    assert signal.getsignal(signal.SIGTERM) is signal.SIG_DFL
@@ -0,0 +1,63 @@
+import ipaddress
+from typing import Iterable, List, Optional, Union
+
+from starlette.types import Scope
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+def get_route_template(scope: Scope) -> Optional[str]:
+    """
+    Return the path template of the route that handled a request
+
+    The router stores the matched route in the scope, so this only works once
+    the request has been dispatched. Using the template (e.g.
+    `/api/warehouses/{warehouse_id}`) instead of the raw path keeps log and
+    metric labels low-cardinality.
+    """
+    route = scope.get("route")
+    if route is None:
+        return None
+    return getattr(route, "path_format", None) or getattr(route, "path", None)
+
+def get_header(scope: Scope, name: bytes) -> Optional[str]:
+    """Return the first value of a request header from an ASGI scope"""
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+def parse_networks(values: Iterable[str]) -> List[IPNetwork]:
+    """Parse addresses and CIDR ranges, e.g. "10.0.0.0/8", into networks"""
+    return [ipaddress.ip_network(value.strip(), strict=False) for value in values if value.strip()]
+
+def _is_trusted(address: str, trusted_proxies: List[IPNetwork]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies)
+
+def get_client_address(scope: Scope, trusted_proxies: List[IPNetwork]) -> Optional[str]:
+    """
+    Return the address of the client that sent a request
+
+    When the peer is a trusted proxy, X-Forwarded-For is read from the
+    right, skipping trusted proxies, and the first other hop is the client.
+    Hops left of it were written by the client and are ignored, so a client
+    cannot pick its own address. Without trusted proxies this is the peer.
+    """
+    client = scope.get("client")
+    address = client[0] if client else None
+    if address is None or not _is_trusted(address, trusted_proxies):
+        return address
+    hops = []
+    for key, value in scope.get("headers", []):
+        if key == b"x-forwarded-for":
+            hops.extend(hop.strip() for hop in value.decode("latin-1").split(","))
+    for hop in reversed(hops):
+        if not hop:
+            continue
+        address = hop
+        if not _is_trusted(hop, trusted_proxies):
+            break
+    return address
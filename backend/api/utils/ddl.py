@@ -0,0 +1,20 @@
+def create_trigger_if_missing(name: str, definition: str) -> str:
+    """
+    Build a statement creating a trigger unless one with that name exists
+
+    Recreating triggers would take a table lock on every startup, and
+    CREATE OR REPLACE TRIGGER needs PostgreSQL 14.
+
+    Args:
+        name: Trigger name
+        definition: Everything after `CREATE TRIGGER <name>`
+    """
+    return f"""
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = '{name}') THEN
+        CREATE TRIGGER {name} {definition};
+    END IF;
+END;
+$$
+"""
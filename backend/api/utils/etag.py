@@ -0,0 +1,114 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, List, NamedTuple, Optional
+
+from fastapi import Request, Response
+
+class VersionConflictError(Exception):
+    """Raised when a conditional update finds the row at another version"""
+
+class Validator(NamedTuple):
+    """
+    Cache validators of a response: its entity tag and last modification
+
+    Validators of a list page also carry what computing them learned about
+    the page, its total count and number of rows, for the 200 response.
+    """
+    etag: str
+    last_modified: Optional[datetime]
+    total: Optional[int] = None
+    rows: Optional[int] = None
+
+def format_etag(version: int) -> str:
+    """Build the strong entity tag of a row version"""
+    return f'"{version}"'
+
+def set_etag(response: Response, entity: Any) -> None:
+    """Send the version of an entity as its ETag"""
+    response.headers["ETag"] = format_etag(entity.version)
+
+def parse_if_match(header: Optional[str]) -> Optional[List[int]]:
+    """
+    Parse an If-Match header into the row versions it accepts
+
+    If-Match compares strongly, so weak tags and tags that are not one of
+    ours match nothing; an empty list means no version can match.
+
+    Args:
+        header: Raw If-Match header value
+
+    Returns:
+        Accepted versions, or None when any version is accepted
+        (no header or `*`)
+    """
+    if header is None or header.strip() == "*":
+        return None
+    versions = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        if len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isdigit():
+            versions.append(int(tag[1:-1]))
+    return versions
+
+def check_version(entity: Any, expected_versions: Optional[List[int]]) -> None:
+    """Raise VersionConflictError unless the entity is at an accepted version"""
+    if entity is not None and expected_versions is not None and entity.version not in expected_versions:
+        raise VersionConflictError(f"Resource was modified, current version is {entity.version}")
+
+def entity_validator(entity: Any) -> Validator:
+    """Build the validators of a single entity from its version and updated_at"""
+    return Validator(format_etag(entity.version), entity.updated_at)
+
+def weak_etag(*parts: Any) -> str:
+    """Build a weak entity tag from the values describing a response"""
+    digest = hashlib.md5("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest[:16]}"'
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def is_not_modified(request: Request, validator: Validator) -> bool:
+    """
+    Evaluate If-None-Match and If-Modified-Since against a response's validators
+
+    If-None-Match compares weakly and, when present, If-Modified-Since is
+    ignored. Dates have second precision, so a change within the second of
+    Last-Modified is only detected through the ETag.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        etag = _opaque_tag(validator.etag)
+        return any(_opaque_tag(tag) == etag for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or validator.last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return _as_utc(validator.last_modified).replace(microsecond=0) <= since
+
+def _as_utc(value: datetime) -> datetime:
+    # Timestamps are stored as naive UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+def _validator_headers(validator: Validator) -> dict:
+    headers = {"ETag": validator.etag, "Cache-Control": "private, no-cache"}
+    if validator.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(validator.last_modified), usegmt=True)
+    return headers
+
+def set_validators(response: Response, validator: Validator) -> None:
+    """Send a response's validators, asking clients to revalidate before reuse"""
+    response.headers.update(_validator_headers(validator))
+
+def not_modified(validator: Validator) -> Response:
+    """Build the bodiless 304 response for unchanged content"""
+    return Response(status_code=304, headers=_validator_headers(validator))
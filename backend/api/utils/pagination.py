@@ -0,0 +1,195 @@
+import base64
+import hashlib
+import hmac
+import json
+from enum import Enum
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import BigInteger, String, case, cast, column, func, literal_column, select, table
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import ColumnElement
+
+from api.config import settings
+from api.utils.etag import Validator, weak_etag
+
+class CountMode(str, Enum):
+    """How the total row count of a paginated list is computed"""
+    EXACT = "exact"
+    ESTIMATE = "estimate"
+    NONE = "none"
+
+class SortOrder(str, Enum):
+    """Direction of a sorted list"""
+    ASC = "asc"
+    DESC = "desc"
+
+class Page(NamedTuple):
+    """A page of rows, the cursor of the next page and the total count"""
+    items: List[Any]
+    next_cursor: Optional[str]
+    count: Optional[int] = None
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+def _cursor_signature(payload: str) -> str:
+    return _b64encode(hmac.new(settings.SECRET_KEY.encode(), payload.encode(), hashlib.sha256).digest()[:12])
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode the sort key of the last row of a page into an opaque cursor
+
+    The cursor is signed, so clients cannot make up positions to seek to.
+
+    Args:
+        values: Sort key values of the last row (e.g. its ID)
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = _b64encode(json.dumps(list(values), separators=(",", ":"), default=str).encode())
+    return f"{payload}.{_cursor_signature(payload)}"
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """
+    Decode a cursor produced by `encode_cursor`
+
+    Raises:
+        ValueError: If the cursor is malformed or its signature does not match
+    """
+    payload, _, signature = cursor.partition(".")
+    if not hmac.compare_digest(signature.encode(), _cursor_signature(payload).encode()):
+        raise ValueError("Invalid cursor")
+    try:
+        values = json.loads(_b64decode(payload))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or not values:
+        raise ValueError("Invalid cursor")
+    return values
+
+def decode_id_cursor(cursor: Optional[str]) -> Optional[str]:
+    """Decode a cursor over the ID column, returning the last seen ID"""
+    if cursor is None:
+        return None
+    values = decode_cursor(cursor)
+    if len(values) != 1 or not isinstance(values[0], str):
+        raise ValueError("Invalid cursor")
+    return values[0]
+
+def split_page(rows: Sequence[Any], limit: int, count: Optional[int] = None,
+               key: Optional[Callable[[Any], Sequence[Any]]] = None) -> Page:
+    """
+    Split rows fetched with `limit + 1` into the page and the next cursor
+
+    Args:
+        key: Returns the sort key values of a row; defaults to its ID
+
+    Returns:
+        The page, whose `next_cursor` is None on the last page
+    """
+    items = list(rows[:limit])
+    if len(rows) > limit and items:
+        values = key(items[-1]) if key is not None else (items[-1].id,)
+        return Page(items, encode_cursor(*values), count)
+    return Page(items, None, count)
+
+def count_column(model: Any, mode: CountMode, *criteria: ColumnElement) -> Optional[ColumnElement]:
+    """
+    Build a scalar subquery returning the row count of a model
+
+    In estimate mode the planner's estimate from pg_class is used once it
+    reaches PAGINATION_ESTIMATE_MIN_ROWS; smaller or never analyzed tables,
+    and filtered lists, are counted exactly.
+
+    Returns:
+        The count expression, or None when mode is NONE
+    """
+    if mode == CountMode.NONE:
+        return None
+
+    exact = select(func.count()).select_from(model).where(*criteria).scalar_subquery()
+    if mode == CountMode.EXACT or criteria:
+        return exact
+
+    estimate = (
+        select(column("reltuples"))
+        .select_from(table("pg_class"))
+        .where(column("oid") == func.to_regclass(model.__tablename__))
+        .scalar_subquery()
+    )
+    return case(
+        (estimate >= settings.PAGINATION_ESTIMATE_MIN_ROWS, cast(estimate, BigInteger)),
+        else_=exact,
+    )
+
+async def fetch_page(db: AsyncSession, query: Select, total: Optional[ColumnElement],
+                     validator: Optional[Validator] = None) -> tuple:
+    """
+    Run a page query over columns with the total count attached as an extra column
+
+    The page and its count come back in one round trip; only an empty page,
+    which has no row to carry the count, costs a second query. Given the
+    page's validator, its total is reused instead of counting again and an
+    empty page is not queried at all.
+
+    Returns:
+        Tuple of (rows, count), where rows are column rows (carrying a
+        `total` attribute when counted) and count is None when `total` is None
+    """
+    if validator is not None:
+        if validator.rows == 0:
+            return [], validator.total
+        result = await db.execute(query)
+        return result.all(), validator.total
+
+    if total is None:
+        result = await db.execute(query)
+        return result.all(), None
+
+    result = await db.execute(query.add_columns(total.label("total")))
+    rows = result.all()
+    if rows:
+        return rows, rows[0].total
+
+    result = await db.execute(select(total))
+    return [], result.scalar()
+
+async def fetch_page_validator(db: AsyncSession, query: Select, total: Optional[ColumnElement],
+                               total_in_etag: bool = True) -> Validator:
+    """
+    Compute the validators of a page without loading or sending its rows
+
+    The page query is aggregated server side into its row count, latest
+    updated_at and a digest of its rows' IDs and versions, so the weak ETag
+    changes whenever a row of the page is written, or rows enter or leave
+    it. Deletions do not move Last-Modified; only the ETag sees them.
+
+    Args:
+        query: Page query over a model with `version` and `updated_at`
+        total: Count expression included in the response, if any
+        total_in_etag: Whether a change of the total changes the ETag; off
+            for estimates, which drift without any write to the page
+
+    Returns:
+        The page's weak ETag and Last-Modified, with its total and row
+        count for `fetch_page` to reuse
+    """
+    page = query.subquery()
+    row_key = page.c.id.concat(":").concat(cast(page.c.version, String))
+    digest = func.md5(func.coalesce(
+        func.string_agg(row_key, aggregate_order_by(literal_column("','"), page.c.id)), ""
+    ))
+    columns = [func.count(), func.max(page.c.updated_at), digest]
+    if total is not None:
+        columns.append(total)
+    result = await db.execute(select(*columns))
+    row = result.one()
+    count = row[3] if total is not None else None
+    tagged = row if total_in_etag else row[:3]
+    return Validator(weak_etag(*tagged), row[1], count, row[0])
@@ -1,7 +1,96 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
 from passlib.context import CryptContext
 
-# Create password context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from api.config import settings
+
+# Create password context. Hashes whose cost differs from BCRYPT_ROUNDS are
+# reported as needing an update, which lets logins rehash them transparently.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+class PasswordHasherBusyError(Exception):
+    """Raised when too many password operations are already waiting"""
+
+class PasswordHasherPool:
+    """
+    Bounded thread pool for bcrypt work
+
+    bcrypt releases the GIL, so running it on worker threads keeps the event
+    loop responsive while at most `max_workers` hashes run at once. Callers
+    beyond `max_queue` waiting operations are rejected instead of piling up.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hasher")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a password operation on the pool and wait for its result"""
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise PasswordHasherBusyError("Too many password operations in progress")
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queued)
+
+        # Counted by the executor future rather than around the await: a
+        # cancelled caller stops waiting, but an operation already running
+        # keeps its thread until it finishes
+        future = self._executor.submit(self._call, func, args)
+        future.add_done_callback(self._done)
+        return await asyncio.wrap_future(future)
+
+    def _call(self, func: Callable[..., Any], args: Tuple[Any, ...]) -> Any:
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        return func(*args)
+
+    def _done(self, future: Future) -> None:
+        with self._lock:
+            if future.cancelled():
+                # Cancelled while queued, so it never started
+                self.queued -= 1
+                self.cancelled += 1
+            else:
+                self.running -= 1
+                self.completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool counters"""
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "queue_depth": self.queued,
+            "max_queue_depth": self.max_queue_depth,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+        }
+
+password_hasher = PasswordHasherPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
 
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt"""
@@ -10,3 +99,17 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
     return pwd_context.verify(plain_password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the password hasher pool"""
+    return await password_hasher.run(pwd_context.hash, password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password on the password hasher pool
+
+    Returns:
+        Tuple of (valid, new hash); the new hash is set when the stored hash
+        was made with a different cost and should be replaced
+    """
+    return await password_hasher.run(pwd_context.verify_and_update, plain_password, hashed_password)
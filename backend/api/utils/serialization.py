@@ -0,0 +1,36 @@
+from typing import Any, Optional, Type
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+class ResponseEncoder:
+    """
+    Precompiled JSON encoder for a response schema
+
+    Validates the data once, from attributes of column rows or entities,
+    and dumps it to JSON bytes, both inside pydantic-core. Routes return
+    the resulting Response, which FastAPI sends as is, skipping its own
+    `response_model` validation and the dict round trip through the stdlib
+    json encoder; `response_model` still documents the schema.
+    """
+
+    def __init__(self, schema: Type[Any]):
+        self.adapter = TypeAdapter(schema)
+
+    def encode(self, data: Any) -> bytes:
+        """Validate and serialize data to JSON bytes"""
+        return self.adapter.dump_json(self.adapter.validate_python(data, from_attributes=True))
+
+    def response(self, data: Any, response: Optional[Response] = None, status_code: int = 200) -> Response:
+        """
+        Build a JSON response
+
+        Args:
+            response: The route's injected Response, whose headers are copied
+        """
+        encoded = Response(content=self.encode(data), status_code=status_code, media_type="application/json")
+        if response is not None:
+            for name, value in response.headers.items():
+                if name != "content-length":
+                    encoded.headers[name] = value
+        return encoded
@@ -0,0 +1,155 @@
+import codecs
+import csv
+import io
+import json
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Sequence, Tuple
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Split a byte stream into text lines without buffering the whole body
+
+    Args:
+        chunks: Async iterator of raw body chunks (e.g. `request.stream()`)
+
+    Yields:
+        Decoded lines without their trailing newline
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+async def iter_records(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Parse CSV (with a header row) or NDJSON lines into dicts
+
+    Args:
+        lines: Async iterator of text lines
+        fmt: Either "csv" or "ndjson"
+
+    Yields:
+        Tuples of (row number, record, parse error); exactly one of record
+        and parse error is set. Blank lines are skipped.
+    """
+    if fmt == "csv":
+        async for record in _iter_csv_records(lines):
+            yield record
+        return
+
+    row_number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield row_number, None, "Expected a JSON object"
+            continue
+        yield row_number, record, None
+
+class _LineFeed:
+    """Lines handed to a csv reader as they arrive; stops when none are pending"""
+
+    def __init__(self):
+        self.lines: Deque[str] = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+async def _iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    # csv.reader pulls lines synchronously and starts each record afresh, so
+    # it is handed the lines of one record at a time followed by a sentinel.
+    # Reading past them (line_num) means a quoted field continues on lines
+    # not received yet; the record is parsed again once the next one is.
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    header: Optional[List[str]] = None
+    row_number = 0
+    pending: List[str] = []
+    async for line in lines:
+        if not pending and not line.strip():
+            continue
+        pending.append(line + "\n")
+        feed.lines.extend(pending)
+        feed.lines.append("\n")
+        start = reader.line_num
+        values, error = None, None
+        try:
+            values = next(reader)
+        except csv.Error as e:
+            # e.g. a quoted field over the field size limit; resume after it
+            error = f"Invalid CSV: {e}"
+        feed.lines.clear()
+        if error is None and reader.line_num - start > len(pending):
+            continue
+        pending = []
+
+        if header is None:
+            if error is not None:
+                yield 0, None, error
+                return
+            header = [value.strip() for value in values]
+            continue
+        row_number += 1
+        if error is not None:
+            yield row_number, None, error
+        elif len(values) != len(header):
+            yield row_number, None, f"Expected {len(header)} columns, got {len(values)}"
+        else:
+            yield row_number, dict(zip(header, values)), None
+
+    if pending and header is not None:
+        # Unterminated quoted field at the end of the body
+        yield row_number + 1, None, "Unexpected end of data inside a quoted field"
+
+def _export_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+async def encode_rows(partitions: AsyncIterator[Sequence[Any]], columns: Sequence[str], fmt: str) -> AsyncIterator[bytes]:
+    """
+    Encode batches of rows as CSV (with a header row) or NDJSON
+
+    Args:
+        partitions: Async iterator of row batches, each row indexable by column name
+        columns: Column names, in output order
+        fmt: Either "csv" or "ndjson"
+
+    Yields:
+        One encoded chunk per batch, so memory stays bounded by the batch size
+    """
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield buffer.getvalue().encode()
+
+    async for rows in partitions:
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerows([_export_value(row[column]) for column in columns] for row in rows)
+            chunk = buffer.getvalue()
+        else:
+            chunk = "".join(
+                json.dumps({column: _export_value(row[column]) for column in columns}) + "\n"
+                for row in rows
+            )
+        yield chunk.encode()
@@ -0,0 +1,21 @@
+from api.utils.asgi import get_client_address, parse_networks
+
+def _scope(peer: str, *forwarded: str):
+    return {"client": (peer, 5000), "headers": [(b"x-forwarded-for", value.encode()) for value in forwarded]}
+
+def test_untrusted_peer_is_the_client():
+    proxies = parse_networks(["10.0.0.0/8"])
+    assert get_client_address(_scope("203.0.113.7", "198.51.100.1"), proxies) == "203.0.113.7"
+    assert get_client_address(_scope("10.0.0.2", "198.51.100.1"), []) == "10.0.0.2"
+
+def test_client_behind_trusted_proxies():
+    proxies = parse_networks(["10.0.0.0/8", " 192.0.2.1", ""])
+    # Spoofed hop, client, then a second proxy; headers may repeat
+    scope = _scope("10.0.0.2", "1.2.3.4, 198.51.100.1", "192.0.2.1")
+    assert get_client_address(scope, proxies) == "198.51.100.1"
+
+def test_only_proxies_in_chain():
+    proxies = parse_networks(["10.0.0.0/8"])
+    assert get_client_address(_scope("10.0.0.2", "10.0.0.3"), proxies) == "10.0.0.3"
+    assert get_client_address(_scope("10.0.0.2"), proxies) == "10.0.0.2"
+    assert get_client_address({"headers": []}, proxies) is None
@@ -0,0 +1,77 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from starlette.requests import Request
+
+from api.utils.etag import (
+    Validator,
+    VersionConflictError,
+    check_version,
+    format_etag,
+    is_not_modified,
+    not_modified,
+    parse_if_match,
+    weak_etag,
+)
+
+def _request(**headers):
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+def test_if_match_accepts_our_strong_tags():
+    assert parse_if_match(format_etag(3)) == [3]
+    assert parse_if_match(' "3" , "4",W/"5", "x", ""') == [3, 4]
+    # Only weak or foreign tags: nothing can match
+    assert parse_if_match('W/"3"') == []
+
+def test_missing_or_wildcard_if_match_accepts_any_version():
+    assert parse_if_match(None) is None
+    assert parse_if_match(" * ") is None
+
+def test_check_version():
+    row = SimpleNamespace(version=4)
+    check_version(row, None)
+    check_version(row, [3, 4])
+    # Missing rows are reported as not found, not as a conflict
+    check_version(None, [1])
+    with pytest.raises(VersionConflictError):
+        check_version(row, [3])
+    with pytest.raises(VersionConflictError):
+        check_version(row, [])
+
+def test_weak_list_etag_follows_every_part():
+    tag = weak_etag(3, datetime(2024, 1, 1), "digest", 120)
+    assert tag.startswith('W/"') and tag.endswith('"') and len(tag) == 20
+    assert tag == weak_etag(3, datetime(2024, 1, 1), "digest", 120)
+    assert tag != weak_etag(3, datetime(2024, 1, 1), "digest", 121)
+    assert tag != weak_etag(3, datetime(2024, 1, 1), "other", 120)
+
+def test_if_none_match_compares_weakly():
+    validator = Validator(weak_etag("page"), None)
+    opaque = validator.etag[2:]
+    assert is_not_modified(_request(if_none_match=validator.etag), validator)
+    assert is_not_modified(_request(if_none_match=f'"other", {opaque}'), validator)
+    assert is_not_modified(_request(if_none_match="*"), validator)
+    assert not is_not_modified(_request(if_none_match='W/"other"'), validator)
+    assert not is_not_modified(_request(), validator)
+
+def test_if_modified_since_has_second_precision():
+    validator = Validator('"2"', datetime(2024, 5, 1, 12, 0, 0, 500000))
+    assert is_not_modified(_request(if_modified_since="Wed, 01 May 2024 12:00:00 GMT"), validator)
+    assert not is_not_modified(_request(if_modified_since="Wed, 01 May 2024 11:59:59 GMT"), validator)
+    assert not is_not_modified(_request(if_modified_since="yesterday"), validator)
+    # If-None-Match wins over If-Modified-Since
+    assert not is_not_modified(
+        _request(if_none_match='"1"', if_modified_since="Wed, 01 May 2024 12:00:00 GMT"), validator
+    )
+    assert not is_not_modified(_request(if_modified_since="Wed, 01 May 2024 12:00:00 GMT"), Validator('"2"', None))
+
+def test_not_modified_response_carries_the_validators():
+    validator = Validator('"2"', datetime(2024, 5, 1, 12, 0, 0, tzinfo=timezone.utc))
+    response = not_modified(validator)
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == '"2"'
+    assert response.headers["last-modified"] == "Wed, 01 May 2024 12:00:00 GMT"
+    assert response.headers["cache-control"] == "private, no-cache"
@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+import pytest
+
+from api.utils.pagination import decode_cursor, decode_id_cursor, encode_cursor, split_page
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("sku-1", 42, None)
+    assert decode_cursor(cursor) == ["sku-1", 42, None]
+    assert decode_id_cursor(encode_cursor("wh_1")) == "wh_1"
+    assert decode_id_cursor(None) is None
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not a cursor",
+    # Valid JSON, but not signed
+    "WyJ3aF8xIl0",
+    "WyJ3aF8xIl0.",
+])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+def test_tampered_cursor_is_rejected():
+    payload, _, signature = encode_cursor("wh_1").partition(".")
+    forged, _, _ = encode_cursor("wh_9").partition(".")
+    with pytest.raises(ValueError):
+        decode_cursor(f"{forged}.{signature}")
+    altered = signature[:-1] + ("B" if signature.endswith("A") else "A")
+    with pytest.raises(ValueError):
+        decode_cursor(f"{payload}.{altered}")
+
+def test_id_cursor_needs_a_single_id():
+    with pytest.raises(ValueError):
+        decode_id_cursor(encode_cursor("wh_1", "wh_2"))
+    with pytest.raises(ValueError):
+        decode_id_cursor(encode_cursor(1))
+
+def test_split_page_sets_the_next_cursor_only_when_more_rows_exist():
+    rows = [SimpleNamespace(id=f"wh_{index}", sku=f"sku-{index}") for index in range(3)]
+    page = split_page(rows, 2, count=10)
+    assert [row.id for row in page.items] == ["wh_0", "wh_1"]
+    assert decode_id_cursor(page.next_cursor) == "wh_1"
+    assert page.count == 10
+
+    page = split_page(rows, 2, key=lambda row: (row.sku, row.id))
+    assert decode_cursor(page.next_cursor) == ["sku-1", "wh_1"]
+
+    last = split_page(rows, 3)
+    assert last.next_cursor is None and len(last.items) == 3
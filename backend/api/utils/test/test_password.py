@@ -0,0 +1,46 @@
+import asyncio
+import threading
+
+import pytest
+
+def test_cancelled_callers_do_not_free_queue_slots_of_running_operations():
+    from api.utils.password import PasswordHasherBusyError, PasswordHasherPool
+
+    pool = PasswordHasherPool(max_workers=1, max_queue=1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    async def main():
+        running = asyncio.create_task(pool.run(blocking))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        queued = asyncio.create_task(pool.run(str, 1))
+        await asyncio.sleep(0)
+        assert (pool.running, pool.queued) == (1, 1)
+        with pytest.raises(PasswordHasherBusyError):
+            await pool.run(str, 2)
+
+        # Cancelled while queued: it never runs and frees its slot
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        assert (pool.running, pool.queued, pool.cancelled) == (1, 0, 1)
+
+        # Cancelled while running: the thread stays busy, so the queue still fills up
+        running.cancel()
+        await asyncio.gather(running, return_exceptions=True)
+        assert (pool.running, pool.queued) == (1, 0)
+        waiting = asyncio.create_task(pool.run(str, 3))
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordHasherBusyError):
+            await pool.run(str, 4)
+
+        release.set()
+        assert await waiting == "3"
+        assert (pool.running, pool.queued, pool.completed, pool.rejected) == (0, 0, 2, 2)
+        assert pool.stats()["queue_depth"] == 0
+
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+import json
+from datetime import datetime
+from enum import Enum
+from types import SimpleNamespace
+from typing import List, Optional
+
+import pytest
+from fastapi import Response
+from pydantic import BaseModel, ValidationError
+
+from api.utils.serialization import ResponseEncoder
+
+class ItemResponse(BaseModel):
+    id: str
+    quantity: int
+    updated_at: datetime
+    note: Optional[str] = None
+
+class ItemPage(BaseModel):
+    items: List[ItemResponse]
+    next_cursor: Optional[str] = None
+
+def _row(item_id: str, quantity: int):
+    # Like a column row or entity: attributes, extra ones included
+    return SimpleNamespace(id=item_id, quantity=quantity, updated_at=datetime(2024, 5, 1, 12, 30), note=None, secret="x")
+
+def test_encodes_attribute_rows_like_the_schema():
+    encoder = ResponseEncoder(ItemPage)
+    data = {"items": [_row("a", 1), _row("b", 2)], "next_cursor": "c"}
+    assert json.loads(encoder.encode(data)) == {
+        "items": [
+            {"id": "a", "quantity": 1, "updated_at": "2024-05-01T12:30:00", "note": None},
+            {"id": "b", "quantity": 2, "updated_at": "2024-05-01T12:30:00", "note": None},
+        ],
+        "next_cursor": "c",
+    }
+
+def test_invalid_data_is_rejected():
+    with pytest.raises(ValidationError):
+        ResponseEncoder(ItemResponse).encode(SimpleNamespace(id="a", quantity="many", updated_at=None))
+
+def test_response_keeps_the_route_headers():
+    route_response = Response()
+    route_response.headers["ETag"] = '"3"'
+    response = ResponseEncoder(ItemResponse).response(_row("a", 1), route_response, status_code=201)
+    assert response.status_code == 201
+    assert response.media_type == "application/json"
+    assert response.headers["etag"] == '"3"'
+    assert int(response.headers["content-length"]) == len(response.body)
+    assert json.loads(response.body)["id"] == "a"
+
+def test_enums_are_sent_by_value_and_secrets_left_out():
+    class Role(str, Enum):
+        ADMIN = "admin"
+
+    class UserResponse(BaseModel):
+        id: str
+        role: Role
+
+    # A user entity carries its password hash and API token digest
+    user = SimpleNamespace(id="us_1", role=Role.ADMIN, password_hash="$2b$hash", api_token="digest")
+    encoded = ResponseEncoder(List[UserResponse]).encode([user])
+    assert json.loads(encoded) == [{"id": "us_1", "role": "admin"}]
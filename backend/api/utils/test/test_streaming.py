@@ -0,0 +1,43 @@
+import asyncio
+
+from api.utils.streaming import iter_lines, iter_records
+
+def _parse(body: str, fmt: str = "csv"):
+    async def chunks():
+        # Split mid-line so records arrive across chunks
+        data = body.encode()
+        for start in range(0, len(data), 7):
+            yield data[start:start + 7]
+
+    async def main():
+        return [record async for record in iter_records(iter_lines(chunks()), fmt)]
+
+    return asyncio.run(main())
+
+def test_quote_inside_unquoted_field_is_literal():
+    records = _parse('sku,quantity\n5" pipe,1\nbolt,2\nnut,3\n')
+    assert records == [
+        (1, {"sku": '5" pipe', "quantity": "1"}, None),
+        (2, {"sku": "bolt", "quantity": "2"}, None),
+        (3, {"sku": "nut", "quantity": "3"}, None),
+    ]
+
+def test_quoted_fields_span_lines():
+    records = _parse('sku,note\n"a\n\nb",x\nc,"1\n2"\r\nd,y')
+    assert records == [
+        (1, {"sku": "a\n\nb", "note": "x"}, None),
+        (2, {"sku": "c", "note": "1\n2"}, None),
+        (3, {"sku": "d", "note": "y"}, None),
+    ]
+
+def test_bad_rows_are_reported_and_skipped():
+    records = _parse('sku,quantity\n\na,1,extra\nb,2\nc,"open\n')
+    assert records == [
+        (1, None, "Expected 2 columns, got 3"),
+        (2, {"sku": "b", "quantity": "2"}, None),
+        (3, None, "Unexpected end of data inside a quoted field"),
+    ]
+
+def test_ndjson_records():
+    records = _parse('{"sku": "a"}\n\n[1]\n{"sku":', "ndjson")
+    assert [(row, record) for row, record, _ in records] == [(1, {"sku": "a"}), (2, None), (3, None)]
@@ -0,0 +1,112 @@
+"""
+Concurrency benchmark for inventory quantity adjustments
+
+Runs many concurrent pickers against a single inventory row, first with the
+read-then-write `update_inventory` path and then with the atomic
+`adjust_quantity` path, and reports throughput and lost updates for each.
+
+Usage (against a disposable database from DATABASE_URL):
+    python -m benchmarks.adjust_concurrency --workers 32 --operations 200
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from api.database import async_session_factory, engine, init_db
+from api.modules.item_unit.dto.input import ItemUnitCreate
+from api.modules.item_unit.service.item_unit_service import ItemUnitService
+from api.modules.warehouse.dto.input import WarehouseCreate
+from api.modules.warehouse.service.warehouse_service import WarehouseService
+from api.modules.warehouse_inventory.dto.input import WarehouseInventoryCreate, WarehouseInventoryUpdate
+from api.modules.warehouse_inventory.service.warehouse_inventory_service import WarehouseInventoryService
+from api.utils.id_generator import generate_id, Prefix
+
+async def setup_inventory(initial_quantity: int):
+    """Create a throwaway warehouse, unit and inventory row"""
+    suffix = generate_id(Prefix.WAREHOUSE)
+    async with async_session_factory() as session:
+        warehouse = await WarehouseService(session).create_warehouse(WarehouseCreate(location=f"bench-{suffix}"))
+        unit = await ItemUnitService(session).create_item_unit(ItemUnitCreate(unit=f"bench-{suffix}", quantity=1))
+        inventory = await WarehouseInventoryService(session).create_inventory(WarehouseInventoryCreate(
+            warehouse_id=warehouse.id,
+            sku="BENCH-SKU",
+            quantity=initial_quantity,
+            unit_id=unit.id,
+        ))
+        await session.commit()
+        return warehouse.id, unit.id, inventory.id
+
+async def teardown_inventory(warehouse_id: str, unit_id: str):
+    async with async_session_factory() as session:
+        await WarehouseService(session).delete_warehouse(warehouse_id)
+        await ItemUnitService(session).delete_item_unit(unit_id)
+        await session.commit()
+
+async def read_modify_write(inventory_id: str, delta: int):
+    async with async_session_factory() as session:
+        service = WarehouseInventoryService(session)
+        inventory = await service.get_inventory_by_id(inventory_id)
+        await service.update_inventory(inventory_id, WarehouseInventoryUpdate(quantity=int(inventory.quantity) + delta))
+        await session.commit()
+
+async def atomic_adjust(inventory_id: str, delta: int):
+    async with async_session_factory() as session:
+        await WarehouseInventoryService(session).adjust_quantity(inventory_id, delta)
+        await session.commit()
+
+async def run_scenario(name: str, operation, workers: int, operations: int, initial_quantity: int):
+    warehouse_id, unit_id, inventory_id = await setup_inventory(initial_quantity)
+    errors = 0
+
+    async def worker(worker_index: int):
+        nonlocal errors
+        # Alternate pickers and restockers so the expected result is known
+        delta = 1 if worker_index % 2 == 0 else -1
+        for _ in range(operations):
+            try:
+                await operation(inventory_id, delta)
+            except Exception:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(workers)))
+    elapsed = time.perf_counter() - started
+
+    async with async_session_factory() as session:
+        inventory = await WarehouseInventoryService(session).get_inventory_by_id(inventory_id)
+        final_quantity = inventory.quantity
+    await teardown_inventory(warehouse_id, unit_id)
+
+    restockers = (workers + 1) // 2
+    pickers = workers // 2
+    expected = initial_quantity + (restockers - pickers) * operations
+    total = workers * operations
+    return {
+        "scenario": name,
+        "operations": total,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "ops_per_second": round(total / elapsed, 1),
+        "expected_quantity": expected,
+        "final_quantity": final_quantity,
+        "lost_updates": abs(expected - final_quantity),
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--operations", type=int, default=200, help="Operations per worker")
+    parser.add_argument("--initial-quantity", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    await init_db()
+    results = [
+        await run_scenario("read_modify_write", read_modify_write, args.workers, args.operations, args.initial_quantity),
+        await run_scenario("atomic_adjust", atomic_adjust, args.workers, args.operations, args.initial_quantity),
+    ]
+    await engine.dispose()
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
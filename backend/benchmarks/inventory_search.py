@@ -0,0 +1,175 @@
+"""
+Latency benchmark for inventory search
+
+Seeds a synthetic data set (10M inventory rows by default) directly in
+Postgres, then runs the filtered searches behind GET /api/inventory/
+through the service layer and reports p50/p95/p99 latency per scenario.
+Exits non-zero when a scenario's p95 exceeds --target-ms.
+
+Seeding is skipped when the data set already exists, so the first run is
+slow and later runs measure immediately; --cleanup removes it.
+
+Usage (against a disposable database from DATABASE_URL):
+    python -m benchmarks.inventory_search --rows 10000000 --iterations 200
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+
+from api.database import async_session_factory, engine, init_db
+from api.modules.warehouse_inventory.dto.input import InventoryFilter, InventorySortField
+from api.modules.warehouse_inventory.service.warehouse_inventory_service import WarehouseInventoryService
+from api.utils.pagination import CountMode, SortOrder
+
+TAG = "SEARCHBENCH"
+SEED_BATCH = 1_000_000
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+def warehouse_id(index: int) -> str:
+    return f"wh_{TAG}{index:06d}"
+
+def unit_id(index: int) -> str:
+    return f"iu_{TAG}{index:06d}"
+
+async def seed(rows: int, warehouses: int, units: int):
+    """Insert warehouses, units and inventory rows server side with generate_series"""
+    async with async_session_factory() as session:
+        existing = (await session.execute(
+            text("SELECT count(*) FROM warehouse_inventory WHERE id LIKE :pattern"),
+            {"pattern": f"wi_{TAG}%"}
+        )).scalar()
+        if existing >= rows:
+            return False
+
+        await session.execute(text(
+            "INSERT INTO warehouses (id, location, created_at, updated_at) "
+            "SELECT 'wh_' || :tag || lpad(g::text, 6, '0'), 'search-bench-' || g, now(), now() "
+            "FROM generate_series(0, :count - 1) g ON CONFLICT DO NOTHING"
+        ), {"tag": TAG, "count": warehouses})
+        await session.execute(text(
+            "INSERT INTO item_units (id, unit, quantity, created_at, updated_at) "
+            "SELECT 'iu_' || :tag || lpad(g::text, 6, '0'), 'search-bench-' || g, g + 1, now(), now() "
+            "FROM generate_series(0, :count - 1) g ON CONFLICT DO NOTHING"
+        ), {"tag": TAG, "count": units})
+        await session.commit()
+
+    for start in range(existing, rows, SEED_BATCH):
+        stop = min(start + SEED_BATCH, rows)
+        async with async_session_factory() as session:
+            # SKUs are unique 8-digit codes, so a 6-digit prefix matches ~100 rows
+            await session.execute(text(
+                "INSERT INTO warehouse_inventory (id, warehouse_id, sku, quantity, unit_id, created_at, updated_at) "
+                "SELECT 'wi_' || :tag || lpad(g::text, 12, '0'), "
+                "'wh_' || :tag || lpad((g % :warehouses)::text, 6, '0'), "
+                "'SKU-' || lpad(g::text, 8, '0'), "
+                "(g * 7919) % 1000, "
+                "'iu_' || :tag || lpad((g % :units)::text, 6, '0'), now(), now() "
+                "FROM generate_series(:start, :stop - 1) g ON CONFLICT DO NOTHING"
+            ), {"tag": TAG, "warehouses": warehouses, "units": units, "start": start, "stop": stop})
+            await session.commit()
+        print(f"seeded {stop}/{rows} rows", file=sys.stderr)
+
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("ANALYZE warehouse_inventory"))
+    return True
+
+async def cleanup():
+    async with async_session_factory() as session:
+        # Inventory rows go with their warehouse (ON DELETE CASCADE)
+        await session.execute(text("DELETE FROM warehouses WHERE id LIKE :pattern"), {"pattern": f"wh_{TAG}%"})
+        await session.execute(text("DELETE FROM item_units WHERE id LIKE :pattern"), {"pattern": f"iu_{TAG}%"})
+        await session.commit()
+
+def scenarios(rows: int, warehouses: int, units: int):
+    """Search parameter generators, one per scenario"""
+    def sku_prefix():
+        return f"SKU-{random.randrange(rows) // 100:06d}"
+
+    return {
+        "warehouse": lambda: dict(filters=InventoryFilter(warehouse_id=warehouse_id(random.randrange(warehouses)))),
+        "warehouse_sorted_by_sku": lambda: dict(
+            filters=InventoryFilter(warehouse_id=warehouse_id(random.randrange(warehouses))),
+            sort=InventorySortField.SKU,
+        ),
+        "sku_prefix": lambda: dict(filters=InventoryFilter(sku_prefix=sku_prefix())),
+        "sku_contains": lambda: dict(filters=InventoryFilter(sku_contains=f"{random.randrange(rows):08d}"[2:7])),
+        "unit": lambda: dict(filters=InventoryFilter(unit_id=unit_id(random.randrange(units)))),
+        "warehouse_quantity_range": lambda: dict(
+            filters=InventoryFilter(
+                warehouse_id=warehouse_id(random.randrange(warehouses)),
+                min_quantity=100,
+                max_quantity=200,
+            ),
+            sort=InventorySortField.QUANTITY,
+            order=SortOrder.DESC,
+        ),
+    }
+
+async def measure(name, make_params, iterations: int, limit: int):
+    latencies = []
+    returned = 0
+    async with async_session_factory() as session:
+        service = WarehouseInventoryService(session)
+        for _ in range(iterations):
+            params = make_params()
+            started = time.perf_counter()
+            page = await service.get_all_inventory(limit=limit, count_mode=CountMode.NONE, **params)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if page.next_cursor:
+                # Follow the cursor once, as a client paging through results would
+                started = time.perf_counter()
+                await service.get_all_inventory(limit=limit, cursor=page.next_cursor, count_mode=CountMode.NONE, **params)
+                latencies.append((time.perf_counter() - started) * 1000)
+            returned += len(page.items)
+            await session.rollback()
+    return {
+        "scenario": name,
+        "iterations": iterations,
+        "queries": len(latencies),
+        "avg_rows": round(returned / iterations, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--warehouses", type=int, default=100)
+    parser.add_argument("--units", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=200, help="Searches per scenario")
+    parser.add_argument("--limit", type=int, default=50, help="Page size")
+    parser.add_argument("--target-ms", type=float, default=20.0, help="Maximum p95 per scenario")
+    parser.add_argument("--cleanup", action="store_true", help="Delete the data set and exit")
+    args = parser.parse_args()
+
+    await init_db()
+    if args.cleanup:
+        await cleanup()
+        await engine.dispose()
+        return 0
+
+    await seed(args.rows, args.warehouses, args.units)
+    results = []
+    for name, make_params in scenarios(args.rows, args.warehouses, args.units).items():
+        # One untimed run to warm the connection and its statement cache
+        await measure(name, make_params, 1, args.limit)
+        results.append(await measure(name, make_params, args.iterations, args.limit))
+    await engine.dispose()
+
+    print(json.dumps({"rows": args.rows, "target_ms": args.target_ms, "results": results}, indent=2))
+    return 0 if all(result["p95_ms"] <= args.target_ms for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
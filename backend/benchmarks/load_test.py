@@ -0,0 +1,354 @@
+"""
+HTTP load test over every API route family
+
+Drives a weighted mix of requests (login, lookups, lists and searches,
+CRUD, quantity adjustments, transfers, summaries and ledger reads) with
+concurrent clients through the in-process ASGI app, against the data set
+of `benchmarks.seed`. Reports overall throughput and, per route template,
+request count, throughput, error count and p50/p95/p99 latency as JSON.
+
+Save a run with --output and pass it as --baseline to a later run (e.g.
+the next release) to fail when any route's p95 regresses by more than
+--max-regression.
+
+Bulk import, jobs and registration are left out: they are long running or
+bcrypt bound and have their own benchmarks. All clients share two
+principals, so per-principal rate limits are off unless --rate-limits is
+given; load shedding stays on.
+
+Usage (against a disposable database from DATABASE_URL, seeded first):
+    python -m benchmarks.seed --rows 1000000
+    python -m benchmarks.load_test --concurrency 32 --duration 60 --output run.json
+    python -m benchmarks.load_test --baseline run.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+
+from api.config import settings
+from api.database import engine, init_db
+from api.main import app
+from benchmarks.seed import (
+    PASSWORD, count_seeded, inventory_id, inventory_sku, unit_id, user_email, user_id, warehouse_id,
+)
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+class Recorder:
+    """Latencies and failures per route template"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.recording = False
+
+    def record(self, route: str, seconds: float, ok: bool):
+        if not self.recording:
+            return
+        self.latencies[route].append(seconds * 1000)
+        if not ok:
+            self.errors[route] += 1
+
+    def report(self, duration: float) -> list:
+        results = []
+        for route in sorted(self.latencies):
+            samples = self.latencies[route]
+            results.append({
+                "route": route,
+                "requests": len(samples),
+                "rps": round(len(samples) / duration, 1),
+                "errors": self.errors[route],
+                "p50_ms": round(statistics.median(samples), 2),
+                "p95_ms": round(percentile(samples, 0.95), 2),
+                "p99_ms": round(percentile(samples, 0.99), 2),
+            })
+        return results
+
+class Context:
+    """Shared state of a load test run"""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, sizes: dict):
+        self.client = client
+        self.recorder = recorder
+        self.sizes = sizes
+        self.admin_headers = {}
+        self.member_headers = {}
+        self.list_etags = {}
+
+    async def call(self, route: str, method: str, url: str, ok=(200,), **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.recorder.record(route, time.perf_counter() - started, response.status_code in ok)
+        return response
+
+    def warehouse(self) -> str:
+        return warehouse_id(random.randrange(self.sizes["warehouses"]))
+
+    def unit(self) -> str:
+        return unit_id(random.randrange(self.sizes["units"]))
+
+    def user(self) -> int:
+        return random.randrange(self.sizes["users"])
+
+    def item(self) -> int:
+        return random.randrange(self.sizes["rows"])
+
+async def login(ctx: Context, index: int) -> dict:
+    response = await ctx.call("POST /api/users/login", "POST", "/api/users/login",
+                              json={"email": user_email(index), "password": PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+# Scenarios: one or more requests each, picked at random by weight
+
+async def scenario_login(ctx):
+    await login(ctx, 1 + random.randrange(max(ctx.sizes["users"] - 1, 1)))
+
+async def scenario_me(ctx):
+    await ctx.call("GET /api/users/me", "GET", "/api/users/me", headers=ctx.member_headers)
+
+async def scenario_user_get(ctx):
+    await ctx.call("GET /api/users/{id}", "GET", f"/api/users/{user_id(ctx.user())}", headers=ctx.admin_headers)
+
+async def scenario_user_list(ctx):
+    await ctx.call("GET /api/users/", "GET", "/api/users/", params={"limit": 50}, headers=ctx.admin_headers)
+
+async def scenario_warehouse_get(ctx):
+    await ctx.call("GET /api/warehouses/{id}", "GET", f"/api/warehouses/{ctx.warehouse()}", headers=ctx.member_headers)
+
+async def scenario_warehouse_list(ctx):
+    await ctx.call("GET /api/warehouses/", "GET", "/api/warehouses/", params={"limit": 50}, headers=ctx.member_headers)
+
+async def scenario_warehouse_poll(ctx):
+    # An unchanged poll revalidates with the ETag of the previous one
+    headers = dict(ctx.member_headers)
+    etag = ctx.list_etags.get("warehouses")
+    if etag:
+        headers["If-None-Match"] = etag
+    response = await ctx.call("GET /api/warehouses/ (conditional)", "GET", "/api/warehouses/",
+                              ok=(200, 304), params={"limit": 50}, headers=headers)
+    if response.status_code == 200:
+        ctx.list_etags["warehouses"] = response.headers.get("etag")
+
+async def scenario_warehouse_crud(ctx):
+    response = await ctx.call("POST /api/warehouses/", "POST", "/api/warehouses/", ok=(201,),
+                              json={"location": f"load-test-crud-{time.time_ns()}-{random.random()}"},
+                              headers=ctx.member_headers)
+    if response.status_code != 201:
+        return
+    created = response.json()
+    headers = {**ctx.member_headers, "If-Match": response.headers.get("etag", "*")}
+    await ctx.call("PUT /api/warehouses/{id}", "PUT", f"/api/warehouses/{created['id']}",
+                   json={"location": created["location"] + "-updated"}, headers=headers)
+    await ctx.call("DELETE /api/warehouses/{id}", "DELETE", f"/api/warehouses/{created['id']}", ok=(204,),
+                   headers=ctx.member_headers)
+
+async def scenario_inventory_get(ctx):
+    await ctx.call("GET /api/inventory/{id}", "GET", f"/api/inventory/{inventory_id(ctx.item())}", headers=ctx.member_headers)
+
+async def scenario_inventory_by_warehouse(ctx):
+    await ctx.call("GET /api/inventory/?warehouse_id", "GET", "/api/inventory/",
+                   params={"warehouse_id": ctx.warehouse(), "limit": 50, "count": "none"}, headers=ctx.member_headers)
+
+async def scenario_inventory_sku_prefix(ctx):
+    prefix = inventory_sku(ctx.item())[:-2]
+    await ctx.call("GET /api/inventory/?sku_prefix", "GET", "/api/inventory/",
+                   params={"sku_prefix": prefix, "limit": 50, "count": "none"}, headers=ctx.member_headers)
+
+async def scenario_inventory_sorted(ctx):
+    await ctx.call("GET /api/inventory/?sort=quantity", "GET", "/api/inventory/",
+                   params={"warehouse_id": ctx.warehouse(), "sort": "quantity", "order": "desc",
+                           "min_quantity": 200, "limit": 50, "count": "none"},
+                   headers=ctx.member_headers)
+
+async def scenario_inventory_update(ctx):
+    await ctx.call("PUT /api/inventory/{id}", "PUT", f"/api/inventory/{inventory_id(ctx.item())}",
+                   json={"quantity": random.randrange(100, 1100)}, headers=ctx.member_headers)
+
+async def scenario_inventory_adjust(ctx):
+    await ctx.call("POST /api/inventory/{id}/adjust", "POST", f"/api/inventory/{inventory_id(ctx.item())}/adjust",
+                   json={"quantity": random.choice((-1, 1))}, headers=ctx.member_headers)
+
+async def scenario_inventory_batch_adjust(ctx):
+    adjustments = [{"inventory_id": inventory_id(ctx.item()), "quantity": random.choice((-1, 1))} for _ in range(5)]
+    await ctx.call("POST /api/inventory/adjust", "POST", "/api/inventory/adjust",
+                   json={"adjustments": adjustments}, headers=ctx.member_headers)
+
+async def scenario_inventory_transfer(ctx):
+    index = ctx.item()
+    source = warehouse_id(index % ctx.sizes["warehouses"])
+    destination = ctx.warehouse()
+    if destination == source:
+        return
+    # Moves one unit out and back, so stock stays put across runs
+    for from_id, to_id in ((source, destination), (destination, source)):
+        await ctx.call("POST /api/inventory/transfers", "POST", "/api/inventory/transfers", ok=(200, 400),
+                       json={"source_warehouse_id": from_id, "destination_warehouse_id": to_id,
+                             "sku": inventory_sku(index), "quantity": 1},
+                       headers=ctx.member_headers)
+
+async def scenario_summary(ctx):
+    group_by = random.choice(("sku", "warehouse"))
+    await ctx.call(f"GET /api/inventory/summary?group_by={group_by}", "GET", "/api/inventory/summary",
+                   params={"group_by": group_by, "limit": 50}, headers=ctx.member_headers)
+
+async def scenario_unit_get(ctx):
+    await ctx.call("GET /api/units/{id}", "GET", f"/api/units/{ctx.unit()}", headers=ctx.member_headers)
+
+async def scenario_unit_list(ctx):
+    await ctx.call("GET /api/units/", "GET", "/api/units/", params={"limit": 50}, headers=ctx.member_headers)
+
+async def scenario_unit_crud(ctx):
+    response = await ctx.call("POST /api/units/", "POST", "/api/units/", ok=(201,),
+                              json={"unit": f"lt-{time.time_ns() % 10**12}-{random.randrange(10**6)}", "quantity": 2},
+                              headers=ctx.member_headers)
+    if response.status_code != 201:
+        return
+    created = response.json()
+    await ctx.call("PUT /api/units/{id}", "PUT", f"/api/units/{created['id']}", json={"quantity": 3},
+                   headers={**ctx.member_headers, "If-Match": response.headers.get("etag", "*")})
+    await ctx.call("DELETE /api/units/{id}", "DELETE", f"/api/units/{created['id']}", ok=(204,),
+                   headers=ctx.member_headers)
+
+async def scenario_ledger_movements(ctx):
+    await ctx.call("GET /api/ledger/movements", "GET", "/api/ledger/movements",
+                   params={"warehouse_id": ctx.warehouse(), "limit": 50}, headers=ctx.member_headers)
+
+async def scenario_ledger_stock(ctx):
+    index = ctx.item()
+    await ctx.call("GET /api/ledger/stock", "GET", "/api/ledger/stock",
+                   params={"warehouse_id": warehouse_id(index % ctx.sizes["warehouses"]), "sku": inventory_sku(index),
+                           "at": datetime.now(timezone.utc).isoformat()},
+                   headers=ctx.member_headers)
+
+async def scenario_health(ctx):
+    await ctx.call("GET /health", "GET", "/health")
+
+SCENARIOS = [
+    (1, scenario_login),
+    (4, scenario_me),
+    (2, scenario_user_get),
+    (1, scenario_user_list),
+    (6, scenario_warehouse_get),
+    (3, scenario_warehouse_list),
+    (6, scenario_warehouse_poll),
+    (1, scenario_warehouse_crud),
+    (10, scenario_inventory_get),
+    (8, scenario_inventory_by_warehouse),
+    (4, scenario_inventory_sku_prefix),
+    (3, scenario_inventory_sorted),
+    (3, scenario_inventory_update),
+    (5, scenario_inventory_adjust),
+    (2, scenario_inventory_batch_adjust),
+    (2, scenario_inventory_transfer),
+    (2, scenario_summary),
+    (4, scenario_unit_get),
+    (2, scenario_unit_list),
+    (1, scenario_unit_crud),
+    (2, scenario_ledger_movements),
+    (1, scenario_ledger_stock),
+    (2, scenario_health),
+]
+
+async def worker(ctx: Context, deadline: float):
+    weights = [weight for weight, _ in SCENARIOS]
+    scenarios = [scenario for _, scenario in SCENARIOS]
+    while time.perf_counter() < deadline:
+        scenario = random.choices(scenarios, weights)[0]
+        try:
+            await scenario(ctx)
+        except httpx.HTTPError as e:
+            ctx.recorder.record(f"{scenario.__name__} (transport error)", 0.0, False)
+            print(f"{scenario.__name__}: {e}", file=sys.stderr)
+
+def compare(results: list, baseline_path: str, max_regression: float) -> list:
+    """Return the routes whose p95 regressed beyond the allowed fraction"""
+    with open(baseline_path) as baseline_file:
+        baseline = {entry["route"]: entry for entry in json.load(baseline_file)["routes"]}
+    regressions = []
+    for entry in results:
+        before = baseline.get(entry["route"])
+        if before and before["p95_ms"] > 0 and entry["p95_ms"] > before["p95_ms"] * (1 + max_regression):
+            regressions.append({"route": entry["route"], "baseline_p95_ms": before["p95_ms"], "p95_ms": entry["p95_ms"]})
+    return regressions
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=60.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds before measuring")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for a repeatable request mix")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare p95 latencies against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p95 increase over the baseline")
+    parser.add_argument("--rate-limits", action="store_true", help="Keep per-principal rate limits on")
+    args = parser.parse_args()
+    random.seed(args.seed)
+    settings.RATE_LIMIT_ENABLED = settings.RATE_LIMIT_ENABLED and args.rate_limits
+
+    await init_db()
+    sizes = {
+        "warehouses": await count_seeded("warehouses"),
+        "units": await count_seeded("item_units"),
+        "users": await count_seeded("users"),
+        "rows": await count_seeded("warehouse_inventory"),
+    }
+    if not all(sizes.values()):
+        print("No seeded data set, run `python -m benchmarks.seed` first", file=sys.stderr)
+        return 2
+
+    recorder = Recorder()
+    transport = httpx.ASGITransport(app=app)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits, timeout=60.0) as client:
+        ctx = Context(client, recorder, sizes)
+        ctx.admin_headers = await login(ctx, 0)
+        ctx.member_headers = await login(ctx, 1 % sizes["users"])
+
+        if args.warmup > 0:
+            deadline = time.perf_counter() + args.warmup
+            await asyncio.gather(*(worker(ctx, deadline) for _ in range(args.concurrency)))
+
+        recorder.recording = True
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(worker(ctx, deadline) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+    await engine.dispose()
+
+    routes = recorder.report(elapsed)
+    total = sum(entry["requests"] for entry in routes)
+    report = {
+        "data_set": sizes,
+        "concurrency": args.concurrency,
+        "duration_seconds": round(elapsed, 1),
+        "requests": total,
+        "errors": sum(entry["errors"] for entry in routes),
+        "throughput_rps": round(total / elapsed, 1),
+        "routes": routes,
+    }
+    exit_code = 0
+    if args.baseline:
+        report["regressions"] = compare(routes, args.baseline, args.max_regression)
+        exit_code = 1 if report["regressions"] else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output)
+    print(output)
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
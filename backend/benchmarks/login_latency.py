@@ -0,0 +1,105 @@
+"""
+Login throughput versus latency of unrelated endpoints
+
+Drives concurrent logins through the in-process ASGI app while a probe
+loop hits /health, and reports login throughput together with the probe's
+p50/p99 latency. Run once with --logins 0 for the idle baseline; with
+bcrypt on the event loop the probe p99 grows with the bcrypt cost, with the
+password hasher pool it should stay close to the baseline.
+
+Usage (against a disposable database from DATABASE_URL):
+    python -m benchmarks.login_latency --logins 16 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+from api.database import async_session_factory, engine, init_db
+from api.main import app
+from api.modules.user.dto.input import UserCreate
+from api.modules.user.service.user_service import UserService
+from api.utils.id_generator import generate_id, Prefix
+from api.utils.password import password_hasher
+
+PASSWORD = "benchmark-password"
+
+def percentile(samples, fraction):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+async def create_user() -> tuple:
+    suffix = generate_id(Prefix.USER).lower()
+    async with async_session_factory() as session:
+        service = UserService(session)
+        user = await service.create_user(UserCreate(
+            email=f"{suffix}@bench.example.com",
+            username=f"bench_{suffix}"[:50],
+            password=PASSWORD,
+        ))
+        await session.commit()
+        return user.id, user.email
+
+async def delete_user(user_id: str):
+    async with async_session_factory() as session:
+        await UserService(session).delete_user(user_id)
+        await session.commit()
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=16, help="Concurrent login loops")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--probe-interval", type=float, default=0.005, help="Seconds between probes")
+    args = parser.parse_args()
+
+    await init_db()
+    user_id, email = await create_user()
+    deadline = time.perf_counter() + args.duration
+    logins = 0
+    login_errors = 0
+    probe_latencies = []
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def login_loop():
+            nonlocal logins, login_errors
+            while time.perf_counter() < deadline:
+                response = await client.post("/api/users/login", json={"email": email, "password": PASSWORD})
+                if response.status_code == 200:
+                    logins += 1
+                else:
+                    login_errors += 1
+
+        async def probe_loop():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                await client.get("/health")
+                probe_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(args.probe_interval)
+
+        await asyncio.gather(probe_loop(), *(login_loop() for _ in range(args.logins)))
+
+    await delete_user(user_id)
+    await engine.dispose()
+
+    print(json.dumps({
+        "login_loops": args.logins,
+        "duration_seconds": args.duration,
+        "logins": logins,
+        "login_errors": login_errors,
+        "logins_per_second": round(logins / args.duration, 1),
+        "probe_requests": len(probe_latencies),
+        "probe_p50_ms": round(statistics.median(probe_latencies) * 1000, 2) if probe_latencies else None,
+        "probe_p99_ms": round(percentile(probe_latencies, 0.99) * 1000, 2) if probe_latencies else None,
+        "password_hasher": password_hasher.stats(),
+    }, indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,145 @@
+"""
+Synthetic data generator for load and scale benchmarks
+
+Creates N warehouses, item units and users and millions of inventory rows
+directly in Postgres with generate_series, in batches so each transaction
+stays bounded. IDs are deterministic (see the `*_id` helpers), so load
+tests can address seeded rows without reading them back. User 0 is an
+admin; every user has the `warehouse` permission and the password
+PASSWORD. Seeding resumes where an earlier, smaller run stopped.
+
+Inventory rows are spread round-robin over the warehouses with globally
+unique SKUs, so each warehouse holds rows / warehouses items.
+
+Usage (against a disposable database from DATABASE_URL):
+    python -m benchmarks.seed --warehouses 100 --units 50 --users 1000 --rows 5000000
+    python -m benchmarks.seed --cleanup
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from sqlalchemy import text
+
+from api.database import async_session_factory, engine, init_db
+from api.utils.password import hash_password_async
+
+TAG = "LOADTEST"
+PASSWORD = "load-test-password"
+SEED_BATCH = 500_000
+
+def warehouse_id(index: int) -> str:
+    return f"wh_{TAG}{index:06d}"
+
+def unit_id(index: int) -> str:
+    return f"iu_{TAG}{index:06d}"
+
+def user_id(index: int) -> str:
+    return f"usr_{TAG}{index:06d}"
+
+def user_email(index: int) -> str:
+    return f"loadtest{index}@bench.example.com"
+
+def inventory_id(index: int) -> str:
+    return f"wi_{TAG}{index:012d}"
+
+def inventory_sku(index: int) -> str:
+    return f"SKU-{TAG}-{index:010d}"
+
+async def count_seeded(table: str) -> int:
+    async with async_session_factory() as session:
+        result = await session.execute(
+            text(f"SELECT count(*) FROM {table} WHERE id LIKE :pattern"),
+            {"pattern": f"%\\_{TAG}%"}
+        )
+        return result.scalar()
+
+async def seed_reference_data(warehouses: int, units: int, users: int):
+    """Insert warehouses, units and users, skipping those already there"""
+    password_hash = await hash_password_async(PASSWORD)
+    async with async_session_factory() as session:
+        await session.execute(text(
+            "INSERT INTO warehouses (id, location, created_at, updated_at) "
+            "SELECT 'wh_' || :tag || lpad(g::text, 6, '0'), 'load-test-' || g, now(), now() "
+            "FROM generate_series(0, :count - 1) g ON CONFLICT DO NOTHING"
+        ), {"tag": TAG, "count": warehouses})
+        await session.execute(text(
+            "INSERT INTO item_units (id, unit, quantity, created_at, updated_at) "
+            "SELECT 'iu_' || :tag || lpad(g::text, 6, '0'), 'load-test-' || g, g + 1, now(), now() "
+            "FROM generate_series(0, :count - 1) g ON CONFLICT DO NOTHING"
+        ), {"tag": TAG, "count": units})
+        # Enum columns store member names
+        await session.execute(text(
+            "INSERT INTO users (id, email, username, password_hash, role, permissions, created_at, updated_at) "
+            "SELECT 'usr_' || :tag || lpad(g::text, 6, '0'), 'loadtest' || g || '@bench.example.com', 'loadtest' || g, "
+            ":password_hash, CASE WHEN g = 0 THEN 'ADMIN' ELSE 'MEMBER' END::userrole, "
+            "'[\"warehouse\"]'::json, now(), now() "
+            "FROM generate_series(0, :count - 1) g ON CONFLICT DO NOTHING"
+        ), {"tag": TAG, "count": users, "password_hash": password_hash})
+        await session.commit()
+
+async def seed_inventory(rows: int, warehouses: int, units: int):
+    """Insert inventory rows in batches of SEED_BATCH"""
+    existing = await count_seeded("warehouse_inventory")
+    for start in range(existing, rows, SEED_BATCH):
+        stop = min(start + SEED_BATCH, rows)
+        async with async_session_factory() as session:
+            await session.execute(text(
+                "INSERT INTO warehouse_inventory (id, warehouse_id, sku, quantity, unit_id, created_at, updated_at) "
+                "SELECT 'wi_' || :tag || lpad(g::text, 12, '0'), "
+                "'wh_' || :tag || lpad((g % :warehouses)::text, 6, '0'), "
+                "'SKU-' || :tag || '-' || lpad(g::text, 10, '0'), "
+                "100 + (g * 7919) % 1000, "
+                "'iu_' || :tag || lpad((g % :units)::text, 6, '0'), now(), now() "
+                "FROM generate_series(:start, :stop - 1) g ON CONFLICT DO NOTHING"
+            ), {"tag": TAG, "warehouses": warehouses, "units": units, "start": start, "stop": stop})
+            await session.commit()
+        print(f"seeded {stop}/{rows} inventory rows", file=sys.stderr)
+
+async def seed(warehouses: int, units: int, users: int, rows: int) -> dict:
+    """Seed the full data set and refresh planner statistics"""
+    started = time.perf_counter()
+    await seed_reference_data(warehouses, units, users)
+    await seed_inventory(rows, warehouses, units)
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in ("warehouses", "item_units", "users", "warehouse_inventory"):
+            await conn.execute(text(f"ANALYZE {table}"))
+    return {
+        "warehouses": await count_seeded("warehouses"),
+        "units": await count_seeded("item_units"),
+        "users": await count_seeded("users"),
+        "rows": await count_seeded("warehouse_inventory"),
+        "seconds": round(time.perf_counter() - started, 1),
+    }
+
+async def cleanup():
+    """Delete the seeded data set"""
+    async with async_session_factory() as session:
+        # Inventory rows go with their warehouse (ON DELETE CASCADE)
+        await session.execute(text("DELETE FROM warehouses WHERE id LIKE :pattern"), {"pattern": f"wh\\_{TAG}%"})
+        await session.execute(text("DELETE FROM item_units WHERE id LIKE :pattern"), {"pattern": f"iu\\_{TAG}%"})
+        await session.execute(text("DELETE FROM users WHERE id LIKE :pattern"), {"pattern": f"usr\\_{TAG}%"})
+        await session.commit()
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--warehouses", type=int, default=100)
+    parser.add_argument("--units", type=int, default=50)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--rows", type=int, default=5_000_000, help="Inventory rows")
+    parser.add_argument("--cleanup", action="store_true", help="Delete the data set and exit")
+    args = parser.parse_args()
+
+    await init_db()
+    if args.cleanup:
+        await cleanup()
+    else:
+        print(json.dumps(await seed(args.warehouses, args.units, args.users, args.rows), indent=2))
+    await engine.dispose()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,140 @@
+"""
+Per-page serialization cost of the list endpoints
+
+Compares, for each list endpoint, the time to turn one page into JSON
+bytes the old way and through the route's ResponseEncoder:
+
+- before: entities wrapped in the response DTO, dumped and re-validated
+  against `response_model` as FastAPI does, then encoded with stdlib json
+- after: column rows validated once and dumped to JSON by pydantic-core
+
+Both paths must produce the same JSON. No database is needed.
+
+Usage:
+    python -m benchmarks.serialization --page-size 100 --iterations 2000
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy.engine.result import result_tuple
+
+from api.modules.item_unit.controller.item_unit_controller import list_encoder as item_unit_encoder
+from api.modules.item_unit.dto.input import ItemUnitResponse
+from api.modules.item_unit.entity.item_unit_entity import ItemUnit
+from api.modules.item_unit.repository.item_unit_repo import LIST_COLUMNS as ITEM_UNIT_COLUMNS
+from api.modules.user.controller.user_controller import page_encoder as user_encoder
+from api.modules.user.dto.input import PaginatedUsersResponse
+from api.modules.user.entity.user_entity import User, UserRole
+from api.modules.user.repository.user_repo import LIST_COLUMNS as USER_COLUMNS
+from api.modules.warehouse.controller.warehouse_controller import page_encoder as warehouse_encoder
+from api.modules.warehouse.dto.input import PaginationWarehouseResponse
+from api.modules.warehouse.entity.warehouse_entity import Warehouse
+from api.modules.warehouse.repository.warehouse_repo import LIST_COLUMNS as WAREHOUSE_COLUMNS
+from api.modules.warehouse_inventory.controller.warehouse_inventory_controller import page_encoder as inventory_encoder
+from api.modules.warehouse_inventory.dto.input import PaginationWarehouseInventoryResponse
+from api.modules.warehouse_inventory.entity.warehouse_inventory_entity import WarehouseInventory
+from api.modules.warehouse_inventory.repository.warehouse_inventory_repo import LIST_COLUMNS as INVENTORY_COLUMNS
+from pydantic import TypeAdapter
+
+def warehouse_values(index: int, now: datetime) -> dict:
+    return {"id": f"wh_{index:026d}", "location": f"Location {index}", "created_at": now, "updated_at": now, "version": 1}
+
+def inventory_values(index: int, now: datetime) -> dict:
+    return {
+        "id": f"wi_{index:026d}", "warehouse_id": "wh_00000000000000000000000001", "sku": f"SKU-{index:08d}",
+        "quantity": float(index % 1000), "unit_id": "iu_00000000000000000000000001",
+        "created_at": now, "updated_at": now, "version": 3,
+    }
+
+def item_unit_values(index: int, now: datetime) -> dict:
+    return {"id": f"iu_{index:026d}", "unit": f"unit-{index}", "quantity": float(index + 1), "created_at": now, "updated_at": now, "version": 1}
+
+def user_values(index: int, now: datetime) -> dict:
+    return {
+        "id": f"us_{index:026d}", "email": f"user{index}@bench.example.com", "username": f"user{index}",
+        "role": UserRole.MEMBER, "phone": None, "permissions": ["warehouse"], "api_key_prefix": None,
+        "created_at": now, "updated_at": now, "version": 2,
+    }
+
+# name -> (entity, list columns, values, page schema, encoder, envelope key or None for bare lists)
+ENDPOINTS = {
+    "GET /api/warehouses/": (Warehouse, WAREHOUSE_COLUMNS, warehouse_values, PaginationWarehouseResponse, warehouse_encoder, "warehouses"),
+    "GET /api/inventory/": (WarehouseInventory, INVENTORY_COLUMNS, inventory_values, PaginationWarehouseInventoryResponse, inventory_encoder, "inventory"),
+    "GET /api/units/": (ItemUnit, ITEM_UNIT_COLUMNS, item_unit_values, List[ItemUnitResponse], item_unit_encoder, None),
+    "GET /api/users/": (User, USER_COLUMNS, user_values, PaginatedUsersResponse, user_encoder, "users"),
+}
+
+def envelope(items, key):
+    if key is None:
+        return items
+    return {key: items, "count": 12345, "offset": 0, "limit": len(items), "next_cursor": "eyJpZCI6IjEifQ"}
+
+def stdlib_render(content) -> bytes:
+    # What starlette's JSONResponse does with the serialized content
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def measure(function, iterations: int) -> List[float]:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    return samples
+
+def run_endpoint(name, spec, page_size: int, iterations: int) -> dict:
+    entity, columns, make_values, schema, encoder, key = spec
+    now = datetime(2024, 1, 1) + timedelta(microseconds=123456)
+    values = [make_values(index, now) for index in range(page_size)]
+    entities = [entity(**row) for row in values]
+    make_row = result_tuple([column.key for column in columns])
+    rows = [make_row([row[column.key] for column in columns]) for row in values]
+    adapter = TypeAdapter(schema)
+
+    def before():
+        content = envelope(entities, key)
+        if key is not None:
+            # The route built the page DTO from entities and FastAPI dumped it
+            content = adapter.dump_python(adapter.validate_python(content, from_attributes=True))
+        # FastAPI then validated it against response_model and serialized it
+        value = adapter.validate_python(content, from_attributes=True)
+        return stdlib_render(adapter.dump_python(value, mode="json"))
+
+    def after():
+        return encoder.encode(envelope(rows, key))
+
+    if json.loads(before()) != json.loads(after()):
+        raise AssertionError(f"{name}: encoders disagree")
+
+    # Untimed warm-up so both paths have built their caches
+    measure(before, 10)
+    measure(after, 10)
+    before_samples = measure(before, iterations)
+    after_samples = measure(after, iterations)
+    before_us = statistics.median(before_samples)
+    after_us = statistics.median(after_samples)
+    return {
+        "endpoint": name,
+        "page_size": page_size,
+        "before_us": round(before_us, 1),
+        "after_us": round(after_us, 1),
+        "speedup": round(before_us / after_us, 2) if after_us else None,
+        "bytes": len(after()),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=2000, help="Timed encodings per path and endpoint")
+    args = parser.parse_args()
+
+    results = [run_endpoint(name, spec, args.page_size, args.iterations) for name, spec in ENDPOINTS.items()]
+    print(json.dumps({"results": results}, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Concurrency stress test for inter-warehouse stock transfers
+
+Runs many concurrent workers moving random quantities of a small set of
+SKUs between a few warehouses, mixing single transfers and multi-SKU
+batches in both directions so that lock conflicts are frequent. Reports
+throughput, rejected transfers (insufficient stock) and deadlocks, then
+checks that every SKU's total stock was conserved and no row went negative.
+
+Usage (against a disposable database from DATABASE_URL):
+    python -m benchmarks.transfer_concurrency --workers 32 --operations 200
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import DBAPIError
+
+from api.database import async_session_factory, engine, init_db
+from api.modules.item_unit.dto.input import ItemUnitCreate
+from api.modules.item_unit.service.item_unit_service import ItemUnitService
+from api.modules.warehouse.dto.input import WarehouseCreate
+from api.modules.warehouse.service.warehouse_service import WarehouseService
+from api.modules.warehouse_inventory.dto.input import InventoryTransfer, WarehouseInventoryCreate
+from api.modules.warehouse_inventory.entity.warehouse_inventory_entity import WarehouseInventory
+from api.modules.warehouse_inventory.service.warehouse_inventory_service import WarehouseInventoryService
+from api.utils.id_generator import generate_id, Prefix
+
+async def setup(warehouses: int, skus: int, initial_quantity: int):
+    """Create throwaway warehouses and a unit; stock every SKU in the first warehouse only"""
+    suffix = generate_id(Prefix.WAREHOUSE)
+    async with async_session_factory() as session:
+        warehouse_service = WarehouseService(session)
+        warehouse_ids = [
+            (await warehouse_service.create_warehouse(WarehouseCreate(location=f"bench-{suffix}-{index}"))).id
+            for index in range(warehouses)
+        ]
+        unit = await ItemUnitService(session).create_item_unit(ItemUnitCreate(unit=f"bench-{suffix}", quantity=1))
+        inventory_service = WarehouseInventoryService(session)
+        sku_names = [f"BENCH-{index:04d}" for index in range(skus)]
+        for sku in sku_names:
+            await inventory_service.create_inventory(WarehouseInventoryCreate(
+                warehouse_id=warehouse_ids[0], sku=sku, quantity=initial_quantity, unit_id=unit.id
+            ))
+        await session.commit()
+        return warehouse_ids, unit.id, sku_names
+
+async def teardown(warehouse_ids, unit_id: str):
+    async with async_session_factory() as session:
+        warehouse_service = WarehouseService(session)
+        for warehouse_id in warehouse_ids:
+            await warehouse_service.delete_warehouse(warehouse_id)
+        await ItemUnitService(session).delete_item_unit(unit_id)
+        await session.commit()
+
+def is_deadlock(error: DBAPIError) -> bool:
+    return "deadlock" in str(error.orig).lower()
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--operations", type=int, default=200, help="Transfers per worker")
+    parser.add_argument("--warehouses", type=int, default=4)
+    parser.add_argument("--skus", type=int, default=8)
+    parser.add_argument("--max-batch", type=int, default=5, help="Largest multi-SKU batch")
+    parser.add_argument("--initial-quantity", type=int, default=100_000)
+    args = parser.parse_args()
+
+    await init_db()
+    warehouse_ids, unit_id, skus = await setup(args.warehouses, args.skus, args.initial_quantity)
+    stats = {"committed": 0, "rejected": 0, "deadlocks": 0, "errors": 0}
+
+    def random_transfer():
+        source, destination = random.sample(warehouse_ids, 2)
+        return InventoryTransfer(
+            source_warehouse_id=source,
+            destination_warehouse_id=destination,
+            sku=random.choice(skus),
+            quantity=random.randint(1, 10),
+        )
+
+    async def worker():
+        for _ in range(args.operations):
+            transfers = [random_transfer() for _ in range(random.randint(1, args.max_batch))]
+            try:
+                async with async_session_factory() as session:
+                    await WarehouseInventoryService(session).transfer_stock(transfers)
+                    await session.commit()
+                stats["committed"] += 1
+            except ValueError:
+                stats["rejected"] += 1
+            except DBAPIError as e:
+                stats["deadlocks" if is_deadlock(e) else "errors"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.workers)))
+    elapsed = time.perf_counter() - started
+
+    async with async_session_factory() as session:
+        totals = dict((await session.execute(
+            select(WarehouseInventory.sku, func.sum(WarehouseInventory.quantity))
+            .where(WarehouseInventory.warehouse_id.in_(warehouse_ids))
+            .group_by(WarehouseInventory.sku)
+        )).all())
+        negative = (await session.execute(
+            select(func.count())
+            .select_from(WarehouseInventory)
+            .where(WarehouseInventory.warehouse_id.in_(warehouse_ids), WarehouseInventory.quantity < 0)
+        )).scalar()
+    await teardown(warehouse_ids, unit_id)
+    await engine.dispose()
+
+    total = args.workers * args.operations
+    conserved = all(totals.get(sku) == args.initial_quantity for sku in skus)
+    print(json.dumps({
+        "transactions": total,
+        **stats,
+        "seconds": round(elapsed, 3),
+        "transactions_per_second": round(total / elapsed, 1),
+        "stock_conserved": conserved,
+        "negative_rows": negative,
+    }, indent=2))
+    return 0 if conserved and negative == 0 and stats["deadlocks"] == 0 and stats["errors"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,30 @@
+from celery import Celery
+
+from api.config import settings
+
+celery_app = Celery(
+    "warehouse_worker",
+    # memory:// keeps the worker usable without Redis in development and tests
+    broker=settings.CELERY_BROKER_URL or settings.REDIS_URL or "memory://",
+    include=["worker.tasks"],
+)
+
+celery_app.conf.update(
+    # Jobs are resumable, so redeliver them if a worker dies mid-run
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    task_serializer="json",
+    accept_content=["json"],
+    # Run with `celery -A worker.celery_app beat` alongside the workers
+    beat_schedule={
+        "inventory-snapshots": {
+            "task": "inventory.take_snapshots",
+            "schedule": float(settings.INVENTORY_SNAPSHOT_INTERVAL_SECONDS),
+        },
+        "inventory-summary-fold": {
+            "task": "inventory.fold_summaries",
+            "schedule": settings.INVENTORY_SUMMARY_FOLD_SECONDS,
+        },
+    },
+)
@@ -0,0 +1,43 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from api.config import settings
+from api.modules.job.service.job_runner import JobRunner
+from api.modules.inventory_ledger.service.snapshot_runner import SnapshotRunner
+from api.modules.warehouse_inventory.service.inventory_summary_service import InventorySummaryService
+from worker.celery_app import celery_app
+
+async def _with_session_factory(run: Callable[[Callable], Awaitable]):
+    # Each task runs in a fresh event loop, so it cannot share the API's pooled
+    # asyncpg connections; use an unpooled engine scoped to the task
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        return await run(session_factory)
+    finally:
+        await engine.dispose()
+
+@celery_app.task(name="jobs.run")
+def run_job(job_id: str) -> None:
+    """Run a background job by ID"""
+    asyncio.run(_with_session_factory(lambda session_factory: JobRunner(session_factory).run(job_id)))
+
+@celery_app.task(name="inventory.take_snapshots")
+def take_inventory_snapshots() -> int:
+    """Take the inventory snapshots of the latest boundary"""
+    return asyncio.run(_with_session_factory(lambda session_factory: SnapshotRunner(session_factory).run()))
+
+async def _fold_summaries(session_factory: Callable) -> Optional[int]:
+    async with session_factory() as session:
+        folded = await InventorySummaryService(session).try_fold_deltas()
+        await session.commit()
+    return folded
+
+@celery_app.task(name="inventory.fold_summaries")
+def fold_inventory_summaries() -> Optional[int]:
+    """Fold the pending per-SKU and per-warehouse summary deltas, unless a fold is already running"""
+    return asyncio.run(_with_session_factory(_fold_summaries))